@@ -0,0 +1,47 @@
+"""Add task recurrence dates
+
+Revision ID: 3414117a7eb4
+Revises: 1589ea24f25e
+Create Date: 2026-10-18 20:37:05.912846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3414117a7eb4'
+down_revision: Union[str, None] = '1589ea24f25e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('recurrence_date', sa.DateTime(timezone=True), nullable=True))
+    # Pin the DTSTART of existing series
+    op.execute(
+        "UPDATE tasks SET recurrence_date = COALESCE(due_date, created_at) "
+        "WHERE is_recurring = true AND recurrence_parent_id IS NULL"
+    )
+    op.create_index(
+        'ix_tasks_user_series',
+        'tasks',
+        ['user_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_deleted = false AND is_recurring = true AND recurrence_parent_id IS NULL')
+    )
+    op.create_index(
+        'uq_tasks_recurrence',
+        'tasks',
+        ['recurrence_parent_id', 'recurrence_date'],
+        unique=True,
+        postgresql_where=sa.text('recurrence_parent_id IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_tasks_recurrence', table_name='tasks')
+    op.drop_index('ix_tasks_user_series', table_name='tasks')
+    op.drop_column('tasks', 'recurrence_date')
@@ -0,0 +1,48 @@
+"""Add trigram search indexes
+
+Revision ID: 40d366e15182
+Revises: 568ba143e2c8
+Create Date: 2026-10-18 10:03:17.552931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '40d366e15182'
+down_revision: Union[str, None] = '568ba143e2c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGRAM_INDEXES = [
+    ('ix_tasks_title_trgm', 'tasks', 'title'),
+    ('ix_tasks_description_trgm', 'tasks', 'description'),
+    ('ix_users_email_trgm', 'users', 'email'),
+    ('ix_users_username_trgm', 'users', 'username'),
+    ('ix_users_first_name_trgm', 'users', 'first_name'),
+    ('ix_users_last_name_trgm', 'users', 'last_name'),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column_name: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    for index_name, table_name, column_name in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index_name, table_name=table_name, postgresql_using='gin')
+    # The pg_trgm extension is left installed; other objects may depend on it
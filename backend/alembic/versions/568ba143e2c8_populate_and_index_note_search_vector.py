@@ -0,0 +1,58 @@
+"""Populate and index note search vector
+
+Revision ID: 568ba143e2c8
+Revises: a35f4f6be429
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '568ba143e2c8'
+down_revision: Union[str, None] = 'a35f4f6be429'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep content_search_vector in sync with title (weight A) and content (weight B)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notes_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.content_search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER notes_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, content ON notes
+        FOR EACH ROW EXECUTE FUNCTION notes_search_vector_update()
+    """)
+
+    # Backfill existing notes
+    op.execute("""
+        UPDATE notes SET content_search_vector =
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    """)
+
+    op.create_index(
+        'ix_notes_content_search_vector',
+        'notes',
+        ['content_search_vector'],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_content_search_vector', table_name='notes', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS notes_search_vector_trigger ON notes")
+    op.execute("DROP FUNCTION IF EXISTS notes_search_vector_update()")
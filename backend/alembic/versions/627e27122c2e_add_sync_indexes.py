@@ -0,0 +1,43 @@
+"""Add indexes for the sync change feed
+
+Revision ID: 627e27122c2e
+Revises: 742dfc9b25b2
+Create Date: 2026-10-18 16:02:37.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '627e27122c2e'
+down_revision: Union[str, None] = '742dfc9b25b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keyset scans by (updated_at, id) per user. Not partial, since the feed
+# also returns soft-deleted rows.
+TABLES = ['projects', 'tasks', 'notes', 'habits', 'habit_logs']
+
+
+def upgrade() -> None:
+    # Build without blocking writes on large tables
+    with op.get_context().autocommit_block():
+        for table_name in TABLES:
+            op.create_index(
+                f'ix_{table_name}_user_sync',
+                table_name,
+                ['user_id', 'updated_at', 'id'],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table_name in reversed(TABLES):
+            op.drop_index(f'ix_{table_name}_user_sync', table_name=table_name, postgresql_concurrently=True)
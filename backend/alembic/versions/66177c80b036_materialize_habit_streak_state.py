@@ -0,0 +1,61 @@
+"""Materialize habit streak state
+
+Revision ID: 66177c80b036
+Revises: ac5c89f55ccb
+Create Date: 2026-10-18 12:04:51.330912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66177c80b036'
+down_revision: Union[str, None] = 'ac5c89f55ccb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Replace any per-check-in streak rows with one state row per habit
+    op.execute("DELETE FROM habit_streaks")
+    op.create_index(
+        'uq_habit_streaks_habit',
+        'habit_streaks',
+        ['habit_id'],
+        unique=True,
+        postgresql_where=sa.text('is_deleted = false')
+    )
+    
+    # Backfill from completed logs: latest run of consecutive days and best run
+    op.execute("""
+        INSERT INTO habit_streaks (
+            id, habit_id, user_id, start_date, last_check_in, current_count,
+            longest_count, is_active, freeze_count, max_freezes, is_deleted
+        )
+        SELECT DISTINCT ON (habit_id)
+            gen_random_uuid(), habit_id, user_id, start_date, last_date, length,
+            max(length) OVER (PARTITION BY habit_id), true, 0, 2, false
+        FROM (
+            SELECT habit_id, user_id, min(log_date) AS start_date,
+                   max(log_date) AS last_date, count(*) AS length
+            FROM (
+                SELECT habit_logs.habit_id, habits.user_id, habit_logs.log_date,
+                       habit_logs.log_date - CAST(row_number() OVER (
+                           PARTITION BY habit_logs.habit_id ORDER BY habit_logs.log_date
+                       ) AS INTEGER) AS island
+                FROM habit_logs JOIN habits ON habits.id = habit_logs.habit_id
+                WHERE habits.is_deleted = false
+                  AND habit_logs.completed = true
+                  AND habit_logs.is_deleted = false
+            ) AS numbered
+            GROUP BY habit_id, user_id, island
+        ) AS islands
+        ORDER BY habit_id, last_date DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_habit_streaks_habit', table_name='habit_streaks', postgresql_where=sa.text('is_deleted = false'))
@@ -0,0 +1,29 @@
+"""Add revision to notes
+
+Revision ID: 742dfc9b25b2
+Revises: d314db1fb74c
+Create Date: 2026-10-18 14:48:12.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '742dfc9b25b2'
+down_revision: Union[str, None] = 'd314db1fb74c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'notes',
+        sa.Column('revision', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('notes', 'revision')
@@ -0,0 +1,59 @@
+"""Add import jobs
+
+Revision ID: 985de65bfd7a
+Revises: 627e27122c2e
+Create Date: 2026-10-18 17:41:09.204871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '985de65bfd7a'
+down_revision: Union[str, None] = '627e27122c2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_jobs',
+    sa.Column('format', sa.Enum('NDJSON', 'MARKDOWN', name='importformat'), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='importstatus'), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('created', sa.JSON(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('skipped', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.JSON(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_jobs_is_deleted'), 'import_jobs', ['is_deleted'], unique=False)
+    op.create_index(op.f('ix_import_jobs_user_id'), 'import_jobs', ['user_id'], unique=False)
+    op.create_index(
+        'ix_import_jobs_user_created',
+        'import_jobs',
+        ['user_id', sa.text('created_at DESC')],
+        unique=False,
+        postgresql_where=sa.text('is_deleted = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_user_created', table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_user_id'), table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_is_deleted'), table_name='import_jobs')
+    op.drop_table('import_jobs')
+    op.execute('DROP TYPE IF EXISTS importstatus')
+    op.execute('DROP TYPE IF EXISTS importformat')
@@ -0,0 +1,30 @@
+"""Add origin to note links
+
+Revision ID: a63777c935c4
+Revises: 66177c80b036
+Create Date: 2026-10-18 13:21:09.552860
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a63777c935c4'
+down_revision: Union[str, None] = '66177c80b036'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing links were all created through the API
+    op.add_column(
+        'note_links',
+        sa.Column('origin', sa.String(length=20), server_default='manual', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('note_links', 'origin')
@@ -0,0 +1,84 @@
+"""Add composite partial indexes for repository access paths
+
+Revision ID: ac5c89f55ccb
+Revises: 40d366e15182
+Create Date: 2026-10-18 11:26:05.904317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ac5c89f55ccb'
+down_revision: Union[str, None] = '40d366e15182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NOT_DELETED = 'is_deleted = false'
+
+# (index name, table, columns, partial index predicate)
+INDEXES = [
+    # get_multi_by_user default ordering and keyset pagination
+    ('ix_tasks_user_created', 'tasks', ['user_id', 'created_at DESC', 'id DESC'], NOT_DELETED),
+    ('ix_notes_user_created', 'notes', ['user_id', 'created_at DESC', 'id DESC'], NOT_DELETED),
+    ('ix_projects_user_created', 'projects', ['user_id', 'created_at DESC', 'id DESC'], NOT_DELETED),
+    ('ix_habits_user_created', 'habits', ['user_id', 'created_at DESC', 'id DESC'], NOT_DELETED),
+    # Note lists, tag filters and search fall back to most recently updated
+    ('ix_notes_user_updated', 'notes', ['user_id', 'updated_at DESC', 'id DESC'], NOT_DELETED),
+    # get_overdue and due date ordering
+    ('ix_tasks_user_due', 'tasks', ['user_id', 'due_date', 'id'], NOT_DELETED),
+    # Status filters and per-status stats
+    ('ix_tasks_user_status', 'tasks', ['user_id', 'status'], NOT_DELETED),
+    # get_by_project and project task counts
+    ('ix_tasks_user_project', 'tasks', ['user_id', 'project_id'], f'{NOT_DELETED} AND project_id IS NOT NULL'),
+    # get_subtasks
+    ('ix_tasks_user_parent', 'tasks', ['user_id', 'parent_task_id'], f'{NOT_DELETED} AND parent_task_id IS NOT NULL'),
+    # Habit log ranges across all of a user's habits
+    ('ix_habit_logs_user_date', 'habit_logs', ['user_id', 'log_date DESC', 'id DESC'], NOT_DELETED),
+    # Completed logs per habit for streaks and today's status; lookups by
+    # (habit_id, log_date) on all rows are already served by uq_habit_log_date
+    ('ix_habit_logs_habit_completed', 'habit_logs', ['habit_id', 'log_date'], f'{NOT_DELETED} AND completed = true'),
+]
+
+# Foreign-key side lookups that have no index yet
+PLAIN_INDEXES = [
+    # Backlinks: note_links' primary key only covers source_note_id first
+    ('ix_note_links_target', 'note_links', ['target_note_id']),
+    ('ix_note_tags_tag', 'note_tags', ['tag_id']),
+]
+
+
+def upgrade() -> None:
+    # Build without blocking writes on large tables
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns, where in INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [sa.text(column) for column in columns],
+                unique=False,
+                postgresql_where=sa.text(where),
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+        for index_name, table_name, columns in PLAIN_INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in reversed(PLAIN_INDEXES):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+        for index_name, table_name, columns, where in reversed(INDEXES):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
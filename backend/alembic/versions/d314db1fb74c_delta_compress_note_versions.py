@@ -0,0 +1,55 @@
+"""Delta-compress note versions
+
+Revision ID: d314db1fb74c
+Revises: a63777c935c4
+Create Date: 2026-10-18 14:02:37.184422
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd314db1fb74c'
+down_revision: Union[str, None] = 'a63777c935c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing versions are full copies, so they all become snapshots
+    op.add_column(
+        'note_versions',
+        sa.Column('is_snapshot', sa.Boolean(), server_default=sa.true(), nullable=False)
+    )
+    op.add_column('note_versions', sa.Column('delta', sa.JSON(), nullable=True))
+    op.alter_column('note_versions', 'content', existing_type=sa.Text(), nullable=True)
+    
+    # Versions were never numbered; number them per note in creation order
+    op.execute("""
+        UPDATE note_versions SET version_number = numbered.version_number
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY note_id ORDER BY created_at, id
+            ) AS version_number
+            FROM note_versions
+        ) AS numbered
+        WHERE note_versions.id = numbered.id
+    """)
+    op.create_index(
+        'uq_note_versions_note_version',
+        'note_versions',
+        ['note_id', 'version_number'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_note_versions_note_version', table_name='note_versions')
+    # Deltas can't be expanded in SQL; only snapshots survive the downgrade
+    op.execute("DELETE FROM note_versions WHERE is_snapshot = false")
+    op.alter_column('note_versions', 'content', existing_type=sa.Text(), nullable=False)
+    op.drop_column('note_versions', 'delta')
+    op.drop_column('note_versions', 'is_snapshot')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import users, tasks, notes, habits, health
+from app.api.endpoints import users, tasks, notes, habits, health, dashboard, sync, events, export, imports, jobs
 
 api_router = APIRouter()
 
@@ -8,5 +8,14 @@ api_router = APIRouter()
 api_router.include_router(health.router, tags=["health"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
+api_router.include_router(tasks.batch_router, tags=["tasks"])
 api_router.include_router(notes.router, prefix="/notes", tags=["notes"])
-api_router.include_router(habits.router, prefix="/habits", tags=["habits"])
\ No newline at end of file
+api_router.include_router(notes.batch_router, tags=["notes"])
+api_router.include_router(habits.router, prefix="/habits", tags=["habits"])
+api_router.include_router(habits.batch_router, tags=["habits"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
\ No newline at end of file
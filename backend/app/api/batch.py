@@ -0,0 +1,128 @@
+"""
+Shared handling for batch create, update and delete endpoints.
+
+Each item is validated on its own and reported by its position in the
+request. The valid items are then written by the repository in a single
+transaction.
+"""
+from typing import Any, Dict, List, Optional, Type
+from uuid import UUID
+
+from fastapi import status
+from pydantic import BaseModel, ValidationError
+
+from app.repositories.base import UserOwnedRepository
+from app.schemas.base import BatchCreate, BatchUpdate, BatchDelete
+
+
+def _item(
+    index: int,
+    code: int,
+    id: Optional[UUID] = None,
+    error: Optional[str] = None
+) -> Dict[str, Any]:
+    return {"index": index, "id": id, "status": code, "error": error}
+
+
+def _invalid(index: int, error: ValidationError, id: Optional[UUID] = None) -> Dict[str, Any]:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    message = f"{location}: {first['msg']}" if location else first["msg"]
+    return _item(index, status.HTTP_422_UNPROCESSABLE_ENTITY, id, message)
+
+
+def _summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    failed = sum(1 for result in results if result["error"] is not None)
+    return {
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+
+async def batch_create(
+    repo: UserOwnedRepository,
+    user_id: str,
+    batch: BatchCreate,
+    schema: Type[BaseModel]
+) -> Dict[str, Any]:
+    """Validate items against ``schema`` and create the valid ones"""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.items)
+    valid, indexes = [], []
+    
+    for index, item in enumerate(batch.items):
+        try:
+            valid.append(schema.model_validate(item).model_dump())
+            indexes.append(index)
+        except ValidationError as e:
+            results[index] = _invalid(index, e)
+    
+    created = await repo.create_many_for_user(user_id, valid) if valid else []
+    for index, db_obj in zip(indexes, created):
+        results[index] = _item(index, status.HTTP_201_CREATED, db_obj.id)
+    
+    return _summary(results)
+
+
+async def batch_update(
+    repo: UserOwnedRepository,
+    user_id: str,
+    batch: BatchUpdate,
+    schema: Type[BaseModel]
+) -> Dict[str, Any]:
+    """Validate the changes in each item against ``schema`` and apply them"""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.items)
+    updates: Dict[UUID, Dict[str, Any]] = {}
+    indexes: Dict[UUID, int] = {}
+    
+    for index, item in enumerate(batch.items):
+        changes = dict(item)
+        try:
+            id = UUID(str(changes.pop("id")))
+        except (KeyError, ValueError):
+            results[index] = _item(
+                index,
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                error="id: a valid UUID is required"
+            )
+            continue
+        
+        if id in updates:
+            results[index] = _item(
+                index,
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                id,
+                "Duplicate id in batch"
+            )
+            continue
+        
+        try:
+            updates[id] = schema.model_validate(changes).model_dump(exclude_unset=True)
+            indexes[id] = index
+        except ValidationError as e:
+            results[index] = _invalid(index, e, id)
+    
+    found = set(await repo.update_many_for_user(user_id, updates)) if updates else set()
+    for id, index in indexes.items():
+        if id in found:
+            results[index] = _item(index, status.HTTP_200_OK, id)
+        else:
+            results[index] = _item(index, status.HTTP_404_NOT_FOUND, id, "Not found")
+    
+    return _summary(results)
+
+
+async def batch_delete(
+    repo: UserOwnedRepository,
+    user_id: str,
+    batch: BatchDelete
+) -> Dict[str, Any]:
+    """Soft delete the given records"""
+    deleted = set(await repo.delete_many_for_user(user_id, list(dict.fromkeys(batch.ids))))
+    
+    return _summary([
+        _item(index, status.HTTP_204_NO_CONTENT, id)
+        if id in deleted
+        else _item(index, status.HTTP_404_NOT_FOUND, id, "Not found")
+        for index, id in enumerate(batch.ids)
+    ])
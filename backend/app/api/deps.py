@@ -1,14 +1,18 @@
 from typing import Optional, Annotated, Dict, Any
-from fastapi import Depends, HTTPException, status
+from datetime import datetime
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, on_commit
 from app.core.clerk_auth import clerk_auth
+from app.core.etag import make_etag, http_date, is_not_modified
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.models.user import User
 from app.repositories.user import UserRepository
 from app.schemas.user import UserCreate
+from app.services.user_cache import user_cache, claims_fingerprint
 
 
 # Security scheme
@@ -51,12 +55,28 @@ async def get_current_user(
     Get current user from database, creating if necessary.
     
     This function uses the user info from Clerk to fetch or create the user.
+    Resolved users are cached by Clerk ID; the database is only consulted
+    when the cache misses or the synced profile claims have changed.
     """
-    user_repo = UserRepository(User, db)
     clerk_id = user_info["clerk_id"]
+    fingerprint = claims_fingerprint(user_info)
+    
+    cached = await user_cache.get(clerk_id)
+    if cached:
+        user, cached_fingerprint = cached
+        if cached_fingerprint == fingerprint:
+            if not user.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Inactive user"
+                )
+            return user
+    
+    user_repo = UserRepository(User, db)
     
     # Try to get existing user
     user = await user_repo.get_by_clerk_id(clerk_id)
+    created = user is None
     
     if not user:
         # Create new user from Clerk data
@@ -73,12 +93,7 @@ async def get_current_user(
             is_verified=user_info.get("email_verified", False)
         )
         
-        try:
-            user = await user_repo.create(user_create.model_dump())
-            await db.commit()
-        except Exception as e:
-            await db.rollback()
-            raise
+        user = await user_repo.create(user_create.model_dump())
     
     if not user:
         raise HTTPException(
@@ -105,8 +120,12 @@ async def get_current_user(
     
     if update_data:
         user = await user_repo.update(user.id, update_data)
-        await db.commit()
     
+    if created or update_data:
+        # Cache the user once the request's unit of work has committed
+        on_commit(db, lambda: user_cache.set(user, fingerprint))
+    else:
+        await user_cache.set(user, fingerprint)
     return user
 
 
@@ -132,15 +151,29 @@ async def get_optional_current_user(
 
 # Common query parameters
 class PaginationParams:
-    """Common pagination parameters"""
+    """
+    Common pagination parameters.
+    
+    Supports offset pagination (skip/limit) and keyset pagination: pass the
+    X-Next-Cursor header of one page as ``cursor`` to get the next page.
+    """
     
     def __init__(
         self,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ):
+        self.response = response
         self.skip = skip
         self.limit = min(limit, 1000)  # Cap at 1000 to prevent abuse
+        self.cursor = cursor  # Opaque keyset cursor; takes precedence over skip
+    
+    def set_next_cursor(self, cursor: Optional[str]) -> None:
+        """Return the cursor for the next page in the response headers"""
+        if cursor:
+            self.response.headers[NEXT_CURSOR_HEADER] = cursor
 
 
 class SortParams:
@@ -153,7 +186,7 @@ class SortParams:
     ):
         self.sort_by = sort_by
         self.sort_desc = sort_desc
-        
+    
     @property
     def order_by(self) -> Optional[str]:
         """Get order_by string for repository"""
@@ -162,9 +195,44 @@ class SortParams:
         return f"-{self.sort_by}" if self.sort_desc else self.sort_by
 
 
+class ConditionalParams:
+    """
+    Conditional GET support.
+    
+    Endpoints pass cheap version values for what they would return to
+    ``check``. When the client's copy is current they return
+    ``not_modified()`` without loading or serializing the body.
+    """
+    
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+    
+    def check(self, *version: Any, last_modified: Optional[datetime] = None) -> bool:
+        """Set the response validators for ``version``; True if the client's copy is current"""
+        etag = make_etag(self.request.url.path, self.request.url.query, *version)
+        self.response.headers["ETag"] = etag
+        # Per-user data: clients may keep it, but must revalidate before use
+        self.response.headers["Cache-Control"] = "private, no-cache"
+        if last_modified is not None:
+            self.response.headers["Last-Modified"] = http_date(last_modified)
+        
+        return is_not_modified(self.request.headers, etag, last_modified)
+    
+    def not_modified(self) -> Response:
+        """Empty 304 response carrying the validators"""
+        headers = {
+            name: value
+            for name, value in self.response.headers.items()
+            if name in ("etag", "last-modified", "cache-control")
+        }
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
 # Type aliases for cleaner code
 CurrentUser = Annotated[User, Depends(get_current_user)]
 ClerkUserInfo = Annotated[Dict[str, Any], Depends(get_clerk_user_info)]
 DbSession = Annotated[AsyncSession, Depends(get_db)]
 Pagination = Annotated[PaginationParams, Depends()]
-Sorting = Annotated[SortParams, Depends()]
\ No newline at end of file
+Sorting = Annotated[SortParams, Depends()]
+Conditional = Annotated[ConditionalParams, Depends()]
\ No newline at end of file
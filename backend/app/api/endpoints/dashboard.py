@@ -0,0 +1,48 @@
+import asyncio
+from typing import Dict, Any
+
+from fastapi import APIRouter
+
+from app.api.deps import CurrentUser
+from app.core.database import AsyncSessionLocal
+from app.models.task import Task
+from app.models.note import Note
+from app.models.habit import Habit
+from app.repositories.task import TaskRepository
+from app.repositories.note import NoteRepository
+from app.repositories.habit import HabitRepository
+from app.services.aggregate_cache import aggregates, Loader
+
+router = APIRouter()
+
+
+async def _cached_stats(user_id: str, scope: str, load: Loader) -> Dict[str, Any]:
+    """Get a module's stats from the aggregate cache, loading misses on their own session"""
+    async with AsyncSessionLocal() as session:
+        return await aggregates.get_or_load(session, user_id, scope, "stats", load)
+
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def get_dashboard_stats(
+    current_user: CurrentUser
+) -> Dict[str, Any]:
+    """
+    Get task, note and habit statistics for the current user.
+    
+    Each module's stats come from the aggregate cache shared with the
+    module's own /stats endpoint. A session can only run one query at a
+    time, so misses are loaded concurrently on separate sessions.
+    """
+    user_id = current_user.clerk_id
+    
+    tasks, notes, habits = await asyncio.gather(
+        _cached_stats(user_id, "tasks", lambda db: TaskRepository(Task, db).get_stats(user_id)),
+        _cached_stats(user_id, "notes", lambda db: NoteRepository(Note, db).get_stats(user_id)),
+        _cached_stats(user_id, "habits", lambda db: HabitRepository(Habit, db).get_stats(user_id)),
+    )
+    
+    return {
+        "tasks": tasks,
+        "notes": notes,
+        "habits": habits
+    }
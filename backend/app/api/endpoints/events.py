@@ -0,0 +1,60 @@
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api.deps import CurrentUser
+from app.services.events import events, HEARTBEAT, RESET
+
+router = APIRouter()
+
+
+def _format(item: Any) -> str:
+    """Render a subscription item as a server-sent event"""
+    if item == HEARTBEAT:
+        return ": heartbeat\n\n"
+    if item == RESET:
+        # Events were missed; the client should resync through /sync
+        return "event: reset\ndata: {}\n\n"
+    event_id, data = item
+    return f"id: {event_id}\nevent: change\ndata: {data}\n\n"
+
+
+async def _stream(user_id: str, last_event_id: Optional[str]) -> AsyncIterator[str]:
+    # Reconnect delay for EventSource, in milliseconds
+    yield "retry: 3000\n\n"
+    async for item in events.subscribe(user_id, last_event_id):
+        yield _format(item)
+
+
+@router.get("/")
+async def stream_events(
+    current_user: CurrentUser,
+    last_event_id: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """
+    Stream change events for the current user as server-sent events.
+    
+    Each event names the changed scope ("tasks", "notes" or "habits") and,
+    when there are few, the IDs of the changed records. Reconnecting with
+    the Last-Event-ID header resumes where the stream left off; a "reset"
+    event means events were missed and the client should resync.
+    """
+    user_id = current_user.clerk_id
+    if not events.try_connect(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many event streams open"
+        )
+    
+    return StreamingResponse(
+        _stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+        background=BackgroundTask(events.disconnect, user_id)
+    )
@@ -0,0 +1,81 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import CurrentUser
+from app.services.export import (
+    EXPORT_ENTITIES,
+    AccountExport,
+    ndjson_lines,
+    csv_rows,
+    chunked,
+    gzipped,
+)
+
+router = APIRouter()
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+@router.get("/")
+async def export_account(
+    current_user: CurrentUser,
+    format: ExportFormat = ExportFormat.NDJSON,
+    entity: Optional[str] = Query(None, description="Only this kind of record; required for CSV"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+    after_type: Optional[str] = Query(None, description="Resume after this row: its type"),
+    after_id: Optional[UUID] = Query(None, description="Resume after this row: its id"),
+) -> StreamingResponse:
+    """
+    Download every project, task, task log, note (with tags, links and
+    versions), habit and habit log of the current user.
+    
+    NDJSON has one {"type", "data"} object per line. CSV covers one entity
+    per file. An interrupted download can be resumed by passing the type
+    and id of the last complete row.
+    """
+    if entity is not None and entity not in EXPORT_ENTITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown entity; expected one of {', '.join(EXPORT_ENTITIES)}"
+        )
+    if format == ExportFormat.CSV and entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV exports need an entity"
+        )
+    
+    names = [entity] if entity is not None else list(EXPORT_ENTITIES)
+    after = None
+    if after_id is not None:
+        after_type = after_type or entity
+        if after_type not in names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="after_type must be one of the exported entities"
+            )
+        after = (after_type, after_id)
+    
+    records = AccountExport(current_user.clerk_id, names, after).records()
+    if format == ExportFormat.CSV:
+        body = chunked(csv_rows(entity, records))
+        filename, media_type = f"{entity}.csv", "text/csv"
+    else:
+        body = chunked(ndjson_lines(records))
+        filename, media_type = "export.ndjson", "application/x-ndjson"
+    
+    if gzip:
+        body = gzipped(body)
+        filename, media_type = f"{filename}.gz", "application/gzip"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
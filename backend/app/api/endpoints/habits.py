@@ -2,9 +2,13 @@ from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
 from fastapi import APIRouter, HTTPException, status, Query
 from uuid import UUID
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import CurrentUser, DbSession, Pagination, Sorting
+from app.api.batch import batch_create, batch_update, batch_delete
 from app.models.habit import Habit, HabitLog
+from app.models.job import Job
 from app.schemas.habit import (
     Habit as HabitSchema,
     HabitCreate,
@@ -15,10 +19,22 @@ from app.schemas.habit import (
     HabitStats,
     HabitStreak,
 )
+from app.schemas.base import BatchCreate, BatchUpdate, BatchDelete, BatchResult
+from app.schemas.job import Job as JobSchema
+from app.repositories.base import next_cursor
 from app.repositories.habit import HabitRepository, HabitLogRepository
+from app.repositories.job import JobRepository
+from app.services.aggregate_cache import aggregates
+from app.services.jobs import enqueue
 
 router = APIRouter()
 
+# Streaks are cached as JSON, so they're converted from ORM objects up front
+_streaks_adapter = TypeAdapter(List[HabitStreak])
+
+# Routes with a ":action" suffix, mounted without the /habits prefix
+batch_router = APIRouter()
+
 
 @router.post("/", response_model=HabitSchema, status_code=status.HTTP_201_CREATED)
 async def create_habit(
@@ -48,27 +64,34 @@ async def get_habits(
     
     # Get by category
     if category:
-        return await habit_repo.get_by_category(
+        habits = await habit_repo.get_by_category(
             current_user.clerk_id,
             category,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
     
     # Get active habits
-    if active_only:
-        return await habit_repo.get_active_habits(
+    elif active_only:
+        habits = await habit_repo.get_active_habits(
             current_user.clerk_id,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
     
     # Get all habits
-    return await habit_repo.get_multi_by_user(
-        current_user.clerk_id,
-        skip=pagination.skip,
-        limit=pagination.limit
-    )
+    else:
+        habits = await habit_repo.get_multi_by_user(
+            current_user.clerk_id,
+            skip=pagination.skip,
+            limit=pagination.limit,
+            cursor=pagination.cursor
+        )
+    
+    pagination.set_next_cursor(habit_repo.next_cursor(habits, pagination.limit))
+    return habits
 
 
 @router.get("/today", response_model=List[Dict[str, Any]])
@@ -97,8 +120,37 @@ async def get_streaks(
     db: DbSession
 ) -> List[Dict[str, Any]]:
     """Get current streaks for all active habits"""
-    habit_repo = HabitRepository(Habit, db)
-    return await habit_repo.get_streaks(current_user.clerk_id)
+    user_id = current_user.clerk_id
+    
+    async def load(session: AsyncSession) -> List[Dict[str, Any]]:
+        streaks = await HabitRepository(Habit, session).get_streaks(user_id)
+        return _streaks_adapter.dump_python(
+            _streaks_adapter.validate_python(streaks),
+            mode="json"
+        )
+    
+    return await aggregates.get_or_load(db, user_id, "habits", "streaks", load)
+
+
+@router.post("/streaks/rebuild", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_streaks(
+    current_user: CurrentUser,
+    db: DbSession
+) -> Any:
+    """
+    Rebuild the current user's streaks from their habit logs, in the
+    background. Poll /jobs/{id} for the outcome; a rebuild already queued
+    is returned rather than queueing another.
+    """
+    user_id = current_user.clerk_id
+    job_id = await enqueue(
+        db,
+        "habits.rebuild_streaks",
+        {"user_id": user_id},
+        user_id=user_id,
+        idempotency_key=f"habits.rebuild_streaks:{user_id}"
+    )
+    return await JobRepository(Job, db).get(job_id)
 
 
 @router.get("/stats", response_model=HabitStats)
@@ -107,8 +159,14 @@ async def get_habit_stats(
     db: DbSession
 ) -> Dict[str, Any]:
     """Get habit statistics for current user"""
-    habit_repo = HabitRepository(Habit, db)
-    return await habit_repo.get_stats(current_user.clerk_id)
+    user_id = current_user.clerk_id
+    return await aggregates.get_or_load(
+        db,
+        user_id,
+        "habits",
+        "stats",
+        lambda session: HabitRepository(Habit, session).get_stats(user_id)
+    )
 
 
 @router.get("/{habit_id}", response_model=HabitWithLogs)
@@ -229,35 +287,57 @@ async def get_habit_logs(
     habit_id: UUID,
     current_user: CurrentUser,
     db: DbSession,
+    pagination: Pagination,
     start_date: date = Query(..., description="Start date for logs"),
     end_date: date = Query(..., description="End date for logs"),
 ) -> List[HabitLog]:
-    """Get habit logs for a date range"""
+    """
+    Get habit logs for a date range, oldest first.
+    
+    Returns up to ``limit`` logs (100 by default); the X-Next-Cursor header
+    holds the cursor for the next page.
+    """
     habit_repo = HabitRepository(Habit, db)
     
-    return await habit_repo.get_habit_logs(
+    logs = await habit_repo.get_habit_logs(
         current_user.clerk_id,
         habit_id,
         start_date,
-        end_date
+        end_date,
+        skip=pagination.skip,
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
+    pagination.set_next_cursor(next_cursor(logs, pagination.limit, "log_date"))
+    return logs
 
 
 @router.get("/logs/range", response_model=List[HabitLogSchema])
 async def get_user_logs(
     current_user: CurrentUser,
     db: DbSession,
+    pagination: Pagination,
     start_date: date = Query(..., description="Start date for logs"),
     end_date: date = Query(..., description="End date for logs"),
 ) -> List[HabitLog]:
-    """Get all habit logs for user in a date range"""
+    """
+    Get all habit logs for user in a date range, newest first.
+    
+    Returns up to ``limit`` logs (100 by default); the X-Next-Cursor header
+    holds the cursor for the next page.
+    """
     log_repo = HabitLogRepository(db)
     
-    return await log_repo.get_user_logs(
+    logs = await log_repo.get_user_logs(
         current_user.clerk_id,
         start_date,
-        end_date
+        end_date,
+        skip=pagination.skip,
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
+    pagination.set_next_cursor(next_cursor(logs, pagination.limit, "-log_date"))
+    return logs
 
 
 @router.delete("/logs/{log_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -275,4 +355,41 @@ async def delete_log(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Log not found"
-        )
\ No newline at end of file
+        )
+
+
+@batch_router.post("/habits:batch", response_model=BatchResult)
+async def create_habits_batch(
+    batch: BatchCreate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Create many habits in one transaction, reporting errors per item"""
+    habit_repo = HabitRepository(Habit, db)
+    return await batch_create(habit_repo, current_user.clerk_id, batch, HabitCreate)
+
+
+@batch_router.patch("/habits:batch", response_model=BatchResult)
+async def update_habits_batch(
+    batch: BatchUpdate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """
+    Update many habits in one transaction, reporting errors per item.
+    
+    Each item holds the habit's ``id`` and the fields to change.
+    """
+    habit_repo = HabitRepository(Habit, db)
+    return await batch_update(habit_repo, current_user.clerk_id, batch, HabitUpdate)
+
+
+@batch_router.delete("/habits:batch", response_model=BatchResult)
+async def delete_habits_batch(
+    batch: BatchDelete,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Delete many habits (soft delete) in one transaction"""
+    habit_repo = HabitRepository(Habit, db)
+    return await batch_delete(habit_repo, current_user.clerk_id, batch)
\ No newline at end of file
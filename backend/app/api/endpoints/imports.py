@@ -0,0 +1,101 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from fastapi import APIRouter, File, HTTPException, UploadFile, status
+
+from app.api.deps import CurrentUser, DbSession
+from app.core.config import settings
+from app.core.database import on_rollback
+from app.models.import_job import ImportJob
+from app.repositories.import_job import ImportJobRepository
+from app.schemas.import_job import ImportJob as ImportJobSchema
+from app.services.importer import detect_format
+from app.services.jobs import enqueue
+
+router = APIRouter()
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def _save_upload(file: UploadFile) -> str:
+    """Copy an upload to a file of its own, where a worker can read it"""
+    fd, path = tempfile.mkstemp(prefix="import-", dir=settings.IMPORT_UPLOAD_DIR or None)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as saved:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Upload is too large"
+                    )
+                saved.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+@router.post("/", response_model=ImportJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_import(
+    current_user: CurrentUser,
+    db: DbSession,
+    file: UploadFile = File(..., description="NDJSON from /export, plain or gzipped, or a zipped Markdown vault"),
+) -> Any:
+    """
+    Import projects, tasks, notes, habits and habit logs from a file.
+    
+    The import runs in the background; poll the returned import for its
+    progress. Records that fail validation are skipped and reported on the
+    job, and the rest are imported.
+    """
+    path = await _save_upload(file)
+    # The worker removes the upload, unless the job is never committed
+    on_rollback(db, lambda: Path(path).unlink(missing_ok=True))
+    
+    import_repo = ImportJobRepository(ImportJob, db)
+    job = await import_repo.create_for_user(
+        current_user.clerk_id,
+        {
+            "format": detect_format(path),
+            "filename": file.filename[:255] if file.filename else None
+        }
+    )
+    
+    # One attempt: a retry would import the batches already committed again
+    await enqueue(
+        db,
+        "imports.run",
+        {
+            "import_id": str(job.id),
+            "user_id": current_user.clerk_id,
+            "path": path,
+            "format": job.format.value
+        },
+        user_id=current_user.clerk_id,
+        max_attempts=1
+    )
+    return job
+
+
+@router.get("/{job_id}", response_model=ImportJobSchema)
+async def get_import(
+    job_id: UUID,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> Any:
+    """Get an import's status and progress"""
+    import_repo = ImportJobRepository(ImportJob, db)
+    job = await import_repo.get_by_user(current_user.clerk_id, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    
+    return job
@@ -0,0 +1,30 @@
+from typing import Any
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.api.deps import CurrentUser, DbSession
+from app.models.job import Job
+from app.repositories.job import JobRepository
+from app.schemas.job import Job as JobSchema
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job(
+    job_id: UUID,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> Any:
+    """Get the status of a background job run for the current user"""
+    job_repo = JobRepository(Job, db)
+    job = await job_repo.get_for_user(current_user.clerk_id, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
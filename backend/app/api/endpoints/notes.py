@@ -2,7 +2,8 @@ from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, status, Query
 from uuid import UUID
 
-from app.api.deps import CurrentUser, DbSession, Pagination, Sorting
+from app.api.deps import CurrentUser, DbSession, Pagination, Sorting, Conditional
+from app.api.batch import batch_create, batch_update, batch_delete
 from app.models.note import Note
 from app.schemas.note import (
     Note as NoteSchema,
@@ -10,11 +11,28 @@ from app.schemas.note import (
     NoteUpdate,
     NoteWithLinks,
     NoteLink as NoteLinkSchema,
+    NoteLinkBatch,
+    NoteGraph,
+    NoteGraphNode,
+    NoteVersion as NoteVersionSchema,
+    NoteVersionSummary,
+    NoteVersionDiff,
+    NoteAutosave,
+    NoteAutosaveResult,
 )
-from app.repositories.note import NoteRepository
+from app.schemas.base import BatchCreate, BatchUpdate, BatchDelete, BatchResult
+from app.repositories.note import NoteRepository, NoteVersionRepository
+from app.repositories.note_graph import NoteGraphRepository
+from app.services.aggregate_cache import aggregates
+from app.services import autosave as autosaves
+from app.services.autosave import StaleRevisionError
 
 router = APIRouter()
 
+# Routes with a ":action" suffix can't live under the /notes prefix, since
+# route paths must start with "/"
+batch_router = APIRouter()
+
 
 @router.post("/", response_model=NoteSchema, status_code=status.HTTP_201_CREATED)
 async def create_note(
@@ -37,59 +55,84 @@ async def get_notes(
     db: DbSession,
     pagination: Pagination,
     sorting: Sorting,
+    conditional: Conditional,
     folder_path: Optional[str] = None,
     is_favorite: Optional[bool] = None,
     tags: Optional[List[str]] = Query(None),
     search: Optional[str] = None,
 ) -> List[Note]:
-    """Get notes with filtering and pagination"""
+    """
+    Get notes with filtering and pagination.
+    
+    With ``search``, results are ranked by full-text relevance. Every mode
+    supports keyset pagination through the X-Next-Cursor header.
+    """
     note_repo = NoteRepository(Note, db)
     
+    if conditional.check(*await note_repo.get_collection_version(current_user.clerk_id)):
+        return conditional.not_modified()
+    
     # Search takes precedence
     if search:
-        return await note_repo.search(
+        notes = await note_repo.search(
             current_user.clerk_id,
             search,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
+        pagination.set_next_cursor(note_repo.search_cursor(notes, pagination.limit))
+        return notes
     
     # Get by tags
     if tags:
-        return await note_repo.get_by_tags(
+        notes = await note_repo.get_by_tags(
             current_user.clerk_id,
             tags,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
+        pagination.set_next_cursor(note_repo.next_cursor(notes, pagination.limit, "-updated_at"))
+        return notes
     
     # Get favorites
     if is_favorite:
-        return await note_repo.get_favorites(
+        notes = await note_repo.get_favorites(
             current_user.clerk_id,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
+        pagination.set_next_cursor(note_repo.next_cursor(notes, pagination.limit))
+        return notes
     
     # Get by folder
     if folder_path is not None:
-        return await note_repo.get_by_folder(
+        notes = await note_repo.get_by_folder(
             current_user.clerk_id,
             folder_path,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
+        pagination.set_next_cursor(note_repo.next_cursor(notes, pagination.limit))
+        return notes
     
     # Get all with filters
     filters = {}
+    order_by = sorting.order_by or "-updated_at"
     
-    return await note_repo.get_multi_by_user(
+    notes = await note_repo.get_multi_by_user(
         current_user.clerk_id,
         skip=pagination.skip,
         limit=pagination.limit,
         filters=filters,
-        order_by=sorting.order_by or "-updated_at"
+        order_by=order_by,
+        cursor=pagination.cursor
     )
+    pagination.set_next_cursor(note_repo.next_cursor(notes, pagination.limit, order_by))
+    return notes
 
 
 @router.get("/folders", response_model=List[Dict[str, Any]])
@@ -98,18 +141,26 @@ async def get_folder_structure(
     db: DbSession
 ) -> List[Dict[str, Any]]:
     """Get the folder structure for user's notes"""
-    note_repo = NoteRepository(Note, db)
-    return await note_repo.get_folder_structure(current_user.clerk_id)
+    user_id = current_user.clerk_id
+    return await aggregates.get_or_load(
+        db,
+        user_id,
+        "notes",
+        "folders",
+        lambda session: NoteRepository(Note, session).get_folder_structure(user_id)
+    )
 
 
 @router.get("/tags", response_model=List[Dict[str, Any]])
 async def get_all_tags(
     current_user: CurrentUser,
-    db: DbSession
-) -> List[Dict[str, int]]:
-    """Get all unique tags with usage count"""
+    db: DbSession,
+    prefix: Optional[str] = Query(None, max_length=50, description="Only tags starting with this prefix"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+) -> List[Dict[str, Any]]:
+    """Get all unique tags with usage count, or autocomplete by prefix"""
     note_repo = NoteRepository(Note, db)
-    return await note_repo.get_all_tags(current_user.clerk_id)
+    return await note_repo.get_all_tags(current_user.clerk_id, prefix=prefix, limit=limit)
 
 
 @router.get("/stats", response_model=Dict[str, Any])
@@ -118,27 +169,96 @@ async def get_note_stats(
     db: DbSession
 ) -> Dict[str, Any]:
     """Get note statistics for current user"""
-    note_repo = NoteRepository(Note, db)
-    return await note_repo.get_stats(current_user.clerk_id)
+    user_id = current_user.clerk_id
+    return await aggregates.get_or_load(
+        db,
+        user_id,
+        "notes",
+        "stats",
+        lambda session: NoteRepository(Note, session).get_stats(user_id)
+    )
+
+
+# Link graph endpoints
+@router.get("/graph", response_model=NoteGraph)
+async def get_note_graph(
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Get all notes and links for the graph view"""
+    graph_repo = NoteGraphRepository(db)
+    return await graph_repo.get_graph(current_user.clerk_id)
+
+
+@router.get("/graph/path", response_model=List[NoteGraphNode])
+async def get_shortest_path(
+    current_user: CurrentUser,
+    db: DbSession,
+    source: UUID = Query(..., description="Note to start from"),
+    target: UUID = Query(..., description="Note to reach"),
+    max_depth: Optional[int] = Query(None, ge=1, le=50),
+) -> List[Dict[str, Any]]:
+    """Get the shortest chain of links between two notes"""
+    graph_repo = NoteGraphRepository(db)
+    path = await graph_repo.get_shortest_path(
+        current_user.clerk_id,
+        source,
+        target,
+        max_depth=max_depth
+    )
+    
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No path between these notes"
+        )
+    
+    return path
+
+
+@router.get("/graph/components", response_model=List[List[UUID]])
+async def get_graph_components(
+    current_user: CurrentUser,
+    db: DbSession,
+    min_size: int = Query(2, ge=1),
+) -> List[List[UUID]]:
+    """Get groups of linked notes, largest first"""
+    graph_repo = NoteGraphRepository(db)
+    return await graph_repo.get_components(current_user.clerk_id, min_size=min_size)
+
+
+@router.get("/graph/orphans", response_model=List[NoteGraphNode])
+async def get_orphan_notes(
+    current_user: CurrentUser,
+    db: DbSession
+) -> List[Dict[str, Any]]:
+    """Get notes without any links"""
+    graph_repo = NoteGraphRepository(db)
+    return await graph_repo.get_orphans(current_user.clerk_id)
 
 
 @router.get("/{note_id}", response_model=NoteWithLinks)
 async def get_note(
     note_id: UUID,
     current_user: CurrentUser,
-    db: DbSession
+    db: DbSession,
+    conditional: Conditional
 ) -> Note:
     """Get a specific note with all linked notes"""
     note_repo = NoteRepository(Note, db)
-    note = await note_repo.get_with_links(current_user.clerk_id, note_id)
+    version = await note_repo.get_version(current_user.clerk_id, note_id)
     
-    if not note:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    return note
+    # No Last-Modified: adding or removing a link changes no timestamp
+    if conditional.check(note_id, *version):
+        return conditional.not_modified()
+    
+    return await note_repo.get_with_links(current_user.clerk_id, note_id)
 
 
 @router.patch("/{note_id}", response_model=NoteSchema)
@@ -167,6 +287,45 @@ async def update_note(
     return note
 
 
+@router.put("/{note_id}/autosave", response_model=NoteAutosaveResult)
+async def autosave_note(
+    note_id: UUID,
+    autosave: NoteAutosave,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """
+    Save editor content made on top of ``revision``.
+    
+    Each save is written at once, but a version is only recorded once the
+    editor pauses. Saves based on an outdated revision are rejected with
+    409 and the current revision in X-Note-Revision.
+    """
+    try:
+        revision = await autosaves.save(
+            db,
+            current_user.clerk_id,
+            note_id,
+            autosave.revision,
+            autosave.content,
+            autosave.title
+        )
+    except StaleRevisionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Note has changed since this revision",
+            headers={"X-Note-Revision": str(e.current_revision)}
+        )
+    
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return {"id": note_id, "revision": revision}
+
+
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(
     note_id: UUID,
@@ -216,6 +375,122 @@ async def get_note_links(
     return await note_repo.get_linked_notes(current_user.clerk_id, note_id)
 
 
+# Version endpoints
+@router.get("/{note_id}/versions", response_model=List[NoteVersionSummary])
+async def get_note_versions(
+    note_id: UUID,
+    current_user: CurrentUser,
+    db: DbSession
+) -> List[Any]:
+    """Get a note's version history, newest first"""
+    version_repo = NoteVersionRepository(db)
+    return await version_repo.get_versions(current_user.clerk_id, note_id)
+
+
+@router.get("/{note_id}/versions/diff", response_model=NoteVersionDiff)
+async def diff_note_versions(
+    note_id: UUID,
+    current_user: CurrentUser,
+    db: DbSession,
+    from_version: int = Query(..., ge=1, alias="from"),
+    to_version: int = Query(..., ge=1, alias="to"),
+) -> Dict[str, Any]:
+    """Get a unified diff between two versions of a note"""
+    version_repo = NoteVersionRepository(db)
+    diff = await version_repo.diff_versions(
+        current_user.clerk_id,
+        note_id,
+        from_version,
+        to_version
+    )
+    
+    if diff is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
+        )
+    
+    return {
+        "from_version": from_version,
+        "to_version": to_version,
+        "diff": diff
+    }
+
+
+@router.get("/{note_id}/versions/{version_number}", response_model=NoteVersionSchema)
+async def get_note_version(
+    note_id: UUID,
+    version_number: int,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Get a specific version of a note"""
+    version_repo = NoteVersionRepository(db)
+    version = await version_repo.get_version(
+        current_user.clerk_id,
+        note_id,
+        version_number
+    )
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
+        )
+    
+    return version
+
+
+@router.post("/{note_id}/versions/{version_number}/restore", response_model=NoteSchema)
+async def restore_note_version(
+    note_id: UUID,
+    version_number: int,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Note:
+    """Restore a note to a previous version"""
+    version_repo = NoteVersionRepository(db)
+    note = await version_repo.restore_version(
+        current_user.clerk_id,
+        note_id,
+        version_number
+    )
+    
+    if not note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
+        )
+    
+    return note
+
+
+@router.get("/{note_id}/graph", response_model=NoteGraph)
+async def get_note_neighborhood(
+    note_id: UUID,
+    current_user: CurrentUser,
+    db: DbSession,
+    depth: int = Query(1, ge=1, le=5, description="Number of link hops"),
+    limit: int = Query(500, ge=1, le=5000),
+) -> Dict[str, Any]:
+    """Get the notes within a number of links of a note"""
+    graph_repo = NoteGraphRepository(db)
+    graph = await graph_repo.get_neighborhood(
+        current_user.clerk_id,
+        note_id,
+        depth=depth,
+        limit=limit
+    )
+    
+    if not graph:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return graph
+
+
 @router.post("/{note_id}/links", response_model=Dict[str, str])
 async def add_link(
     note_id: UUID,
@@ -261,4 +536,61 @@ async def remove_link(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Link not found"
-        )
\ No newline at end of file
+        )
+
+
+@batch_router.post("/notes/links:batch", response_model=Dict[str, int])
+async def add_links_batch(
+    batch: NoteLinkBatch,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, int]:
+    """Add many links between notes in one request"""
+    note_repo = NoteRepository(Note, db)
+    
+    created = await note_repo.add_links(
+        current_user.clerk_id,
+        [(link.source_id, link.target_id) for link in batch.links]
+    )
+    
+    return {
+        "requested": len(batch.links),
+        "created": created
+    }
+
+
+@batch_router.post("/notes:batch", response_model=BatchResult)
+async def create_notes_batch(
+    batch: BatchCreate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Create many notes in one transaction, reporting errors per item"""
+    note_repo = NoteRepository(Note, db)
+    return await batch_create(note_repo, current_user.clerk_id, batch, NoteCreate)
+
+
+@batch_router.patch("/notes:batch", response_model=BatchResult)
+async def update_notes_batch(
+    batch: BatchUpdate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """
+    Update many notes in one transaction, reporting errors per item.
+    
+    Each item holds the note's ``id`` and the fields to change.
+    """
+    note_repo = NoteRepository(Note, db)
+    return await batch_update(note_repo, current_user.clerk_id, batch, NoteUpdate)
+
+
+@batch_router.delete("/notes:batch", response_model=BatchResult)
+async def delete_notes_batch(
+    batch: BatchDelete,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Delete many notes (soft delete) in one transaction"""
+    note_repo = NoteRepository(Note, db)
+    return await batch_delete(note_repo, current_user.clerk_id, batch)
\ No newline at end of file
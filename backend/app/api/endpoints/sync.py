@@ -0,0 +1,60 @@
+from typing import Optional, Dict, Any, Type
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+
+from app.api.deps import CurrentUser, DbSession
+from app.core.config import settings
+from app.schemas.habit import HabitInDB, HabitLogInDB
+from app.schemas.note import NoteInDB
+from app.schemas.sync import SyncPage
+from app.schemas.task import TaskInDB, ProjectInDB
+from app.repositories.sync import SyncRepository
+
+router = APIRouter()
+
+# Flat schemas, without relations: clients rebuild those from the IDs
+SYNC_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "projects": ProjectInDB,
+    "tasks": TaskInDB,
+    "notes": NoteInDB,
+    "habits": HabitInDB,
+    "habit_logs": HabitLogInDB,
+}
+
+
+@router.get("/", response_model=SyncPage)
+async def get_changes(
+    current_user: CurrentUser,
+    db: DbSession,
+    since: Optional[str] = Query(None, description="Token from the previous page or sync"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """
+    Get projects, tasks, notes, habits and habit logs changed since a sync token.
+    
+    Without ``since``, returns everything the user has. Follow ``token``
+    while ``has_more`` is true; the last page's token is the watermark for
+    the next sync. Deleted records come back with ``deleted`` set.
+    """
+    sync_repo = SyncRepository(db)
+    rows, token, has_more = await sync_repo.get_changes(
+        current_user.clerk_id,
+        since,
+        limit=limit
+    )
+    
+    return {
+        "changes": [
+            {
+                "type": type,
+                "id": row.id,
+                "updated_at": row.updated_at,
+                "deleted": row.is_deleted,
+                "data": None if row.is_deleted else SYNC_SCHEMAS[type].model_validate(row).model_dump(mode="json")
+            }
+            for type, row in rows
+        ],
+        "token": token,
+        "has_more": has_more
+    }
@@ -1,22 +1,32 @@
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, status, Query
 from uuid import UUID
 
-from app.api.deps import CurrentUser, DbSession, Pagination, Sorting
+from app.api.deps import CurrentUser, DbSession, Pagination, Sorting, Conditional
+from app.api.batch import batch_create, batch_update, batch_delete
+from app.core.config import settings
 from app.models.task import Task, Project, TaskStatus, TaskPriority
 from app.schemas.task import (
     Task as TaskSchema,
     TaskCreate,
     TaskUpdate,
     TaskFilter,
+    TaskOccurrence,
     Project as ProjectSchema,
     ProjectCreate,
     ProjectUpdate,
 )
+from app.schemas.base import BatchCreate, BatchUpdate, BatchDelete, BatchResult
 from app.repositories.task import TaskRepository, ProjectRepository
+from app.services.aggregate_cache import aggregates
+from app.services.recurrence import as_utc
 
 router = APIRouter()
 
+# Routes with a ":action" suffix, mounted without the /tasks prefix
+batch_router = APIRouter()
+
 
 # Task endpoints
 @router.post("/", response_model=TaskSchema, status_code=status.HTTP_201_CREATED)
@@ -44,23 +54,29 @@ async def get_tasks(
     db: DbSession,
     pagination: Pagination,
     sorting: Sorting,
+    conditional: Conditional,
     status: Optional[TaskStatus] = None,
     priority: Optional[TaskPriority] = None,
     project_id: Optional[UUID] = None,
     assignee_id: Optional[str] = None,
     is_overdue: Optional[bool] = None,
     search: Optional[str] = None,
+    min_similarity: Optional[float] = Query(None, ge=0, le=1),
 ) -> List[Task]:
     """Get tasks with filtering and pagination"""
     task_repo = TaskRepository(Task, db)
     
+    if conditional.check(*await task_repo.get_collection_version(current_user.clerk_id)):
+        return conditional.not_modified()
+    
     # Search takes precedence
     if search:
         return await task_repo.search(
             current_user.clerk_id,
             search,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            min_similarity=min_similarity
         )
     
     # Build filters
@@ -76,20 +92,26 @@ async def get_tasks(
     
     # Handle overdue filter
     if is_overdue:
-        return await task_repo.get_overdue(
+        tasks = await task_repo.get_overdue(
             current_user.clerk_id,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
+        pagination.set_next_cursor(task_repo.next_cursor(tasks, pagination.limit, "due_date"))
+        return tasks
     
     # Get tasks with filters
-    return await task_repo.get_multi_by_user(
+    tasks = await task_repo.get_multi_by_user(
         current_user.clerk_id,
         skip=pagination.skip,
         limit=pagination.limit,
         filters=filters,
-        order_by=sorting.order_by
+        order_by=sorting.order_by,
+        cursor=pagination.cursor
     )
+    pagination.set_next_cursor(task_repo.next_cursor(tasks, pagination.limit, sorting.order_by))
+    return tasks
 
 
 @router.get("/overdue", response_model=List[TaskSchema])
@@ -100,11 +122,14 @@ async def get_overdue_tasks(
 ) -> List[Task]:
     """Get all overdue tasks"""
     task_repo = TaskRepository(Task, db)
-    return await task_repo.get_overdue(
+    tasks = await task_repo.get_overdue(
         current_user.clerk_id,
         skip=pagination.skip,
-        limit=pagination.limit
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
+    pagination.set_next_cursor(task_repo.next_cursor(tasks, pagination.limit, "due_date"))
+    return tasks
 
 
 @router.get("/stats", response_model=Dict[str, Any])
@@ -113,27 +138,62 @@ async def get_task_stats(
     db: DbSession
 ) -> Dict[str, Any]:
     """Get task statistics for current user"""
+    user_id = current_user.clerk_id
+    return await aggregates.get_or_load(
+        db,
+        user_id,
+        "tasks",
+        "stats",
+        lambda session: TaskRepository(Task, session).get_stats(user_id)
+    )
+
+
+@router.get("/calendar", response_model=List[TaskOccurrence])
+async def get_calendar(
+    current_user: CurrentUser,
+    db: DbSession,
+    start: datetime = Query(..., description="Start of the range, inclusive"),
+    end: datetime = Query(..., description="End of the range, exclusive"),
+) -> List[Dict[str, Any]]:
+    """
+    Get the tasks due in a date range, soonest first.
+    
+    Recurring tasks are expanded to the dates they'll recur on, including
+    those that don't exist as tasks yet; these come without an ``id``.
+    """
+    start, end = as_utc(start), as_utc(end)
+    if end <= start or end - start > timedelta(days=settings.CALENDAR_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"end must be after start, by at most {settings.CALENDAR_MAX_DAYS} days"
+        )
+    
     task_repo = TaskRepository(Task, db)
-    return await task_repo.get_stats(current_user.clerk_id)
+    return await task_repo.get_calendar(current_user.clerk_id, start, end)
 
 
 @router.get("/{task_id}", response_model=TaskSchema)
 async def get_task(
     task_id: UUID,
     current_user: CurrentUser,
-    db: DbSession
+    db: DbSession,
+    conditional: Conditional
 ) -> Task:
     """Get a specific task with all relations"""
     task_repo = TaskRepository(Task, db)
-    task = await task_repo.get_with_relations(current_user.clerk_id, task_id)
+    version = await task_repo.get_version(current_user.clerk_id, task_id)
     
-    if not task:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    return task
+    *parts, last_modified = version
+    if conditional.check(task_id, *parts, last_modified=last_modified):
+        return conditional.not_modified()
+    
+    return await task_repo.get_with_relations(current_user.clerk_id, task_id)
 
 
 @router.patch("/{task_id}", response_model=TaskSchema)
@@ -190,7 +250,10 @@ async def complete_task(
     current_user: CurrentUser,
     db: DbSession
 ) -> Task:
-    """Mark a task as completed"""
+    """
+    Toggle a task's completion. Completing a recurring task creates its
+    next occurrence, if it doesn't exist yet.
+    """
     task_repo = TaskRepository(Task, db)
     
     task = await task_repo.complete_task(current_user.clerk_id, task_id)
@@ -245,17 +308,22 @@ async def get_projects(
     project_repo = ProjectRepository(Project, db)
     
     if active_only:
-        return await project_repo.get_active_projects(
+        projects = await project_repo.get_active_projects(
             current_user.clerk_id,
             skip=pagination.skip,
-            limit=pagination.limit
+            limit=pagination.limit,
+            cursor=pagination.cursor
+        )
+    else:
+        projects = await project_repo.get_multi_by_user(
+            current_user.clerk_id,
+            skip=pagination.skip,
+            limit=pagination.limit,
+            cursor=pagination.cursor
         )
     
-    return await project_repo.get_multi_by_user(
-        current_user.clerk_id,
-        skip=pagination.skip,
-        limit=pagination.limit
-    )
+    pagination.set_next_cursor(project_repo.next_cursor(projects, pagination.limit))
+    return projects
 
 
 @router.get("/projects/{project_id}", response_model=ProjectSchema)
@@ -336,9 +404,49 @@ async def get_project_tasks(
 ) -> List[Task]:
     """Get all tasks in a project"""
     task_repo = TaskRepository(Task, db)
-    return await task_repo.get_by_project(
+    tasks = await task_repo.get_by_project(
         current_user.clerk_id,
         project_id,
         skip=pagination.skip,
-        limit=pagination.limit
-    )
\ No newline at end of file
+        limit=pagination.limit,
+        cursor=pagination.cursor
+    )
+    pagination.set_next_cursor(task_repo.next_cursor(tasks, pagination.limit))
+    return tasks
+
+
+@batch_router.post("/tasks:batch", response_model=BatchResult)
+async def create_tasks_batch(
+    batch: BatchCreate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Create many tasks in one transaction, reporting errors per item"""
+    task_repo = TaskRepository(Task, db)
+    return await batch_create(task_repo, current_user.clerk_id, batch, TaskCreate)
+
+
+@batch_router.patch("/tasks:batch", response_model=BatchResult)
+async def update_tasks_batch(
+    batch: BatchUpdate,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """
+    Update many tasks in one transaction, reporting errors per item.
+    
+    Each item holds the task's ``id`` and the fields to change.
+    """
+    task_repo = TaskRepository(Task, db)
+    return await batch_update(task_repo, current_user.clerk_id, batch, TaskUpdate)
+
+
+@batch_router.delete("/tasks:batch", response_model=BatchResult)
+async def delete_tasks_batch(
+    batch: BatchDelete,
+    current_user: CurrentUser,
+    db: DbSession
+) -> Dict[str, Any]:
+    """Delete many tasks (soft delete) in one transaction"""
+    task_repo = TaskRepository(Task, db)
+    return await batch_delete(task_repo, current_user.clerk_id, batch)
\ No newline at end of file
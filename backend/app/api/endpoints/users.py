@@ -1,15 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
 from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import CurrentUser, DbSession, Pagination
+from app.core.database import on_commit
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserUpdate, UserPublic
 from app.repositories.user import UserRepository
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 
+def _invalidate_on_commit(db: AsyncSession, clerk_id: str) -> None:
+    """Drop the cached user once the update commits, so it can't be re-cached stale"""
+    on_commit(db, lambda: user_cache.invalidate(clerk_id))
+
+
 @router.get("/me", response_model=UserSchema)
 async def get_current_user_me(
     current_user: CurrentUser
@@ -32,6 +40,7 @@ async def update_current_user(
     
     # Update user
     updated_user = await user_repo.update(current_user.id, update_data)
+    _invalidate_on_commit(db, current_user.clerk_id)
     
     if not updated_user:
         raise HTTPException(
@@ -47,12 +56,14 @@ async def search_users(
     q: str,
     current_user: CurrentUser,
     db: DbSession,
-    pagination: Pagination
+    pagination: Pagination,
+    min_similarity: Optional[float] = Query(None, ge=0, le=1)
 ) -> List[User]:
     """
     Search for users by name, username, or email.
     
-    Returns public user information only.
+    Matching is typo-tolerant and ranked by similarity. Returns public
+    user information only.
     """
     if len(q) < 2:
         raise HTTPException(
@@ -64,7 +75,8 @@ async def search_users(
     users = await user_repo.search_users(
         q,
         skip=pagination.skip,
-        limit=pagination.limit
+        limit=pagination.limit,
+        min_similarity=min_similarity
     )
     
     return users
@@ -102,6 +114,7 @@ async def update_preferences(
         current_user.id,
         preferences
     )
+    _invalidate_on_commit(db, current_user.clerk_id)
     
     if not updated_user:
         raise HTTPException(
@@ -135,6 +148,7 @@ async def update_enabled_modules(
         current_user.id,
         modules
     )
+    _invalidate_on_commit(db, current_user.clerk_id)
     
     if not updated_user:
         raise HTTPException(
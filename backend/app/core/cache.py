@@ -0,0 +1,260 @@
+"""
+Caching primitives: an in-process LRU and an optional shared Redis tier.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # Redis is optional; fall back to in-process caching
+    aioredis = None
+    RedisError = Exception
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded LRU cache with a per-entry expiry.
+    
+    Entries are evicted least-recently-used first once ``maxsize`` is reached,
+    and are treated as missing once their expiry (a ``time.monotonic()``
+    timestamp) has passed.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """Get a value, refreshing its LRU position"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """Store a value for ``ttl`` seconds (defaults to the cache TTL)"""
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value and return it"""
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Shared Redis client, created lazily. After a connection failure Redis is
+# skipped for a short backoff so requests don't each pay a connect timeout.
+_redis_client = None
+_redis_retry_at = 0.0
+_REDIS_BACKOFF_SECONDS = 30.0
+
+
+def get_redis():
+    """Return the shared Redis client, or None when Redis is unavailable"""
+    global _redis_client
+    
+    if aioredis is None or not settings.REDIS_URL:
+        return None
+    if time.monotonic() < _redis_retry_at:
+        return None
+    
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _redis_client
+
+
+def mark_redis_down(error: Exception) -> None:
+    """Skip Redis for a while after an error"""
+    global _redis_retry_at
+    
+    if _redis_retry_at <= time.monotonic():
+        logger.warning(f"Redis unavailable, using in-process cache: {str(error)}")
+    _redis_retry_at = time.monotonic() + _REDIS_BACKOFF_SECONDS
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client"""
+    global _redis_client
+    
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+
+# Sets KEYS[1] to ARGV[1] for ARGV[2] seconds, unless its current value is a
+# JSON object whose ARGV[3] field is greater than ARGV[4]
+_SET_UNLESS_NEWER = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, entry = pcall(cjson.decode, current)
+    if ok and type(entry) == 'table' then
+        local mark = tonumber(entry[ARGV[3]])
+        if mark and mark > tonumber(ARGV[4]) then
+            return 0
+        end
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+class TieredCache:
+    """
+    Two-tier cache for JSON-serializable values.
+    
+    Reads go to the in-process LRU first, then to Redis when it is reachable.
+    The local tier uses a shorter TTL so that invalidations made by other
+    worker processes (which only reach Redis) are picked up quickly.
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        ttl: float = 300.0,
+        local_ttl: float = 30.0,
+        maxsize: int = 10_000,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=min(local_ttl, ttl))
+    
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value from the nearest tier that has it"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        
+        redis = get_redis()
+        if redis is None:
+            return None
+        
+        try:
+            raw = await redis.get(self._key(key))
+        except (RedisError, OSError) as e:
+            mark_redis_down(e)
+            return None
+        
+        if raw is None:
+            return None
+        
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value in both tiers"""
+        if ttl is None:
+            ttl = self.ttl
+        self.local.set(key, value, ttl=min(ttl, self.local.ttl))
+        
+        redis = get_redis()
+        if redis is None:
+            return
+        
+        try:
+            await redis.set(self._key(key), json.dumps(value, default=str), ex=max(int(ttl), 1))
+        except (RedisError, OSError) as e:
+            mark_redis_down(e)
+    
+    async def set_unless_newer(
+        self,
+        key: str,
+        value: Any,
+        field: str,
+        than: float,
+        ttl: Optional[float] = None
+    ) -> bool:
+        """
+        Store a value unless the cached one has a ``field`` greater than
+        ``than``. Each tier checks and writes atomically, Redis with a script.
+        Returns whether the value was stored.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        
+        def newer(current: Optional[Any]) -> bool:
+            return isinstance(current, dict) and current.get(field, 0) > than
+        
+        if newer(self.local.get(key)):
+            return False
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                stored = await redis.register_script(_SET_UNLESS_NEWER)(
+                    keys=[self._key(key)],
+                    args=[json.dumps(value, default=str), max(int(ttl), 1), field, repr(than)]
+                )
+            except (RedisError, OSError) as e:
+                mark_redis_down(e)
+            else:
+                if not stored:
+                    # Redis holds a newer entry; read it from there next time
+                    self.local.pop(key)
+                    return False
+        
+        # No await since the local check, so nothing can have changed it
+        if newer(self.local.get(key)):
+            return False
+        self.local.set(key, value, ttl=min(ttl, self.local.ttl))
+        return True
+    
+    async def delete(self, key: str) -> None:
+        """Remove a value from both tiers"""
+        self.local.pop(key)
+        
+        redis = get_redis()
+        if redis is None:
+            return
+        
+        try:
+            await redis.delete(self._key(key))
+        except (RedisError, OSError) as e:
+            mark_redis_down(e)
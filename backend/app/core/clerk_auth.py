@@ -1,15 +1,20 @@
 """
 Clerk authentication utilities for JWT verification.
 """
+import asyncio
 import httpx
+import hashlib
 import json
 import logging
 import base64
+import time
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from jose import jwk, jwt, JOSEError, JWTError
+from jose.backends.base import Key
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -22,6 +27,20 @@ class ClerkAuth:
         self._jwks_cache: Optional[Dict[str, Any]] = None
         self._jwks_cache_time: Optional[datetime] = None
         self._cache_duration = timedelta(hours=1)
+        # Refresh in the background once the JWKS is this close to expiring
+        self._refresh_margin = timedelta(minutes=5)
+        # Minimum interval between forced refetches for unknown kids
+        self._min_refetch_interval = timedelta(minutes=1)
+        self._leeway = 60
+        
+        # kid -> constructed public key, rebuilt on every JWKS fetch
+        self._keys: Dict[str, Key] = {}
+        # sha256(token) -> verified claims, expiring with the token
+        self._claims_cache: TTLCache[Dict[str, Any]] = TTLCache(maxsize=10_000, ttl=300)
+        
+        self._jwks_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
         
     @property
     def jwks_url(self) -> str:
@@ -53,41 +72,127 @@ class ClerkAuth:
             # Fallback to a common Clerk JWKS pattern
             return "https://api.clerk.dev/.well-known/jwks.json"
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for JWKS fetches."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=5, max_keepalive_connections=2)
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        """Cancel any background refresh and close the shared HTTP client."""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def get_jwks(self) -> Dict[str, Any]:
         """Fetch JWKS from Clerk, with caching."""
         now = datetime.utcnow()
         
-        # Return cached JWKS if still valid
+        # Return cached JWKS if still valid, refreshing ahead of expiry
         if (self._jwks_cache and 
             self._jwks_cache_time and 
             now - self._jwks_cache_time < self._cache_duration):
+            if now - self._jwks_cache_time >= self._cache_duration - self._refresh_margin:
+                self._schedule_refresh()
             return self._jwks_cache
         
-        # Fetch new JWKS
-        jwks_url = self.jwks_url
-        logger.info(f"Fetching JWKS from: {jwks_url}")
+        return await self._refresh_jwks()
+    
+    def _schedule_refresh(self) -> None:
+        """Start a background JWKS refresh unless one is already running."""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._background_refresh())
+    
+    async def _background_refresh(self) -> None:
+        try:
+            await self._refresh_jwks(force=True)
+        except Exception:
+            # Keep serving the cached JWKS until it actually expires
+            logger.exception("Background JWKS refresh failed")
+    
+    async def _refresh_jwks(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Fetch the JWKS, single-flight.
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        Concurrent callers wait on the same lock; whoever gets it second
+        finds the cache already refreshed and returns it without refetching.
+        """
+        seen_fetch_time = self._jwks_cache_time
+        
+        async with self._jwks_lock:
+            if self._jwks_cache and self._jwks_cache_time != seen_fetch_time:
+                return self._jwks_cache
+            
+            now = datetime.utcnow()
+            if (not force and
+                self._jwks_cache and
+                self._jwks_cache_time and
+                now - self._jwks_cache_time < self._cache_duration):
+                return self._jwks_cache
+            
+            jwks_url = self.jwks_url
+            logger.info(f"Fetching JWKS from: {jwks_url}")
+            
             try:
-                response = await client.get(jwks_url)
+                response = await self.client.get(jwks_url)
                 response.raise_for_status()
-                self._jwks_cache = response.json()
-                self._jwks_cache_time = now
-                logger.info("Successfully fetched JWKS")
-                return self._jwks_cache
-            except httpx.RequestError as e:
+                jwks = response.json()
+            except (httpx.RequestError, httpx.HTTPStatusError, ValueError) as e:
                 logger.error(f"Failed to fetch JWKS from {jwks_url}: {str(e)}")
                 raise HTTPException(
                     status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                     detail=f"Failed to fetch JWKS: {str(e)}"
                 )
+            
+            self._keys = self._index_keys(jwks)
+            self._jwks_cache = jwks
+            self._jwks_cache_time = now
+            logger.info("Successfully fetched JWKS")
+            return jwks
+    
+    def _index_keys(self, jwks: Dict[str, Any]) -> Dict[str, Key]:
+        """Build the kid -> public key index for a JWKS document."""
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            kid = key_data.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwk.construct(key_data, algorithm=key_data.get("alg", "RS256"))
+            except (JOSEError, ValueError) as e:
+                logger.warning(f"Skipping unusable JWK {kid}: {str(e)}")
+        return keys
+    
+    async def get_signing_key(self, kid: str) -> Optional[Key]:
+        """Look up a signing key by kid, refetching once if it is unknown."""
+        await self.get_jwks()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        
+        # Keys may have been rotated; refetch, but not on every bad token
+        if (self._jwks_cache_time is None or
+            datetime.utcnow() - self._jwks_cache_time >= self._min_refetch_interval):
+            await self._refresh_jwks(force=True)
+            key = self._keys.get(kid)
+        
+        return key
     
     async def verify_token(self, token: str) -> Dict[str, Any]:
         """Verify Clerk JWT token and return claims."""
+        cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached_claims = self._claims_cache.get(cache_key)
+        if cached_claims is not None:
+            return cached_claims
+        
         try:
-            # Get JWKS
-            jwks = await self.get_jwks()
-            
             # Decode token header to get kid
             unverified_header = jwt.get_unverified_header(token)
             kid = unverified_header.get("kid")
@@ -99,11 +204,7 @@ class ClerkAuth:
                 )
             
             # Find the key
-            key = None
-            for jwk in jwks.get("keys", []):
-                if jwk.get("kid") == kid:
-                    key = jwk
-                    break
+            key = await self.get_signing_key(kid)
             
             if not key:
                 raise HTTPException(
@@ -119,17 +220,25 @@ class ClerkAuth:
                 options={
                     "verify_aud": False,  # Clerk doesn't use audience
                     "verify_exp": True,   # Verify expiration
-                    "leeway": 60         # Allow 60 seconds of leeway for clock skew
+                    "leeway": self._leeway  # Allow leeway for clock skew
                 }
             )
             
-            return payload
-            
         except JWTError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid token: {str(e)}"
             )
+        
+        # Cache until the token would stop verifying
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            self._claims_cache.set(cache_key, payload, ttl=min(
+                exp + self._leeway - time.time(),
+                self._claims_cache.ttl
+            ))
+        
+        return payload
     
     def extract_user_info(self, claims: Dict[str, Any]) -> Dict[str, Any]:
         """Extract user information from JWT claims."""
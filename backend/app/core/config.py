@@ -27,6 +27,57 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Caching
+    USER_CACHE_TTL_SECONDS: int = 300
+    USER_CACHE_LOCAL_TTL_SECONDS: int = 30
+    TAG_CACHE_TTL_SECONDS: int = 3600
+    AGGREGATE_CACHE_FRESH_SECONDS: int = 60  # Served without recomputing
+    AGGREGATE_CACHE_TTL_SECONDS: int = 3600  # Served stale while recomputing, up to this age
+    
+    # Notes
+    NOTE_VERSION_SNAPSHOT_INTERVAL: int = 20  # Full copy every N versions, deltas in between
+    NOTE_AUTOSAVE_WINDOW_SECONDS: float = 2.0  # Quiet period before autosaves are versioned
+    NOTE_AUTOSAVE_MAX_DELAY_SECONDS: float = 10.0  # Upper bound while edits keep arriving
+    
+    # Sync
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_SAFETY_WINDOW_SECONDS: float = 30.0  # Re-sent each sync so slow commits aren't missed
+    
+    # Export
+    EXPORT_BATCH_SIZE: int = 500  # Rows fetched per round trip from the server-side cursor
+    
+    # Import
+    IMPORT_BATCH_SIZE: int = 1000  # Records validated and inserted per statement
+    IMPORT_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 100  # Rejected records reported per job
+    IMPORT_UPLOAD_DIR: str = ""  # Uploads wait here for a worker; must be shared with workers. System temp dir if empty
+    
+    # Background jobs
+    JOBS_CONCURRENCY: int = 4  # Jobs run at once per worker process
+    JOBS_POLL_SECONDS: float = 5.0  # Longest an idle worker waits before checking for due jobs
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 10.0  # Backoff before the first retry, doubled for each one after
+    JOBS_RETRY_MAX_SECONDS: float = 3600.0
+    JOBS_LOCK_TIMEOUT_SECONDS: float = 300.0  # Running jobs without a heartbeat for this long are retried
+    JOBS_RETENTION_SECONDS: int = 7 * 86400  # Finished jobs are kept this long
+    
+    # Recurring tasks
+    RECURRENCE_WINDOW_DAYS: int = 14  # Upcoming occurrences created ahead of time
+    RECURRENCE_REFRESH_SECONDS: int = 3600  # How often the window is topped up
+    RECURRENCE_MAX_OCCURRENCES: int = 500  # Per series, per window or calendar request
+    RECURRENCE_BATCH_SIZE: int = 500  # Series expanded per query
+    CALENDAR_MAX_DAYS: int = 366
+    
+    # Events
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0  # Comment sent on idle streams to keep proxies from closing them
+    EVENTS_STREAM_MAXLEN: int = 1000  # Events kept per user for resuming
+    EVENTS_STREAM_TTL_SECONDS: int = 86400
+    EVENTS_QUEUE_SIZE: int = 100  # Events buffered per subscriber before it is dropped
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 5  # Per worker process
+    
+    # Search
+    SEARCH_MIN_SIMILARITY: float = 0.3  # pg_trgm word similarity threshold
+    
     # Clerk Authentication
     CLERK_SECRET_KEY: str = ""
     CLERK_PUBLISHABLE_KEY: str = ""
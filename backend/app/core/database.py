@@ -1,4 +1,6 @@
-from typing import AsyncGenerator
+import inspect
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Hashable, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
@@ -40,14 +42,68 @@ class TimestampMixin:
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
-# Dependency to get database session
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+def on_commit(
+    session: AsyncSession,
+    callback: Callable[[], Any],
+    key: Optional[Hashable] = None
+) -> None:
     """
-    Dependency function to get database session.
-    Used in FastAPI endpoints.
+    Run ``callback`` after the session's unit of work commits.
+    
+    For side effects that must not be seen before the data is, such as
+    cache updates. Coroutine results are awaited; callbacks are dropped if
+    the unit of work rolls back. Only the first callback registered under
+    a given ``key`` runs.
+    """
+    callbacks = session.info.setdefault("on_commit", {})
+    callbacks.setdefault(key if key is not None else object(), callback)
+
+
+def on_rollback(session: AsyncSession, callback: Callable[[], Any]) -> None:
+    """
+    Run ``callback`` if the session's unit of work rolls back instead.
+    
+    For undoing work done outside the database, such as writing files.
+    Coroutine results are awaited.
+    """
+    session.info.setdefault("on_rollback", []).append(callback)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session that commits once when the block exits, or rolls back on error.
+    
+    Repositories only flush; this is the single commit for everything done
+    with the session, followed by its on_commit callbacks (or its
+    on_rollback ones if it rolls back).
     """
     async with AsyncSessionLocal() as session:
         try:
             yield session
-        finally:
-            await session.close()
\ No newline at end of file
+            await session.commit()
+        except BaseException:
+            session.info.pop("on_commit", None)
+            await session.rollback()
+            for callback in session.info.pop("on_rollback", []):
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            raise
+        
+        session.info.pop("on_rollback", None)
+        
+        for callback in session.info.pop("on_commit", {}).values():
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+
+
+# Dependency to get database session
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get database session.
+    Used in FastAPI endpoints; the request is one unit of work.
+    """
+    async with unit_of_work() as session:
+        yield session
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Validators for conditional GET requests.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag over version values such as IDs, timestamps and counts.
+    
+    Weak, since it identifies the data rather than the exact bytes sent.
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a timestamp for Last-Modified"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(
+    headers: Mapping[str, str],
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Whether the client's cached copy is still current.
+    
+    If-None-Match is compared weakly and takes precedence; If-Modified-Since
+    is only consulted without it, as RFC 9110 requires.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in tags
+    
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
@@ -0,0 +1,30 @@
+"""
+Opaque cursors for keyset pagination.
+"""
+import base64
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Any) -> str:
+    """Encode the keyset position of the last row on a page"""
+    payload = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
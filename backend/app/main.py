@@ -4,7 +4,9 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.clerk_auth import clerk_auth
 from app.api.api import api_router
+from app.services.events import events
 
 
 @asynccontextmanager
@@ -17,6 +19,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("Shutting down Metacortex API...")
+    await events.close()
+    await clerk_auth.close()
 
 
 # Create FastAPI application
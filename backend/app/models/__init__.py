@@ -3,6 +3,8 @@ from app.models.user import User
 from app.models.task import Task, Project, TaskLog, TaskStatus, TaskPriority
 from app.models.note import Note, NoteVersion, Tag
 from app.models.habit import Habit, HabitLog, HabitStreak, HabitFrequency, HabitType
+from app.models.import_job import ImportJob, ImportFormat, ImportStatus
+from app.models.job import Job, JobStatus
 
 __all__ = [
     # Base models
@@ -30,4 +32,13 @@ __all__ = [
     "HabitStreak",
     "HabitFrequency",
     "HabitType",
+    
+    # Imports
+    "ImportJob",
+    "ImportFormat",
+    "ImportStatus",
+    
+    # Background jobs
+    "Job",
+    "JobStatus",
 ]
\ No newline at end of file
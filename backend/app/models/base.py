@@ -11,6 +11,9 @@ from app.core.database import Base, TimestampMixin
 class BaseModel(Base, TimestampMixin):
     """Base model with common fields for all database models"""
     __abstract__ = True
+    # Load server-generated values such as updated_at through RETURNING
+    # when flushing, so objects are usable without a refresh
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
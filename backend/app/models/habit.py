@@ -1,7 +1,7 @@
 from datetime import datetime, date
 from typing import Optional, List
 from enum import Enum
-from sqlalchemy import Column, String, Integer, Boolean, Date, Time, JSON, ForeignKey, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy import Column, String, Integer, Boolean, Date, Time, JSON, ForeignKey, Enum as SQLEnum, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -59,6 +59,12 @@ class Habit(UserOwnedModel):
     logs = relationship("HabitLog", back_populates="habit", cascade="all, delete-orphan")
     streaks = relationship("HabitStreak", back_populates="habit", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        Index("ix_habits_user_created", "user_id", text("created_at DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        # Change feed for /sync, including soft-deleted rows
+        Index("ix_habits_user_sync", "user_id", "updated_at", "id"),
+    )
+    
     def get_current_streak(self) -> Optional["HabitStreak"]:
         """Get the current active streak"""
         active_streaks = [s for s in self.streaks if s.is_active]
@@ -130,6 +136,11 @@ class HabitLog(BaseModel):
     # Unique constraint on habit_id and log_date
     __table_args__ = (
         UniqueConstraint("habit_id", "log_date", name="uq_habit_log_date"),
+        # Per-user date ranges, and completed logs per habit for streaks
+        Index("ix_habit_logs_user_date", "user_id", text("log_date DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        Index("ix_habit_logs_habit_completed", "habit_id", "log_date", postgresql_where=text("is_deleted = false AND completed = true")),
+        # Change feed for /sync, including soft-deleted rows
+        Index("ix_habit_logs_user_sync", "user_id", "updated_at", "id"),
     )
 
 
@@ -157,6 +168,11 @@ class HabitStreak(BaseModel):
     # Relationships
     habit = relationship("Habit", back_populates="streaks")
     
+    # One live streak state per habit, maintained by HabitStreakRepository
+    __table_args__ = (
+        Index("uq_habit_streaks_habit", "habit_id", unique=True, postgresql_where=text("is_deleted = false")),
+    )
+    
     def update(self, check_in_date: date) -> None:
         """Update streak based on check-in date"""
         if self.last_check_in:
@@ -0,0 +1,42 @@
+from enum import Enum
+from sqlalchemy import Column, String, Text, Integer, DateTime, JSON, Enum as SQLEnum, Index, text
+
+from app.models.base import UserOwnedModel
+
+
+class ImportFormat(str, Enum):
+    NDJSON = "ndjson"  # Records as written by /export, optionally gzipped
+    MARKDOWN = "markdown"  # Zip of a Markdown vault, one note per file
+
+
+class ImportStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob(UserOwnedModel):
+    """A bulk import of an uploaded file and its progress"""
+    __tablename__ = "import_jobs"
+    
+    format = Column(SQLEnum(ImportFormat), nullable=False)
+    status = Column(SQLEnum(ImportStatus), default=ImportStatus.PENDING, nullable=False)
+    filename = Column(String(255), nullable=True)
+    
+    # Progress, updated after every batch
+    processed = Column(Integer, default=0, nullable=False)  # Records read so far
+    created = Column(JSON, default=dict, nullable=False)  # Records created, per type
+    failed = Column(Integer, default=0, nullable=False)  # Records rejected
+    skipped = Column(Integer, default=0, nullable=False)  # Records left out on purpose
+    errors = Column(JSON, default=list, nullable=False)  # The first IMPORT_MAX_ERRORS rejections
+    
+    # Why the job failed, if it did
+    error = Column(Text, nullable=True)
+    
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_import_jobs_user_created", "user_id", text("created_at DESC"), postgresql_where=text("is_deleted = false")),
+    )
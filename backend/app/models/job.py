@@ -0,0 +1,47 @@
+from enum import Enum
+from sqlalchemy import Column, String, Text, Integer, DateTime, JSON, Enum as SQLEnum, Index, func, text
+
+from app.models.base import BaseModel
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """A unit of background work, run by app.worker"""
+    __tablename__ = "jobs"
+    
+    # Handler name, e.g. "imports.run", and its keyword arguments
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, default=dict, nullable=False)
+    
+    # User the job works for, who may see its status
+    user_id = Column(String, nullable=True, index=True)
+    
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Not run before this
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    
+    # Enqueueing with the key of an unfinished job returns that job instead
+    idempotency_key = Column(String(255), nullable=True)
+    
+    # Worker running the job, and when it last reported in
+    locked_by = Column(String(255), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    
+    result = Column(JSON, nullable=True)
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Due jobs in order, and claims whose worker stopped reporting in
+        Index("ix_jobs_queued_run_at", "run_at", postgresql_where=text("status = 'QUEUED'")),
+        Index("ix_jobs_running_locked_at", "locked_at", postgresql_where=text("status = 'RUNNING'")),
+        Index("ix_jobs_finished_at", "finished_at", postgresql_where=text("finished_at IS NOT NULL")),
+        Index("uq_jobs_idempotency_key", "idempotency_key", unique=True, postgresql_where=text("status IN ('QUEUED', 'RUNNING')")),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, JSON, Table, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, Boolean, JSON, Table, ForeignKey, Integer, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -11,7 +11,11 @@ note_links = Table(
     'note_links',
     UserOwnedModel.metadata,
     Column('source_note_id', UUID(as_uuid=True), ForeignKey('notes.id'), primary_key=True),
-    Column('target_note_id', UUID(as_uuid=True), ForeignKey('notes.id'), primary_key=True)
+    Column('target_note_id', UUID(as_uuid=True), ForeignKey('notes.id'), primary_key=True),
+    # 'manual' for links added through the API, 'wiki' for [[links]] parsed from content
+    Column('origin', String(20), nullable=False, server_default='manual'),
+    # Backlink lookups; the primary key only leads with source_note_id
+    Index('ix_note_links_target', 'target_note_id')
 )
 
 # Association table for note tags
@@ -19,7 +23,8 @@ note_tags = Table(
     'note_tags',
     UserOwnedModel.metadata,
     Column('note_id', UUID(as_uuid=True), ForeignKey('notes.id'), primary_key=True),
-    Column('tag_id', UUID(as_uuid=True), ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', UUID(as_uuid=True), ForeignKey('tags.id'), primary_key=True),
+    Index('ix_note_tags_tag', 'tag_id')
 )
 
 
@@ -35,9 +40,12 @@ class Note(UserOwnedModel):
     note_type = Column(String(50), default="note", nullable=False)  # note, daily, meeting, etc.
     template_id = Column(UUID(as_uuid=True), nullable=True)
     
-    # Search
+    # Search - maintained by the notes_search_vector_trigger database trigger
     content_search_vector = Column(TSVECTOR, nullable=True)  # For full-text search
     
+    # Incremented on every content or title change, for optimistic concurrency
+    revision = Column(Integer, default=0, nullable=False, server_default="0")
+    
     # Status
     is_pinned = Column(Boolean, default=False, nullable=False)
     is_archived = Column(Boolean, default=False, nullable=False)
@@ -64,21 +72,19 @@ class Note(UserOwnedModel):
     # Versions
     versions = relationship("NoteVersion", back_populates="note", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        Index("ix_notes_content_search_vector", "content_search_vector", postgresql_using="gin"),
+        # Composite indexes for per-user list queries, excluding soft-deleted rows
+        Index("ix_notes_user_created", "user_id", text("created_at DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        Index("ix_notes_user_updated", "user_id", text("updated_at DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        # Change feed for /sync, including soft-deleted rows
+        Index("ix_notes_user_sync", "user_id", "updated_at", "id"),
+    )
+    
     @hybrid_property
     def word_count(self) -> int:
         """Get word count of the note content"""
         return len(self.content.split()) if self.content else 0
-    
-    def create_version(self, user_id: str, change_summary: str = None) -> None:
-        """Create a new version of this note"""
-        version = NoteVersion(
-            note_id=self.id,
-            title=self.title,
-            content=self.content,
-            user_id=user_id,
-            change_summary=change_summary
-        )
-        self.versions.append(version)
 
 
 class NoteVersion(BaseModel):
@@ -87,13 +93,22 @@ class NoteVersion(BaseModel):
     
     note_id = Column(UUID(as_uuid=True), ForeignKey("notes.id"), nullable=False)
     title = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
     user_id = Column(String, nullable=False)
     change_summary = Column(String(255), nullable=True)
     version_number = Column(Integer, nullable=False, default=1)
     
+    # Snapshots store the full content; other versions store a delta from
+    # the previous version (see app/services/note_versions.py)
+    is_snapshot = Column(Boolean, default=True, nullable=False)
+    content = Column(Text, nullable=True)
+    delta = Column(JSON, nullable=True)
+    
     # Relationship
     note = relationship("Note", back_populates="versions")
+    
+    __table_args__ = (
+        Index("uq_note_versions_note_version", "note_id", "version_number", unique=True),
+    )
 
 
 class Tag(UserOwnedModel):
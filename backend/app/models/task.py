@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from enum import Enum
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, ForeignKey, JSON, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -53,7 +53,8 @@ class Task(UserOwnedModel):
     # Recurring task fields
     is_recurring = Column(Boolean, default=False, nullable=False)
     recurrence_rule = Column(String, nullable=True)  # RRULE format
-    recurrence_parent_id = Column(UUID(as_uuid=True), nullable=True)
+    recurrence_parent_id = Column(UUID(as_uuid=True), nullable=True)  # First task of the series
+    recurrence_date = Column(DateTime(timezone=True), nullable=True)  # Date in the series; DTSTART on the first task
     
     # Additional metadata
     tags = Column(JSON, default=list, nullable=False)
@@ -65,6 +66,23 @@ class Task(UserOwnedModel):
     subtasks = relationship("Task", backref="parent", remote_side="Task.id")
     task_logs = relationship("TaskLog", back_populates="task", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Trigram indexes for fuzzy search
+        Index("ix_tasks_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_tasks_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Composite indexes for per-user list queries, excluding soft-deleted rows
+        Index("ix_tasks_user_created", "user_id", text("created_at DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        Index("ix_tasks_user_due", "user_id", "due_date", "id", postgresql_where=text("is_deleted = false")),
+        Index("ix_tasks_user_status", "user_id", "status", postgresql_where=text("is_deleted = false")),
+        Index("ix_tasks_user_project", "user_id", "project_id", postgresql_where=text("is_deleted = false AND project_id IS NOT NULL")),
+        Index("ix_tasks_user_parent", "user_id", "parent_task_id", postgresql_where=text("is_deleted = false AND parent_task_id IS NOT NULL")),
+        # Recurring series, and one task per date in each, deleted or not
+        Index("ix_tasks_user_series", "user_id", "id", postgresql_where=text("is_deleted = false AND is_recurring = true AND recurrence_parent_id IS NULL")),
+        Index("uq_tasks_recurrence", "recurrence_parent_id", "recurrence_date", unique=True, postgresql_where=text("recurrence_parent_id IS NOT NULL")),
+        # Change feed for /sync, including soft-deleted rows
+        Index("ix_tasks_user_sync", "user_id", "updated_at", "id"),
+    )
+    
     def complete(self) -> None:
         """Toggle task completion status"""
         if self.status == TaskStatus.COMPLETED:
@@ -100,6 +118,12 @@ class Project(UserOwnedModel):
     
     # Relationships
     tasks = relationship("Task", back_populates="project")
+    
+    __table_args__ = (
+        Index("ix_projects_user_created", "user_id", text("created_at DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        # Change feed for /sync, including soft-deleted rows
+        Index("ix_projects_user_sync", "user_id", "updated_at", "id"),
+    )
 
 
 class TaskLog(BaseModel):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, JSON
+from sqlalchemy import Column, String, Boolean, JSON, Index
 
 from app.models.base import BaseModel
 
@@ -32,6 +32,14 @@ class User(BaseModel):
     # Note: No relationships defined here since other models use user_id as string
     # Access user's tasks, notes, habits via repositories instead
     
+    __table_args__ = (
+        # Trigram indexes for fuzzy user search
+        Index("ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_users_username_trgm", "username", postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"}),
+        Index("ix_users_first_name_trgm", "first_name", postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"}),
+        Index("ix_users_last_name_trgm", "last_name", postgresql_using="gin", postgresql_ops={"last_name": "gin_trgm_ops"}),
+    )
+    
     @property
     def full_name(self) -> str:
         """Get user's full name"""
@@ -1,8 +1,12 @@
 from app.repositories.base import BaseRepository, UserOwnedRepository
 from app.repositories.user import UserRepository
 from app.repositories.task import TaskRepository, ProjectRepository
-from app.repositories.note import NoteRepository
-from app.repositories.habit import HabitRepository, HabitLogRepository
+from app.repositories.note import NoteRepository, NoteVersionRepository
+from app.repositories.note_graph import NoteGraphRepository
+from app.repositories.habit import HabitRepository, HabitLogRepository, HabitStreakRepository
+from app.repositories.sync import SyncRepository
+from app.repositories.import_job import ImportJobRepository
+from app.repositories.job import JobRepository
 
 __all__ = [
     "BaseRepository",
@@ -11,6 +15,12 @@ __all__ = [
     "TaskRepository",
     "ProjectRepository",
     "NoteRepository",
+    "NoteVersionRepository",
+    "NoteGraphRepository",
     "HabitRepository",
     "HabitLogRepository",
+    "HabitStreakRepository",
+    "SyncRepository",
+    "ImportJobRepository",
+    "JobRepository",
 ]
\ No newline at end of file
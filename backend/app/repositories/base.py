@@ -1,17 +1,164 @@
-from typing import TypeVar, Generic, Type, Optional, List, Dict, Any
+from collections import defaultdict
+from typing import TypeVar, Generic, Type, Optional, List, Dict, Any, Iterable, Tuple
 from uuid import UUID
-from sqlalchemy import select, and_, or_, func
+from datetime import date, datetime
+from enum import Enum
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update, and_, or_, func, literal, literal_column, tuple_, inspect, Select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.elements import ColumnElement
 
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.base import BaseModel
+from app.services.aggregate_cache import invalidate_on_commit
+from app.services.events import publish_on_commit
 
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 
 
+def _parse_order_by(order_by: Optional[str], default: str) -> Tuple[str, bool]:
+    """Split an order_by string like "-created_at" into (field, descending)"""
+    order_by = order_by or default
+    if order_by.startswith("-"):
+        return order_by[1:], True
+    return order_by, False
+
+
+def _cursor_value(value: Any) -> Any:
+    """Convert a sort value to its JSON cursor form"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _from_cursor_value(column: Any, value: Any) -> Any:
+    """Convert a JSON cursor value back to the column's Python type"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if issubclass(python_type, datetime):
+        return datetime.fromisoformat(value)
+    if issubclass(python_type, date):
+        return date.fromisoformat(value)
+    if issubclass(python_type, (Enum, UUID)):
+        return python_type(value)
+    return value
+
+
+def version_digest(*columns: Any) -> ColumnElement:
+    """
+    Aggregate that fingerprints a set of rows by the given columns, e.g. their
+    id and updated_at, for conditional requests. Unlike count and max, it also
+    changes when one row in the set is swapped for another.
+    """
+    row = func.concat_ws(":", *columns)
+    return func.md5(func.string_agg(row, aggregate_order_by(literal_column("','"), row)))
+
+
+def paginate(
+    query: Select,
+    model: Any,
+    *,
+    order_by: Optional[str] = None,
+    default_order: str = "-created_at",
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Select:
+    """
+    Apply ordering and pagination to a query.
+    
+    Rows are ordered by the requested column with ``id`` as a tie-breaker.
+    With a cursor from next_cursor(), the page starts strictly after the
+    row the cursor was taken from (keyset pagination) and ``skip`` is
+    ignored, so deep pages cost the same as the first one.
+    """
+    field, descending = _parse_order_by(order_by, default_order)
+    column = getattr(model, field)
+    
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column, model.id)
+    
+    if not cursor:
+        return query.offset(skip).limit(limit)
+    
+    position = decode_cursor(cursor)
+    if not isinstance(position, dict) or position.get("o") != f"{'-' if descending else ''}{field}":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order"
+        )
+    
+    try:
+        value = _from_cursor_value(column, position.get("v"))
+        last_id = UUID(position["id"])
+    except (KeyError, ValueError, TypeError, AttributeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    if column.nullable:
+        # PostgreSQL sorts NULLs last ascending and first descending
+        if value is None and descending:
+            condition = or_(column.is_not(None), and_(column.is_(None), model.id < last_id))
+        elif value is None:
+            condition = and_(column.is_(None), model.id > last_id)
+        elif descending:
+            condition = or_(column < value, and_(column == value, model.id < last_id))
+        else:
+            condition = or_(
+                column > value,
+                and_(column == value, model.id > last_id),
+                column.is_(None)
+            )
+    elif descending:
+        condition = tuple_(column, model.id) < tuple_(value, last_id)
+    else:
+        condition = tuple_(column, model.id) > tuple_(value, last_id)
+    
+    return query.where(condition).limit(limit)
+
+
+def next_cursor(
+    items: List[Any],
+    limit: int,
+    order_by: Optional[str] = None,
+    default_order: str = "-created_at",
+) -> Optional[str]:
+    """Cursor for the page after ``items``, or None if this was the last page"""
+    if not items or len(items) < limit:
+        return None
+    
+    field, descending = _parse_order_by(order_by, default_order)
+    last = items[-1]
+    return encode_cursor({
+        "o": f"{'-' if descending else ''}{field}",
+        "v": _cursor_value(getattr(last, field)),
+        "id": str(last.id),
+    })
+
+
 class BaseRepository(Generic[ModelType]):
-    """Base repository with common CRUD operations"""
+    """
+    Base repository with common CRUD operations.
+    
+    Mutators flush but never commit: the session's unit of work commits
+    once for the whole request (see app.core.database.unit_of_work).
+    """
     
     def __init__(self, model: Type[ModelType], db: AsyncSession):
         self.model = model
@@ -35,8 +182,9 @@ class BaseRepository(Generic[ModelType]):
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None,
         order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[ModelType]:
-        """Get multiple records with pagination"""
+        """Get multiple records with offset or cursor pagination"""
         query = select(self.model).where(self.model.is_deleted == False)
         
         # Apply filters
@@ -45,27 +193,33 @@ class BaseRepository(Generic[ModelType]):
                 if hasattr(self.model, key) and value is not None:
                     query = query.where(getattr(self.model, key) == value)
         
-        # Apply ordering
-        if order_by:
-            if order_by.startswith("-"):
-                query = query.order_by(getattr(self.model, order_by[1:]).desc())
-            else:
-                query = query.order_by(getattr(self.model, order_by))
-        else:
-            query = query.order_by(self.model.created_at.desc())
-        
-        # Apply pagination
-        query = query.offset(skip).limit(limit)
+        # Apply ordering and pagination
+        query = paginate(
+            query,
+            self.model,
+            order_by=order_by,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
         
         result = await self.db.execute(query)
         return result.scalars().all()
     
+    def next_cursor(
+        self,
+        items: List[ModelType],
+        limit: int,
+        order_by: Optional[str] = None
+    ) -> Optional[str]:
+        """Cursor for the page after ``items`` as returned by get_multi"""
+        return next_cursor(items, limit, order_by)
+    
     async def create(self, obj_in: Dict[str, Any]) -> ModelType:
         """Create a new record"""
         db_obj = self.model(**obj_in)
         self.db.add(db_obj)
-        await self.db.commit()
-        await self.db.refresh(db_obj)
+        await self.db.flush()
         return db_obj
     
     async def update(
@@ -82,8 +236,7 @@ class BaseRepository(Generic[ModelType]):
             if hasattr(db_obj, field):
                 setattr(db_obj, field, value)
         
-        await self.db.commit()
-        await self.db.refresh(db_obj)
+        await self.db.flush()
         return db_obj
     
     async def delete(self, id: UUID) -> bool:
@@ -93,7 +246,7 @@ class BaseRepository(Generic[ModelType]):
             return False
         
         db_obj.soft_delete()
-        await self.db.commit()
+        await self.db.flush()
         return True
     
     async def hard_delete(self, id: UUID) -> bool:
@@ -103,9 +256,47 @@ class BaseRepository(Generic[ModelType]):
             return False
         
         await self.db.delete(db_obj)
-        await self.db.commit()
+        await self.db.flush()
         return True
     
+    async def trigram_search(
+        self,
+        query: str,
+        columns: List[Any],
+        min_similarity: Optional[float] = None
+    ) -> Tuple[ColumnElement, ColumnElement]:
+        """
+        Build a fuzzy match condition and relevance score over text columns.
+        
+        Matches rows where any column contains ``query`` as a substring or
+        has a word whose trigram similarity to it reaches ``min_similarity``.
+        Both forms are served by the columns' gin_trgm_ops indexes. Returns
+        ``(condition, score)``; order by the score descending.
+        """
+        if min_similarity is None:
+            min_similarity = settings.SEARCH_MIN_SIMILARITY
+        
+        # The <% operator reads its threshold from this setting, scoped to
+        # the current transaction
+        await self.db.execute(
+            select(func.set_config(
+                "pg_trgm.word_similarity_threshold",
+                str(min_similarity),
+                True
+            ))
+        )
+        
+        term = literal(query)
+        condition = or_(*[
+            or_(column.ilike(f"%{query}%"), term.op("<%")(column))
+            for column in columns
+        ])
+        score = func.greatest(*[
+            func.word_similarity(term, func.coalesce(column, ""))
+            for column in columns
+        ])
+        return condition, score
+    
     async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Count records matching filters"""
         query = select(func.count(self.model.id)).where(
@@ -124,6 +315,32 @@ class BaseRepository(Generic[ModelType]):
 class UserOwnedRepository(BaseRepository[ModelType]):
     """Repository for user-owned resources"""
     
+    # Cached aggregates (see app.services.aggregate_cache) that writes through
+    # this repository invalidate, and the scope of the change events they
+    # publish (see app.services.events)
+    aggregate_scope: Optional[str] = None
+    
+    def _changed(self, user_id: str, ids: Iterable[Any] = ()) -> None:
+        """Note that the user's data changed, for when the unit of work commits"""
+        if self.aggregate_scope is not None:
+            invalidate_on_commit(self.db, user_id, self.aggregate_scope)
+            publish_on_commit(self.db, user_id, self.aggregate_scope, ids)
+    
+    async def get_collection_version(self, user_id: str) -> Tuple[Any, ...]:
+        """
+        Version of the user's records, for conditional list requests.
+        
+        Soft-deleted rows are included: deleting bumps updated_at and creating
+        raises the count, so any write through the repository changes it.
+        """
+        result = await self.db.execute(
+            select(
+                func.count(self.model.id),
+                func.max(self.model.updated_at)
+            ).where(self.model.user_id == user_id)
+        )
+        return tuple(result.one())
+    
     async def get_by_user(
         self,
         user_id: str,
@@ -148,6 +365,7 @@ class UserOwnedRepository(BaseRepository[ModelType]):
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None,
         order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[ModelType]:
         """Get multiple records for a specific user"""
         if filters is None:
@@ -157,7 +375,8 @@ class UserOwnedRepository(BaseRepository[ModelType]):
             skip=skip,
             limit=limit,
             filters=filters,
-            order_by=order_by
+            order_by=order_by,
+            cursor=cursor
         )
     
     async def create_for_user(
@@ -167,7 +386,9 @@ class UserOwnedRepository(BaseRepository[ModelType]):
     ) -> ModelType:
         """Create a record for a specific user"""
         obj_in["user_id"] = user_id
-        return await self.create(obj_in)
+        db_obj = await self.create(obj_in)
+        self._changed(user_id, [db_obj.id])
+        return db_obj
     
     async def update_for_user(
         self,
@@ -184,8 +405,8 @@ class UserOwnedRepository(BaseRepository[ModelType]):
             if hasattr(db_obj, field):
                 setattr(db_obj, field, value)
         
-        await self.db.commit()
-        await self.db.refresh(db_obj)
+        await self.db.flush()
+        self._changed(user_id, [id])
         return db_obj
     
     async def delete_for_user(
@@ -199,5 +420,109 @@ class UserOwnedRepository(BaseRepository[ModelType]):
             return False
         
         db_obj.soft_delete()
-        await self.db.commit()
-        return True
\ No newline at end of file
+        await self.db.flush()
+        self._changed(user_id, [id])
+        return True
+    
+    def _column_values(self, obj_in: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the fields that map to columns, as update_for_user does"""
+        columns = inspect(self.model).column_attrs.keys()
+        return {field: value for field, value in obj_in.items() if field in columns}
+    
+    async def _owned_ids(self, user_id: str, ids: List[UUID]) -> List[UUID]:
+        """The subset of ``ids`` that are live records of the user"""
+        query = select(self.model.id).where(
+            and_(
+                self.model.id.in_(ids),
+                self.model.user_id == user_id,
+                self.model.is_deleted == False
+            )
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def create_many_for_user(
+        self,
+        user_id: str,
+        items: List[Dict[str, Any]]
+    ) -> List[ModelType]:
+        """Create many records for a user with a single INSERT ... RETURNING"""
+        if not items:
+            return []
+        
+        rows = [{**self._column_values(item), "user_id": user_id} for item in items]
+        result = await self.db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            rows
+        )
+        created = result.all()
+        self._changed(user_id, [db_obj.id for db_obj in created])
+        return created
+    
+    async def update_many_for_user(
+        self,
+        user_id: str,
+        updates: Dict[UUID, Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Apply per-record changes in as few statements as possible. Returns
+        the IDs that were found.
+        
+        Records receiving identical changes, like a multi-select complete,
+        share one ``UPDATE ... WHERE id IN (...)``. The remaining records go
+        through a single executemany UPDATE by primary key.
+        """
+        found = await self._owned_ids(user_id, list(updates))
+        
+        groups = defaultdict(list)
+        for id in found:
+            values = self._column_values(updates[id])
+            if values:
+                groups[repr(sorted(values.items()))].append((id, values))
+        
+        singles = []
+        for members in groups.values():
+            if len(members) == 1:
+                id, values = members[0]
+                singles.append({"id": id, **values})
+                continue
+            
+            await self.db.execute(
+                update(self.model).where(
+                    self.model.id.in_([id for id, _ in members])
+                ).values(**members[0][1]).execution_options(
+                    synchronize_session=False
+                )
+            )
+        
+        if singles:
+            await self.db.execute(update(self.model), singles)
+        
+        if found:
+            self._changed(user_id, found)
+        return found
+    
+    async def delete_many_for_user(
+        self,
+        user_id: str,
+        ids: List[UUID]
+    ) -> List[UUID]:
+        """Soft delete many records with a single UPDATE; returns the IDs deleted"""
+        result = await self.db.execute(
+            update(self.model).where(
+                and_(
+                    self.model.id.in_(ids),
+                    self.model.user_id == user_id,
+                    self.model.is_deleted == False
+                )
+            ).values(
+                is_deleted=True,
+                deleted_at=func.now()
+            ).returning(self.model.id).execution_options(
+                synchronize_session=False
+            )
+        )
+        deleted = result.scalars().all()
+        if deleted:
+            self._changed(user_id, deleted)
+        return deleted
\ No newline at end of file
@@ -1,17 +1,24 @@
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import datetime, date, timedelta
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, insert, delete, and_, or_, func, cast, Select, Subquery
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
-from app.models.habit import Habit, HabitLog, HabitFrequency
-from app.repositories.base import UserOwnedRepository
+from app.models.habit import Habit, HabitLog, HabitStreak, HabitFrequency
+from app.repositories.base import UserOwnedRepository, paginate
+from app.services.aggregate_cache import invalidate_on_commit
+from app.services.events import publish_on_commit
+from app.services.streaks import Streak, StreakState, compute_states, current_length, islands_query
 
 
 class HabitRepository(UserOwnedRepository[Habit]):
     """Repository for habit operations"""
     
+    aggregate_scope = "habits"
+    
     async def get_with_logs(
         self,
         user_id: str,
@@ -28,31 +35,37 @@ class HabitRepository(UserOwnedRepository[Habit]):
         logs_query = select(HabitLog).where(
             and_(
                 HabitLog.habit_id == habit_id,
-                HabitLog.date >= start_date
+                HabitLog.is_deleted == False,
+                HabitLog.log_date >= start_date
             )
-        ).order_by(HabitLog.date.desc())
+        ).order_by(HabitLog.log_date.desc())
         
         logs_result = await self.db.execute(logs_query)
         logs = logs_result.scalars().all()
         
+        streaks = await HabitStreakRepository(self.db).get_streaks(user_id, [habit_id])
+        streak = streaks.get(habit_id, Streak())
+        
         return {
             "habit": habit,
             "logs": logs,
-            "streak": habit.calculate_streak(logs)
+            "streak": streak.current
         }
     
     async def get_active_habits(
         self,
         user_id: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Habit]:
         """Get active (non-archived) habits"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"is_active": True, "is_archived": False}
+            filters={"is_active": True, "is_archived": False},
+            cursor=cursor
         )
     
     async def get_by_category(
@@ -60,14 +73,16 @@ class HabitRepository(UserOwnedRepository[Habit]):
         user_id: str,
         category: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Habit]:
         """Get habits by category"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"category": category}
+            filters={"category": category},
+            cursor=cursor
         )
     
     async def get_today_habits(
@@ -75,49 +90,54 @@ class HabitRepository(UserOwnedRepository[Habit]):
         user_id: str
     ) -> List[Dict[str, Any]]:
         """Get habits that should be done today with their completion status"""
-        habits = await self.get_active_habits(user_id)
         today = datetime.utcnow().date()
-        result = []
         
-        for habit in habits:
-            # Check if habit should be done today based on frequency
-            should_do_today = self._should_do_today(habit, today)
-            if not should_do_today:
-                continue
-            
-            # Check if already logged today
-            log_query = select(HabitLog).where(
-                and_(
-                    HabitLog.habit_id == habit.id,
-                    HabitLog.date == today
-                )
+        # One query: active habits due today, each with today's log if any
+        query = select(Habit, HabitLog).outerjoin(
+            HabitLog,
+            and_(
+                HabitLog.habit_id == Habit.id,
+                HabitLog.log_date == today,
+                HabitLog.is_deleted == False
             )
-            log_result = await self.db.execute(log_query)
-            log = log_result.scalar_one_or_none()
-            
-            result.append({
+        ).where(
+            and_(
+                Habit.user_id == user_id,
+                Habit.is_deleted == False,
+                Habit.is_active == True,
+                Habit.is_archived == False,
+                self._due_on(today)
+            )
+        ).order_by(Habit.created_at.desc(), Habit.id.desc())
+        
+        result = await self.db.execute(query)
+        
+        return [
+            {
                 "habit": habit,
-                "completed": log is not None,
+                "completed": log is not None and log.completed,
                 "log": log
-            })
-        
-        return result
+            }
+            for habit, log in result.all()
+        ]
     
-    def _should_do_today(self, habit: Habit, today: date) -> bool:
-        """Check if habit should be done on a specific date"""
-        if habit.frequency == HabitFrequency.DAILY:
-            return True
-        
-        if habit.frequency == HabitFrequency.WEEKLY:
-            # Check if today is one of the target days
-            return today.weekday() in (habit.target_days or [])
-        
-        if habit.frequency == HabitFrequency.MONTHLY:
-            # Check if today is the target day of month
-            return today.day in (habit.target_days or [])
-        
-        # Custom frequency - always show
-        return True
+    @staticmethod
+    def _due_on(day: date) -> ColumnElement:
+        """SQL predicate for habits that should be done on a specific date"""
+        target_days = cast(Habit.target_days, JSONB)
+        return or_(
+            # Weekly habits list weekdays, monthly habits list days of the month
+            and_(
+                Habit.frequency == HabitFrequency.WEEKLY,
+                target_days.contains([day.weekday()])
+            ),
+            and_(
+                Habit.frequency == HabitFrequency.MONTHLY,
+                target_days.contains([day.day])
+            ),
+            # Daily and custom frequencies are always shown
+            Habit.frequency.in_([HabitFrequency.DAILY, HabitFrequency.CUSTOM])
+        )
     
     async def log_habit(
         self,
@@ -128,7 +148,7 @@ class HabitRepository(UserOwnedRepository[Habit]):
         value: Optional[float] = None,
         notes: Optional[str] = None
     ) -> Optional[HabitLog]:
-        """Log a habit completion"""
+        """Log a habit completion and update the habit's streak state"""
         # Verify habit belongs to user
         habit = await self.get_by_user(user_id, habit_id)
         if not habit:
@@ -138,54 +158,75 @@ class HabitRepository(UserOwnedRepository[Habit]):
         existing_query = select(HabitLog).where(
             and_(
                 HabitLog.habit_id == habit_id,
-                HabitLog.date == date
+                HabitLog.log_date == date
             )
         )
         existing_result = await self.db.execute(existing_query)
-        existing_log = existing_result.scalar_one_or_none()
+        log = existing_result.scalar_one_or_none()
         
-        if existing_log:
+        if log:
             # Update existing log
-            existing_log.completed = completed
-            existing_log.value = value
-            existing_log.notes = notes
-            await self.db.commit()
-            await self.db.refresh(existing_log)
-            return existing_log
+            was_completed = log.completed and not log.is_deleted
+            log.restore()
+            log.completed = completed
+            log.notes = notes
         else:
             # Create new log
+            was_completed = False
             log = HabitLog(
                 habit_id=habit_id,
-                date=date,
+                user_id=user_id,
+                log_date=date,
                 completed=completed,
-                value=value,
                 notes=notes
             )
             self.db.add(log)
-            await self.db.commit()
-            await self.db.refresh(log)
-            return log
+        
+        await self.db.flush()
+        
+        streak_repo = HabitStreakRepository(self.db)
+        if completed and not was_completed:
+            await streak_repo.add_completion(habit_id, date)
+        elif was_completed and not completed:
+            await streak_repo.remove_completion(habit_id, date)
+        
+        await self.db.flush()
+        self._changed(user_id, [habit_id])
+        return log
     
     async def get_habit_logs(
         self,
         user_id: str,
         habit_id: UUID,
         start_date: date,
-        end_date: date
+        end_date: date,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[HabitLog]:
-        """Get habit logs for a date range"""
-        # Verify habit belongs to user
-        habit = await self.get_by_user(user_id, habit_id)
-        if not habit:
-            return []
-        
-        query = select(HabitLog).where(
+        """Get habit logs for a date range, optionally one page at a time"""
+        query = select(HabitLog).join(Habit).where(
             and_(
                 HabitLog.habit_id == habit_id,
-                HabitLog.date >= start_date,
-                HabitLog.date <= end_date
+                Habit.user_id == user_id,
+                Habit.is_deleted == False,
+                HabitLog.is_deleted == False,
+                HabitLog.log_date >= start_date,
+                HabitLog.log_date <= end_date
+            )
+        )
+        
+        if limit is None:
+            query = query.order_by(HabitLog.log_date, HabitLog.id)
+        else:
+            query = paginate(
+                query,
+                HabitLog,
+                order_by="log_date",
+                skip=skip,
+                limit=limit,
+                cursor=cursor
             )
-        ).order_by(HabitLog.date)
         
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -195,27 +236,29 @@ class HabitRepository(UserOwnedRepository[Habit]):
         user_id: str
     ) -> List[Dict[str, Any]]:
         """Get current streaks for all active habits"""
-        habits = await self.get_active_habits(user_id)
+        query = select(Habit).where(
+            and_(
+                Habit.user_id == user_id,
+                Habit.is_deleted == False,
+                Habit.is_active == True,
+                Habit.is_archived == False
+            )
+        )
+        result = await self.db.execute(query)
+        habits = result.scalars().all()
+        
+        all_streaks = await HabitStreakRepository(self.db).get_streaks(user_id)
         streaks = []
         
         for habit in habits:
-            # Get recent logs
-            logs_query = select(HabitLog).where(
-                and_(
-                    HabitLog.habit_id == habit.id,
-                    HabitLog.completed == True
-                )
-            ).order_by(HabitLog.date.desc()).limit(365)
-            
-            logs_result = await self.db.execute(logs_query)
-            logs = logs_result.scalars().all()
-            
-            current_streak = habit.calculate_streak(logs)
+            streak = all_streaks.get(habit.id, Streak())
+            habit.streak_count = streak.current
+            habit.best_streak = streak.best
             
             streaks.append({
                 "habit": habit,
-                "current_streak": current_streak,
-                "best_streak": habit.best_streak
+                "current_streak": streak.current,
+                "best_streak": streak.best
             })
         
         return sorted(streaks, key=lambda x: x["current_streak"], reverse=True)
@@ -231,8 +274,8 @@ class HabitRepository(UserOwnedRepository[Habit]):
             return None
         
         habit.archive()
-        await self.db.commit()
-        await self.db.refresh(habit)
+        await self.db.flush()
+        self._changed(user_id, [habit_id])
         return habit
     
     async def get_categories(
@@ -255,64 +298,63 @@ class HabitRepository(UserOwnedRepository[Habit]):
         self,
         user_id: str
     ) -> Dict[str, Any]:
-        """Get habit statistics for a user"""
-        # Total habits
-        total_query = select(func.count(Habit.id)).where(
+        """Get habit statistics for a user in a single query"""
+        today = datetime.utcnow().date()
+        month_start = today.replace(day=1)
+        
+        active = and_(
+            Habit.is_active == True,
+            Habit.is_archived == False
+        )
+        due_today = and_(active, self._due_on(today))
+        
+        monthly_logs = select(func.count(HabitLog.id)).join(Habit).where(
             and_(
                 Habit.user_id == user_id,
-                Habit.is_deleted == False
+                Habit.is_deleted == False,
+                HabitLog.log_date >= month_start,
+                HabitLog.completed == True,
+                HabitLog.is_deleted == False
             )
-        )
-        total_result = await self.db.execute(total_query)
-        total = total_result.scalar() or 0
+        ).scalar_subquery()
         
-        # Active habits
-        active_query = select(func.count(Habit.id)).where(
+        # At most one log per habit per day, so the join never duplicates habits
+        query = select(
+            func.count(Habit.id),
+            func.count(Habit.id).filter(active),
+            func.count(Habit.id).filter(due_today),
+            func.count(Habit.id).filter(and_(due_today, HabitLog.completed == True)),
+            monthly_logs
+        ).outerjoin(
+            HabitLog,
+            and_(
+                HabitLog.habit_id == Habit.id,
+                HabitLog.log_date == today,
+                HabitLog.is_deleted == False
+            )
+        ).where(
             and_(
                 Habit.user_id == user_id,
-                Habit.is_deleted == False,
-                Habit.is_active == True,
-                Habit.is_archived == False
+                Habit.is_deleted == False
             )
         )
-        active_result = await self.db.execute(active_query)
-        active = active_result.scalar() or 0
         
-        # Get today's completion rate
-        today_habits = await self.get_today_habits(user_id)
-        completed_today = sum(1 for h in today_habits if h["completed"])
-        completion_rate = (
-            (completed_today / len(today_habits) * 100) 
-            if today_habits else 0
-        )
+        result = await self.db.execute(query)
+        total, active_count, total_today, completed_today, monthly_count = result.one()
         
-        # Get total logs this month
-        month_start = datetime.utcnow().replace(day=1).date()
-        logs_query = select(func.count(HabitLog.id)).where(
-            and_(
-                HabitLog.habit_id.in_(
-                    select(Habit.id).where(
-                        and_(
-                            Habit.user_id == user_id,
-                            Habit.is_deleted == False
-                        )
-                    )
-                ),
-                HabitLog.date >= month_start,
-                HabitLog.completed == True
-            )
+        completion_rate = (
+            (completed_today / total_today * 100)
+            if total_today else 0
         )
-        logs_result = await self.db.execute(logs_query)
-        monthly_logs = logs_result.scalar() or 0
         
         return {
             "total": total,
-            "active": active,
-            "archived": total - active,
+            "active": active_count,
+            "archived": total - active_count,
             "completion_rate_today": round(completion_rate, 1),
             "completed_today": completed_today,
-            "total_today": len(today_habits),
-            "monthly_logs": monthly_logs
+            "total_today": total_today,
+            "monthly_logs": monthly_count
         }
 
 
@@ -326,39 +368,290 @@ class HabitLogRepository:
         self,
         user_id: str,
         start_date: date,
-        end_date: date
+        end_date: date,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[HabitLog]:
-        """Get all habit logs for a user in a date range"""
-        query = select(HabitLog).join(Habit).where(
+        """Get all habit logs for a user in a date range, newest first"""
+        # On the log's own user_id, which ix_habit_logs_user_date covers
+        query = select(HabitLog).where(
             and_(
-                Habit.user_id == user_id,
-                HabitLog.date >= start_date,
-                HabitLog.date <= end_date
+                HabitLog.user_id == user_id,
+                HabitLog.is_deleted == False,
+                HabitLog.log_date >= start_date,
+                HabitLog.log_date <= end_date
+            )
+        )
+        
+        if limit is None:
+            query = query.order_by(HabitLog.log_date.desc(), HabitLog.id.desc())
+        else:
+            query = paginate(
+                query,
+                HabitLog,
+                order_by="-log_date",
+                skip=skip,
+                limit=limit,
+                cursor=cursor
             )
-        ).order_by(HabitLog.date.desc(), HabitLog.created_at.desc())
         
         result = await self.db.execute(query)
         return result.scalars().all()
     
+    async def create_many(
+        self,
+        user_id: str,
+        logs: List[Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Insert many logs for habits the user owns with one statement.
+        
+        Dates a habit already has a log for are skipped. Returns the habit
+        ID of each log created; streak state is left to the caller to
+        recompute, once for all of the habits.
+        """
+        if not logs:
+            return []
+        
+        result = await self.db.scalars(
+            pg_insert(HabitLog).on_conflict_do_nothing(
+                index_elements=["habit_id", "log_date"]
+            ).returning(HabitLog.habit_id),
+            [{**log, "user_id": user_id} for log in logs]
+        )
+        habit_ids = result.all()
+        
+        if habit_ids:
+            invalidate_on_commit(self.db, user_id, "habits")
+            publish_on_commit(self.db, user_id, "habits", habit_ids)
+        return habit_ids
+    
     async def delete_log(
         self,
         user_id: str,
         log_id: UUID
     ) -> bool:
-        """Delete a habit log"""
+        """
+        Soft delete a habit log, so sync clients see the deletion. Logging
+        the same date again restores it.
+        """
         # Verify log belongs to user's habit
         query = select(HabitLog).join(Habit).where(
             and_(
                 HabitLog.id == log_id,
-                Habit.user_id == user_id
+                Habit.user_id == user_id,
+                HabitLog.is_deleted == False
             )
         )
         result = await self.db.execute(query)
         log = result.scalar_one_or_none()
         
         if log:
-            await self.db.delete(log)
-            await self.db.commit()
+            was_completed = log.completed
+            log.soft_delete()
+            await self.db.flush()
+            
+            if was_completed:
+                await HabitStreakRepository(self.db).remove_completion(log.habit_id, log.log_date)
+            
+            invalidate_on_commit(self.db, user_id, "habits")
+            publish_on_commit(self.db, user_id, "habits", [log.habit_id])
             return True
         
-        return False
\ No newline at end of file
+        return False
+
+
+class HabitStreakRepository:
+    """
+    Materialized streak state, one live habit_streaks row per habit.
+    
+    The row holds the habit's latest run of consecutive completed days
+    (start_date, last_check_in, current_count) and its best run
+    (longest_count). Log writes keep it up to date incrementally; changes
+    that can reshape older runs recompute that one habit from its logs.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_streaks(
+        self,
+        user_id: str,
+        habit_ids: Optional[List[UUID]] = None
+    ) -> Dict[UUID, Streak]:
+        """Get current and best streaks for a user's habits"""
+        query = select(
+            HabitStreak.habit_id,
+            HabitStreak.last_check_in,
+            HabitStreak.current_count,
+            HabitStreak.longest_count
+        ).where(
+            and_(
+                HabitStreak.user_id == user_id,
+                HabitStreak.is_deleted == False
+            )
+        )
+        if habit_ids is not None:
+            query = query.where(HabitStreak.habit_id.in_(habit_ids))
+        
+        result = await self.db.execute(query)
+        today = datetime.utcnow().date()
+        
+        return {
+            habit_id: Streak(
+                current=current_length(last_check_in, current_count, today),
+                best=longest_count
+            )
+            for habit_id, last_check_in, current_count, longest_count in result.all()
+        }
+    
+    async def _lock_habits(
+        self,
+        habit_ids: Optional[List[UUID]] = None,
+        user_id: Optional[str] = None
+    ) -> None:
+        """
+        Lock the habits whose streak state is about to change. Their state
+        row may not exist yet, so the habit is what serializes writers;
+        always taken before the state row, in ID order.
+        """
+        query = select(Habit.id).order_by(Habit.id).with_for_update()
+        if habit_ids is not None:
+            query = query.where(Habit.id.in_(habit_ids))
+        if user_id is not None:
+            query = query.where(Habit.user_id == user_id)
+        await self.db.execute(query)
+    
+    async def _get_state(self, habit_id: UUID) -> Optional[HabitStreak]:
+        """Get and lock a habit's streak state"""
+        await self._lock_habits([habit_id])
+        query = select(HabitStreak).where(
+            and_(
+                HabitStreak.habit_id == habit_id,
+                HabitStreak.is_deleted == False
+            )
+        ).with_for_update()
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+    
+    async def add_completion(self, habit_id: UUID, log_date: date) -> None:
+        """Update streak state after a day was marked completed"""
+        state = await self._get_state(habit_id)
+        
+        if state is None or state.last_check_in is None or log_date <= state.last_check_in:
+            # Backdated logs can join or extend older runs
+            await self.recompute([habit_id])
+            return
+        
+        if log_date == state.last_check_in + timedelta(days=1):
+            state.current_count += 1
+        else:
+            state.start_date = log_date
+            state.current_count = 1
+        
+        state.last_check_in = log_date
+        state.longest_count = max(state.longest_count, state.current_count)
+        await self.db.flush()
+    
+    async def remove_completion(self, habit_id: UUID, log_date: date) -> None:
+        """Update streak state after a completed day was removed"""
+        state = await self._get_state(habit_id)
+        
+        if (
+            state is not None
+            and log_date == state.last_check_in
+            and 1 < state.current_count < state.longest_count
+        ):
+            # Shortening the latest run from its end leaves the best run intact
+            state.last_check_in = log_date - timedelta(days=1)
+            state.current_count -= 1
+            await self.db.flush()
+            return
+        
+        await self.recompute([habit_id])
+    
+    async def recompute(
+        self,
+        habit_ids: Optional[List[UUID]] = None,
+        user_id: Optional[str] = None
+    ) -> int:
+        """
+        Rebuild streak state from completed logs.
+        
+        Limited to ``habit_ids`` and/or ``user_id`` when given, otherwise
+        every habit is rebuilt. Returns the number of states written.
+        """
+        completed = select(HabitLog.habit_id, Habit.user_id, HabitLog.log_date).join(Habit).where(
+            and_(
+                Habit.is_deleted == False,
+                HabitLog.completed == True,
+                HabitLog.is_deleted == False
+            )
+        )
+        existing = delete(HabitStreak)
+        
+        # Otherwise concurrent rebuilds of a habit without state both insert one
+        await self._lock_habits(habit_ids, user_id)
+        
+        if habit_ids is not None:
+            completed = completed.where(HabitLog.habit_id.in_(habit_ids))
+            existing = existing.where(HabitStreak.habit_id.in_(habit_ids))
+        if user_id is not None:
+            completed = completed.where(Habit.user_id == user_id)
+            existing = existing.where(HabitStreak.user_id == user_id)
+        
+        if self.db.get_bind().dialect.name == "postgresql":
+            result = await self.db.execute(self._states_query(completed.subquery()))
+            states = {(row[0], row[1]): StreakState(*row[2:]) for row in result.all()}
+        else:
+            # Without date arithmetic in SQL, group the dates in Python
+            result = await self.db.execute(completed)
+            states = compute_states(
+                ((habit_id, owner), log_date) for habit_id, owner, log_date in result.all()
+            )
+        
+        await self.db.execute(existing)
+        if states:
+            await self.db.execute(insert(HabitStreak), [
+                {
+                    "habit_id": habit_id,
+                    "user_id": owner,
+                    "start_date": state.start_date,
+                    "last_check_in": state.last_date,
+                    "current_count": state.length,
+                    "longest_count": state.best,
+                    "is_active": True,
+                    "freeze_count": 0,
+                    "max_freezes": 2,
+                    "is_deleted": False
+                }
+                for (habit_id, owner), state in states.items()
+            ])
+        
+        await self.db.flush()
+        return len(states)
+    
+    async def rebuild(self, user_id: Optional[str] = None) -> int:
+        """Repair streak state from logs for one user, or for everyone"""
+        count = await self.recompute(user_id=user_id)
+        if user_id is not None:
+            invalidate_on_commit(self.db, user_id, "habits")
+        return count
+    
+    @staticmethod
+    def _states_query(completed: Subquery) -> Select:
+        """Each habit's latest run of completed days and its longest run length"""
+        islands = islands_query(completed)
+        
+        return select(
+            islands.c.habit_id,
+            islands.c.user_id,
+            islands.c.start_date,
+            islands.c.last_date,
+            islands.c.length,
+            func.max(islands.c.length).over(partition_by=islands.c.habit_id)
+        ).distinct(islands.c.habit_id).order_by(
+            islands.c.habit_id,
+            islands.c.last_date.desc()
+        )
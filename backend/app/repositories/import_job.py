@@ -0,0 +1,23 @@
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import update
+
+from app.models.import_job import ImportJob
+from app.repositories.base import UserOwnedRepository
+
+
+class ImportJobRepository(UserOwnedRepository[ImportJob]):
+    """Repository for import jobs"""
+    
+    async def set_state(
+        self,
+        job_id: UUID,
+        values: Dict[str, Any]
+    ) -> None:
+        """Record a job's status or progress"""
+        await self.db.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(**values).execution_options(
+                synchronize_session=False
+            )
+        )
@@ -0,0 +1,191 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, and_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.job import Job, JobStatus
+from app.repositories.base import BaseRepository
+
+
+# Jobs whose key blocks another job with the same key
+UNFINISHED = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+class JobRepository(BaseRepository[Job]):
+    """Repository for the background job queue"""
+    
+    async def get_for_user(
+        self,
+        user_id: str,
+        id: UUID
+    ) -> Optional[Job]:
+        """Get a job run on behalf of the user"""
+        query = select(Job).where(
+            and_(
+                Job.id == id,
+                Job.user_id == user_id,
+                Job.is_deleted == False
+            )
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+    
+    async def add(
+        self,
+        name: str,
+        payload: Dict[str, Any],
+        user_id: Optional[str],
+        run_at: Any,
+        max_attempts: int,
+        idempotency_key: Optional[str] = None
+    ) -> UUID:
+        """
+        Insert a queued job and return its ID, or the ID of the unfinished
+        job that already has ``idempotency_key``.
+        """
+        statement = pg_insert(Job).values(
+            name=name,
+            payload=payload,
+            user_id=user_id,
+            status=JobStatus.QUEUED,
+            run_at=run_at,
+            attempts=0,
+            max_attempts=max_attempts,
+            idempotency_key=idempotency_key
+        ).returning(Job.id)
+        if idempotency_key is None:
+            return await self.db.scalar(statement)
+        
+        statement = statement.on_conflict_do_nothing(
+            index_elements=["idempotency_key"],
+            # Spelled out, since the index is only inferred from a literal predicate
+            index_where=text("status IN ('QUEUED', 'RUNNING')")
+        )
+        existing = select(Job.id).where(
+            and_(
+                Job.idempotency_key == idempotency_key,
+                Job.status.in_(UNFINISHED)
+            )
+        )
+        # The job holding the key can finish in between; then insert again
+        while True:
+            job_id = await self.db.scalar(statement)
+            if job_id is None:
+                job_id = await self.db.scalar(existing)
+            if job_id is not None:
+                return job_id
+    
+    async def claim(self, worker_id: str) -> Optional[Job]:
+        """
+        Mark the next due job as running under ``worker_id`` and return it.
+        
+        FOR UPDATE SKIP LOCKED lets concurrent workers each claim a
+        different job without waiting on one another.
+        """
+        due = select(Job.id).where(
+            and_(
+                Job.status == JobStatus.QUEUED,
+                Job.run_at <= func.now()
+            )
+        ).order_by(Job.run_at).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+        
+        result = await self.db.execute(
+            update(Job).where(Job.id == due).values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_at=func.now()
+            ).returning(Job).execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+    
+    def _owned(self, job_id: UUID, worker_id: str):
+        """The job, as long as ``worker_id`` still holds its claim"""
+        return and_(
+            Job.id == job_id,
+            Job.status == JobStatus.RUNNING,
+            Job.locked_by == worker_id
+        )
+    
+    async def heartbeat(self, job_id: UUID, worker_id: str) -> None:
+        """Show that the worker is still running the job"""
+        await self.db.execute(
+            update(Job).where(self._owned(job_id, worker_id)).values(
+                locked_at=func.now()
+            ).execution_options(synchronize_session=False)
+        )
+    
+    async def succeed(self, job_id: UUID, worker_id: str, result: Any) -> bool:
+        """Record a job as done; False if the worker no longer holds its claim"""
+        updated = await self.db.execute(
+            update(Job).where(self._owned(job_id, worker_id)).values(
+                status=JobStatus.SUCCEEDED,
+                result=result,
+                locked_by=None,
+                locked_at=None,
+                finished_at=func.now()
+            ).execution_options(synchronize_session=False)
+        )
+        return updated.rowcount > 0
+    
+    async def fail(
+        self,
+        job_id: UUID,
+        worker_id: str,
+        error: str,
+        retry_in: Optional[float]
+    ) -> None:
+        """Record a failed attempt, queueing a retry unless ``retry_in`` is None"""
+        values: Dict[str, Any] = {"last_error": error, "locked_by": None, "locked_at": None}
+        if retry_in is not None:
+            values.update(status=JobStatus.QUEUED, run_at=func.now() + timedelta(seconds=retry_in))
+        else:
+            values.update(status=JobStatus.FAILED, finished_at=func.now())
+        
+        await self.db.execute(
+            update(Job).where(self._owned(job_id, worker_id)).values(**values).execution_options(
+                synchronize_session=False
+            )
+        )
+    
+    async def release_stale(self, timeout: float) -> int:
+        """
+        Queue again the jobs whose worker hasn't reported in for ``timeout``
+        seconds, such as one that crashed, or fail them if that was their
+        last attempt. Returns the number of jobs released.
+        """
+        stale = and_(
+            Job.status == JobStatus.RUNNING,
+            Job.locked_at < func.now() - timedelta(seconds=timeout)
+        )
+        released = {"last_error": "Worker stopped responding", "locked_by": None, "locked_at": None}
+        
+        failed = await self.db.execute(
+            update(Job).where(
+                and_(stale, Job.attempts >= Job.max_attempts)
+            ).values(
+                status=JobStatus.FAILED,
+                finished_at=func.now(),
+                **released
+            ).execution_options(synchronize_session=False)
+        )
+        queued = await self.db.execute(
+            update(Job).where(stale).values(
+                status=JobStatus.QUEUED,
+                **released
+            ).execution_options(synchronize_session=False)
+        )
+        return failed.rowcount + queued.rowcount
+    
+    async def purge_finished(self, age: float) -> int:
+        """Delete jobs that finished more than ``age`` seconds ago; returns how many"""
+        result = await self.db.execute(
+            delete(Job).where(
+                Job.finished_at < func.now() - timedelta(seconds=age)
+            ).execution_options(
+                synchronize_session=False
+            )
+        )
+        return result.rowcount
@@ -1,17 +1,40 @@
-from typing import Optional, List, Dict, Any, Set
+import time
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, and_, func, cast, distinct, tuple_, values, column, literal_column, union_all, REAL
+from sqlalchemy.orm import selectinload, aliased
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
-from app.models.note import Note, note_links
-from app.repositories.base import UserOwnedRepository
+from app.core.config import settings
+from app.core.database import on_commit
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.note import Note, NoteVersion, Tag, note_links, note_tags
+from app.repositories.base import UserOwnedRepository, paginate, version_digest
+from app.repositories.note_graph import invalidate_graph
+from app.services.note_versions import make_delta, apply_delta, unified_diff
+from app.services.tag_cache import tag_counts
+from app.services.wiki_links import extract_wiki_links
+
+
+# Text search configuration used by the notes_search_vector_trigger
+SEARCH_CONFIG = "english"
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+
+def _title_key() -> ColumnElement:
+    """Note titles normalized like wiki link text (see normalize_title), for matching"""
+    return func.lower(func.btrim(func.regexp_replace(Note.title, r"\s+", " ", "g")))
 
 
 class NoteRepository(UserOwnedRepository[Note]):
     """Repository for note operations"""
     
+    aggregate_scope = "notes"
+    
     async def get_with_links(
         self,
         user_id: str,
@@ -33,33 +56,74 @@ class NoteRepository(UserOwnedRepository[Note]):
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_version(
+        self,
+        user_id: str,
+        note_id: UUID
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Version of a note as returned with its links, without loading them.
+        
+        Returns None if the note doesn't exist. Tag changes touch the note
+        itself (see _apply_update), so only linked notes are looked up.
+        """
+        links = union_all(
+            select(
+                literal_column("'to'").label("direction"),
+                note_links.c.target_note_id.label("note_id")
+            ).where(note_links.c.source_note_id == note_id),
+            select(
+                literal_column("'from'"),
+                note_links.c.source_note_id
+            ).where(note_links.c.target_note_id == note_id)
+        ).subquery()
+        linked_note = aliased(Note)
+        linked = select(
+            version_digest(links.c.direction, linked_note.id, linked_note.updated_at)
+        ).join(links, links.c.note_id == linked_note.id).scalar_subquery()
+        
+        result = await self.db.execute(
+            select(Note.updated_at, linked).where(
+                and_(
+                    Note.id == note_id,
+                    Note.user_id == user_id,
+                    Note.is_deleted == False
+                )
+            )
+        )
+        return result.one_or_none()
+    
     async def get_by_folder(
         self,
         user_id: str,
         folder_path: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Note]:
         """Get notes in a specific folder"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"folder_path": folder_path}
+            filters={"folder_path": folder_path},
+            cursor=cursor
         )
     
     async def get_favorites(
         self,
         user_id: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Note]:
         """Get favorite notes"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"is_favorite": True}
+            filters={"is_favorite": True},
+            cursor=cursor
         )
     
     async def search(
@@ -67,38 +131,94 @@ class NoteRepository(UserOwnedRepository[Note]):
         user_id: str,
         query: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Note]:
-        """Search notes by title or content"""
-        search_query = select(Note).where(
+        """
+        Full-text search over title and content.
+        
+        Uses websearch syntax ("quoted phrases", -exclusions, OR) against the
+        GIN-indexed content_search_vector, ranked by ts_rank_cd. Each returned
+        note carries ``search_rank`` and a highlighted ``search_snippet``.
+        Pass the cursor from search_cursor() to get the next page.
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(Note.content_search_vector, ts_query)
+        snippet = func.ts_headline(SEARCH_CONFIG, Note.content, ts_query, SNIPPET_OPTIONS)
+        
+        search_query = select(
+            Note,
+            rank.label("rank"),
+            snippet.label("snippet")
+        ).where(
             and_(
                 Note.user_id == user_id,
                 Note.is_deleted == False,
-                or_(
-                    Note.title.ilike(f"%{query}%"),
-                    Note.content.ilike(f"%{query}%")
+                Note.content_search_vector.op("@@")(ts_query)
+            )
+        ).order_by(rank.desc(), Note.id.desc())
+        
+        if cursor:
+            try:
+                after_rank, after_id = decode_cursor(cursor)
+                after_rank, after_id = float(after_rank), UUID(after_id)
+            except (ValueError, TypeError, AttributeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
                 )
+            search_query = search_query.where(
+                tuple_(rank, Note.id) < tuple_(cast(after_rank, REAL), after_id)
             )
-        ).order_by(Note.updated_at.desc()).offset(skip).limit(limit)
+        else:
+            search_query = search_query.offset(skip)
         
-        result = await self.db.execute(search_query)
-        return result.scalars().all()
+        result = await self.db.execute(search_query.limit(limit))
+        
+        notes = []
+        for note, note_rank, note_snippet in result.all():
+            note.search_rank = note_rank
+            note.search_snippet = note_snippet
+            notes.append(note)
+        
+        return notes
+    
+    def search_cursor(self, notes: List[Note], limit: int) -> Optional[str]:
+        """Cursor for the page after a full page of search results"""
+        if len(notes) < limit:
+            return None
+        last = notes[-1]
+        return encode_cursor([last.search_rank, str(last.id)])
     
     async def get_by_tags(
         self,
         user_id: str,
         tags: List[str],
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Note]:
         """Get notes that have any of the specified tags"""
         query = select(Note).where(
             and_(
                 Note.user_id == user_id,
                 Note.is_deleted == False,
-                Note.tags.overlap(tags)
+                Note.tags.any(
+                    and_(
+                        Tag.name.in_(tags),
+                        Tag.is_deleted == False
+                    )
+                )
             )
-        ).order_by(Note.updated_at.desc()).offset(skip).limit(limit)
+        )
+        query = paginate(
+            query,
+            Note,
+            order_by="-updated_at",
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
         
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -125,32 +245,167 @@ class NoteRepository(UserOwnedRepository[Note]):
         target_id: UUID
     ) -> bool:
         """Add a link between two notes"""
-        # Verify both notes exist and belong to user
-        source = await self.get_by_user(user_id, source_id)
-        target = await self.get_by_user(user_id, target_id)
+        # Both notes must exist and belong to the user; the pair is empty otherwise
+        source = aliased(Note)
+        target = aliased(Note)
+        pair = select(
+            source.id.label("source_note_id"),
+            target.id.label("target_note_id")
+        ).where(
+            and_(
+                source.id == source_id,
+                source.user_id == user_id,
+                source.is_deleted == False,
+                target.id == target_id,
+                target.user_id == user_id,
+                target.is_deleted == False
+            )
+        ).cte("pair")
         
-        if not source or not target:
-            return False
+        # An existing link counts as success
+        link = pg_insert(note_links).from_select(
+            ["source_note_id", "target_note_id"],
+            select(pair.c.source_note_id, pair.c.target_note_id)
+        ).on_conflict_do_nothing().cte("link")
+        
+        query = select(func.count()).select_from(pair).add_cte(link)
+        result = await self.db.execute(query)
+        linked = result.scalar() > 0
+        
+        if linked:
+            self._after_commit(user_id, ids=[source_id, target_id])
+        return linked
+    
+    async def add_links(
+        self,
+        user_id: str,
+        pairs: List[Tuple[UUID, UUID]]
+    ) -> int:
+        """
+        Add many links in one statement.
+        
+        Pairs whose notes don't both belong to the user are skipped, as are
+        links that already exist. Returns the number of links created.
+        """
+        if not pairs:
+            return 0
         
-        # Check if link already exists
-        existing_query = select(note_links).where(
+        requested = values(
+            column("source_note_id", PG_UUID(as_uuid=True)),
+            column("target_note_id", PG_UUID(as_uuid=True)),
+            name="requested"
+        ).data(list(dict.fromkeys(pairs)))
+        
+        live = select(Note.id).where(
             and_(
-                note_links.c.source_note_id == source_id,
-                note_links.c.target_note_id == target_id
+                Note.user_id == user_id,
+                Note.is_deleted == False
             )
         )
-        existing_result = await self.db.execute(existing_query)
-        if existing_result.scalar_one_or_none():
-            return True  # Link already exists
-        
-        # Create new link
-        insert_stmt = note_links.insert().values(
-            source_note_id=source_id,
-            target_note_id=target_id
+        insert_stmt = pg_insert(note_links).from_select(
+            ["source_note_id", "target_note_id"],
+            select(requested.c.source_note_id, requested.c.target_note_id).where(
+                and_(
+                    requested.c.source_note_id.in_(live),
+                    requested.c.target_note_id.in_(live)
+                )
+            )
+        ).on_conflict_do_nothing().returning(note_links.c.source_note_id)
+        
+        result = await self.db.execute(insert_stmt)
+        created = len(result.all())
+        
+        if created:
+            self._after_commit(user_id)
+        return created
+    
+    async def sync_wiki_links(
+        self,
+        user_id: str,
+        note_id: UUID,
+        content: str
+    ) -> None:
+        """
+        Make the note's wiki links match the [[links]] in its content.
+        
+        Link text is matched against note titles in one query, then the
+        difference is applied with one INSERT and one DELETE. Links added
+        through the API are left alone.
+        """
+        titles = extract_wiki_links(content)
+        targets = []
+        
+        if titles:
+            title_key = _title_key()
+            query = select(Note.id).where(
+                and_(
+                    Note.user_id == user_id,
+                    Note.is_deleted == False,
+                    Note.id != note_id,
+                    title_key.in_(titles)
+                )
+            ).distinct(title_key).order_by(title_key, Note.created_at)
+            result = await self.db.execute(query)
+            targets = result.scalars().all()
+        
+        if targets:
+            await self.db.execute(
+                pg_insert(note_links).values([
+                    {"source_note_id": note_id, "target_note_id": target_id, "origin": "wiki"}
+                    for target_id in targets
+                ]).on_conflict_do_nothing()
+            )
+        
+        # Wiki links whose [[link]] is gone from the content
+        stale = and_(
+            note_links.c.source_note_id == note_id,
+            note_links.c.origin == "wiki"
         )
-        await self.db.execute(insert_stmt)
-        await self.db.commit()
-        return True
+        if targets:
+            stale = and_(stale, note_links.c.target_note_id.not_in(targets))
+        await self.db.execute(note_links.delete().where(stale))
+        
+        await self.db.flush()
+    
+    async def add_wiki_links(
+        self,
+        user_id: str,
+        titles: Dict[UUID, List[str]]
+    ) -> None:
+        """
+        Add the wiki links of many notes that have none yet, such as new ones.
+        
+        ``titles`` maps note IDs to their normalized link titles, as
+        extract_wiki_links returns them. All titles are matched in one query
+        and the links added with one INSERT. A note's link to its own title
+        is dropped.
+        """
+        wanted = list(dict.fromkeys(
+            title for note_titles in titles.values() for title in note_titles
+        ))
+        if not wanted:
+            return
+        
+        title_key = _title_key()
+        query = select(title_key, Note.id).where(
+            and_(
+                Note.user_id == user_id,
+                Note.is_deleted == False,
+                title_key.in_(wanted)
+            )
+        ).distinct(title_key).order_by(title_key, Note.created_at)
+        result = await self.db.execute(query)
+        targets = dict(result.all())
+        
+        rows = [
+            {"source_note_id": note_id, "target_note_id": targets[title], "origin": "wiki"}
+            for note_id, note_titles in titles.items()
+            for title in note_titles
+            if title in targets and targets[title] != note_id
+        ]
+        if rows:
+            await self.db.execute(pg_insert(note_links).on_conflict_do_nothing(), rows)
+            await self.db.flush()
     
     async def remove_link(
         self,
@@ -172,8 +427,8 @@ class NoteRepository(UserOwnedRepository[Note]):
             )
         )
         result = await self.db.execute(delete_stmt)
-        await self.db.commit()
         
+        self._after_commit(user_id, ids=[source_id, target_id])
         return result.rowcount > 0
     
     async def toggle_favorite(
@@ -187,8 +442,8 @@ class NoteRepository(UserOwnedRepository[Note]):
             return None
         
         note.is_favorite = not note.is_favorite
-        await self.db.commit()
-        await self.db.refresh(note)
+        await self.db.flush()
+        self._changed(user_id, [note_id])
         return note
     
     async def get_folder_structure(
@@ -219,81 +474,590 @@ class NoteRepository(UserOwnedRepository[Note]):
         return folders
     
     async def get_all_tags(
+        self,
+        user_id: str,
+        prefix: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get tags with their usage count, optionally only names starting with ``prefix``"""
+        counts = await tag_counts.get(user_id)
+        if counts is None:
+            started_at = time.time()
+            counts = await self.count_tags(user_id)
+            await tag_counts.set(user_id, counts, started_at)
+        
+        if prefix:
+            prefix = prefix.lower()
+            counts = {
+                name: count
+                for name, count in counts.items()
+                if name.lower().startswith(prefix)
+            }
+        
+        # Most used first, then alphabetically
+        tags = [
+            {"tag": name, "count": count}
+            for name, count in sorted(counts.items(), key=lambda x: (-x[1], x[0]))
+        ]
+        return tags[:limit] if limit is not None else tags
+    
+    async def count_tags(
         self,
         user_id: str
-    ) -> List[Dict[str, int]]:
-        """Get all unique tags with their usage count"""
-        query = select(Note).where(
+    ) -> Dict[str, int]:
+        """Count live notes per tag name"""
+        query = select(
+            Tag.name,
+            func.count(distinct(note_tags.c.note_id))
+        ).select_from(Tag).join(
+            note_tags, note_tags.c.tag_id == Tag.id
+        ).join(
+            Note, Note.id == note_tags.c.note_id
+        ).where(
             and_(
+                Tag.user_id == user_id,
+                Tag.is_deleted == False,
                 Note.user_id == user_id,
-                Note.is_deleted == False,
-                Note.tags != None
+                Note.is_deleted == False
             )
-        )
+        ).group_by(Tag.name)
         
         result = await self.db.execute(query)
-        notes = result.scalars().all()
+        return {name: count for name, count in result.all()}
+    
+    async def set_tags(
+        self,
+        user_id: str,
+        note_id: UUID,
+        names: List[str]
+    ) -> Dict[str, int]:
+        """
+        Replace a note's tags by name, creating tags that don't exist yet.
         
-        # Count tag occurrences
-        tag_counts: Dict[str, int] = {}
-        for note in notes:
-            for tag in note.tags or []:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        
-        # Convert to list of dicts sorted by count
-        return [
-            {"tag": tag, "count": count}
-            for tag, count in sorted(
-                tag_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
+        Returns the change in usage count per tag name; any change drops
+        the user's cached tag counts once the transaction commits.
+        """
+        wanted = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+        
+        current_query = select(Tag.id, Tag.name).join(
+            note_tags, note_tags.c.tag_id == Tag.id
+        ).where(note_tags.c.note_id == note_id)
+        current_result = await self.db.execute(current_query)
+        current = {name: tag_id for tag_id, name in current_result.all()}
+        
+        removed = [name for name in current if name not in wanted]
+        added = [name for name in wanted if name not in current]
+        
+        if removed:
+            await self.db.execute(
+                note_tags.delete().where(
+                    and_(
+                        note_tags.c.note_id == note_id,
+                        note_tags.c.tag_id.in_([current[name] for name in removed])
+                    )
+                )
             )
-        ]
+        
+        if added:
+            tag_ids = await self._resolve_tags(user_id, added)
+            await self.db.execute(
+                note_tags.insert(),
+                [{"note_id": note_id, "tag_id": tag_ids[name]} for name in added]
+            )
+        
+        await self.db.flush()
+        
+        deltas = {name: -1 for name in removed}
+        deltas.update({name: 1 for name in added})
+        return deltas
     
-    async def get_stats(
+    async def add_tags_many(
         self,
-        user_id: str
-    ) -> Dict[str, Any]:
-        """Get note statistics for a user"""
-        # Total notes
-        total_query = select(func.count(Note.id)).where(
+        user_id: str,
+        names: Dict[UUID, List[str]]
+    ) -> Dict[str, int]:
+        """
+        Tag many untagged notes by name, with one tag lookup and one INSERT.
+        
+        Returns usage count deltas, as set_tags does.
+        """
+        wanted = {
+            note_id: list(dict.fromkeys(name.strip() for name in note_names if name.strip()))
+            for note_id, note_names in names.items()
+        }
+        deltas: Dict[str, int] = {}
+        for note_names in wanted.values():
+            for name in note_names:
+                deltas[name] = deltas.get(name, 0) + 1
+        if not deltas:
+            return {}
+        
+        tag_ids = await self._resolve_tags(user_id, list(deltas))
+        await self.db.execute(
+            note_tags.insert(),
+            [
+                {"note_id": note_id, "tag_id": tag_ids[name]}
+                for note_id, note_names in wanted.items()
+                for name in note_names
+            ]
+        )
+        await self.db.flush()
+        return deltas
+    
+    async def _resolve_tags(
+        self,
+        user_id: str,
+        names: List[str]
+    ) -> Dict[str, UUID]:
+        """Map tag names to IDs, creating any missing tags"""
+        query = select(Tag.name, Tag.id).where(
             and_(
-                Note.user_id == user_id,
-                Note.is_deleted == False
+                Tag.user_id == user_id,
+                Tag.is_deleted == False,
+                Tag.name.in_(names)
             )
         )
-        total_result = await self.db.execute(total_query)
-        total = total_result.scalar() or 0
+        result = await self.db.execute(query)
+        tag_ids = dict(result.all())
         
-        # Favorite notes
-        favorites_query = select(func.count(Note.id)).where(
-            and_(
-                Note.user_id == user_id,
-                Note.is_deleted == False,
-                Note.is_favorite == True
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            insert_result = await self.db.execute(
+                insert(Tag).returning(Tag.name, Tag.id),
+                [{"user_id": user_id, "name": name} for name in missing]
             )
+            tag_ids.update(dict(insert_result.all()))
+        
+        return tag_ids
+    
+    def _after_commit(
+        self,
+        user_id: str,
+        deltas: Optional[Dict[str, int]] = None,
+        graph: bool = True,
+        ids: Iterable[Any] = ()
+    ) -> None:
+        """
+        Drop the tag counts if ``deltas`` changed any, the link graph and
+        cached aggregates, and publish a change event for ``ids`` once the
+        unit of work commits.
+        """
+        self._changed(user_id, ids)
+        if deltas and any(deltas.values()):
+            on_commit(self.db, lambda: tag_counts.invalidate(user_id), key=("tag_counts", user_id))
+        if graph:
+            on_commit(self.db, lambda: invalidate_graph(user_id))
+    
+    async def create_for_user(
+        self,
+        user_id: str,
+        obj_in: Dict[str, Any]
+    ) -> Note:
+        """Create a note, attaching its tags and [[wiki links]]"""
+        names = obj_in.pop("tags", None) or []
+        obj_in["user_id"] = user_id
+        
+        note = Note(**obj_in)
+        self.db.add(note)
+        await self.db.flush()
+        
+        deltas = await self.set_tags(user_id, note.id, names) if names else {}
+        await self.sync_wiki_links(user_id, note.id, note.content)
+        await NoteVersionRepository(self.db).create_version(note, user_id, "Created")
+        
+        self._after_commit(user_id, deltas, ids=[note.id])
+        return note
+    
+    async def _apply_update(
+        self,
+        user_id: str,
+        note: Note,
+        obj_in: Dict[str, Any],
+        change_summary: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Apply changes to a loaded note. Returns tag count deltas for the
+        tag cache.
+        """
+        names = obj_in.pop("tags", None)
+        deltas = await self.set_tags(user_id, note.id, names) if names is not None else {}
+        if deltas:
+            # Tags live in another table; touch the note so its version changes
+            note.updated_at = datetime.utcnow()
+        if obj_in.get("content") is not None:
+            await self.sync_wiki_links(user_id, note.id, obj_in["content"])
+        
+        versioned = any(
+            field in obj_in and obj_in[field] != getattr(note, field)
+            for field in ("title", "content")
+        )
+        
+        for field, value in obj_in.items():
+            if hasattr(note, field):
+                setattr(note, field, value)
+        
+        if versioned:
+            note.revision += 1
+            await NoteVersionRepository(self.db).create_version(note, user_id, change_summary)
+        
+        return deltas
+    
+    async def update_for_user(
+        self,
+        user_id: str,
+        id: UUID,
+        obj_in: Dict[str, Any],
+        change_summary: Optional[str] = None
+    ) -> Optional[Note]:
+        """
+        Update a note, replacing its tags when ``tags`` is given and its
+        wiki links when ``content`` is given. Title and content changes
+        bump the note's revision and are recorded as a new version.
+        """
+        note = await self.get_by_user(user_id, id)
+        if not note:
+            return None
+        
+        deltas = await self._apply_update(user_id, note, obj_in, change_summary)
+        await self.db.flush()
+        
+        self._after_commit(user_id, deltas, graph="content" in obj_in, ids=[note.id])
+        return note
+    
+    async def create_many_for_user(
+        self,
+        user_id: str,
+        items: List[Dict[str, Any]],
+        wiki_links: bool = True
+    ) -> List[Note]:
+        """
+        Create many notes with one INSERT, then add their tags, wiki links
+        and first versions with one statement each.
+        
+        With ``wiki_links`` false, [[links]] are left for the caller to add
+        through add_wiki_links, e.g. once the notes they name exist too.
+        """
+        names = [item.pop("tags", None) or [] for item in items]
+        notes = await super().create_many_for_user(user_id, items)
+        
+        deltas = await self.add_tags_many(
+            user_id,
+            {note.id: note_names for note, note_names in zip(notes, names) if note_names}
         )
-        favorites_result = await self.db.execute(favorites_query)
-        favorites = favorites_result.scalar() or 0
+        if wiki_links:
+            await self.add_wiki_links(
+                user_id,
+                {note.id: extract_wiki_links(note.content) for note in notes}
+            )
+        await NoteVersionRepository(self.db).create_first_versions(notes, user_id, "Created")
+        
+        self._after_commit(user_id, deltas)
+        return notes
+    
+    async def update_many_for_user(
+        self,
+        user_id: str,
+        updates: Dict[UUID, Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Update many notes in one transaction; returns the IDs found.
+        
+        Notes are loaded with one query and changed through the same path as
+        update_for_user, so tags, wiki links and versions stay consistent.
+        """
+        result = await self.db.execute(
+            select(Note).where(
+                and_(
+                    Note.id.in_(list(updates)),
+                    Note.user_id == user_id,
+                    Note.is_deleted == False
+                )
+            )
+        )
+        notes = result.scalars().all()
+        
+        deltas: Dict[str, int] = {}
+        for note in notes:
+            for name, delta in (await self._apply_update(user_id, note, updates[note.id])).items():
+                deltas[name] = deltas.get(name, 0) + delta
+        await self.db.flush()
+        
+        ids = [note.id for note in notes]
+        self._after_commit(user_id, deltas, ids=ids)
+        return ids
+    
+    async def delete_many_for_user(
+        self,
+        user_id: str,
+        ids: List[UUID]
+    ) -> List[UUID]:
+        """Soft delete many notes; their tags stop counting towards usage"""
+        deleted = await super().delete_many_for_user(user_id, ids)
         
-        # Total links
-        links_query = select(func.count(note_links.c.source_note_id)).where(
-            note_links.c.source_note_id.in_(
+        deltas: Dict[str, int] = {}
+        if deleted:
+            tags_query = select(Tag.name, func.count()).join(
+                note_tags, note_tags.c.tag_id == Tag.id
+            ).where(note_tags.c.note_id.in_(deleted)).group_by(Tag.name)
+            tags_result = await self.db.execute(tags_query)
+            deltas = {name: -count for name, count in tags_result.all()}
+        
+        self._after_commit(user_id, deltas, graph=bool(deleted))
+        return deleted
+    
+    async def delete_for_user(
+        self,
+        user_id: str,
+        id: UUID
+    ) -> bool:
+        """Soft delete a note; its tags stop counting towards usage"""
+        tags_query = select(Tag.name).join(
+            note_tags, note_tags.c.tag_id == Tag.id
+        ).where(note_tags.c.note_id == id)
+        tags_result = await self.db.execute(tags_query)
+        names = tags_result.scalars().all()
+        
+        deleted = await super().delete_for_user(user_id, id)
+        if deleted:
+            self._after_commit(user_id, {name: -1 for name in names})
+        return deleted
+    
+    async def get_stats(
+        self,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """Get note statistics for a user in a single query"""
+        user_notes = and_(
+            Note.user_id == user_id,
+            Note.is_deleted == False
+        )
+        
+        # Links and tags are counted from the association tables
+        links = select(func.count()).select_from(
+            note_links.join(Note, Note.id == note_links.c.source_note_id)
+        ).where(user_notes).scalar_subquery()
+        tags = select(func.count(distinct(note_tags.c.tag_id))).select_from(
+            note_tags.join(Note, Note.id == note_tags.c.note_id)
+        ).where(user_notes).scalar_subquery()
+        
+        query = select(
+            func.count(Note.id),
+            links,
+            tags
+        ).where(user_notes)
+        
+        result = await self.db.execute(query)
+        total, total_links, tag_count = result.one()
+        
+        return {
+            "total": total,
+            "total_links": total_links,
+            "tags": tag_count
+        }
+
+
+class NoteVersionRepository:
+    """
+    Repository for note version history.
+    
+    Every NOTE_VERSION_SNAPSHOT_INTERVAL-th version stores the full content;
+    the versions in between store a line delta from the previous version.
+    Rebuilding any version therefore reads at most one snapshot plus
+    NOTE_VERSION_SNAPSHOT_INTERVAL - 1 deltas, in a single query.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def _owned(self, user_id: str, note_id: UUID):
+        """Versions of a live note owned by the user"""
+        return and_(
+            NoteVersion.note_id == note_id,
+            NoteVersion.is_deleted == False,
+            NoteVersion.note_id.in_(
                 select(Note.id).where(
                     and_(
+                        Note.id == note_id,
                         Note.user_id == user_id,
                         Note.is_deleted == False
                     )
                 )
             )
         )
-        links_result = await self.db.execute(links_query)
-        total_links = links_result.scalar() or 0
+    
+    async def _get_chain(
+        self,
+        condition,
+        version_number: Optional[int] = None
+    ) -> List[NoteVersion]:
+        """Versions from the nearest snapshot up to ``version_number`` (latest when None)"""
+        upto = [NoteVersion.version_number <= version_number] if version_number is not None else []
         
+        snapshot = select(func.max(NoteVersion.version_number)).where(
+            and_(condition, NoteVersion.is_snapshot == True, *upto)
+        ).scalar_subquery()
+        query = select(NoteVersion).where(
+            and_(condition, NoteVersion.version_number >= snapshot, *upto)
+        ).order_by(NoteVersion.version_number)
+        
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    @staticmethod
+    def _rebuild(chain: List[NoteVersion]) -> str:
+        """Content of the last version in a chain"""
+        content = chain[0].content or ""
+        for version in chain[1:]:
+            content = apply_delta(content, version.delta)
+        return content
+    
+    async def create_version(
+        self,
+        note: Note,
+        user_id: str,
+        change_summary: Optional[str] = None
+    ) -> NoteVersion:
+        """Record the note's current title and content as a new version"""
+        # Serializes writers of the note's versions, so two can't take the
+        # same version number
+        await self.db.execute(
+            select(Note.id).where(Note.id == note.id).with_for_update()
+        )
+        chain = await self._get_chain(
+            and_(
+                NoteVersion.note_id == note.id,
+                NoteVersion.is_deleted == False
+            )
+        )
+        content = note.content or ""
+        
+        if chain:
+            previous = self._rebuild(chain)
+            if previous == content and chain[-1].title == note.title:
+                return chain[-1]
+            version_number = chain[-1].version_number + 1
+            is_snapshot = len(chain) >= settings.NOTE_VERSION_SNAPSHOT_INTERVAL
+        else:
+            previous = ""
+            version_number = 1
+            is_snapshot = True
+        
+        version = NoteVersion(
+            note_id=note.id,
+            user_id=user_id,
+            title=note.title,
+            change_summary=change_summary,
+            version_number=version_number,
+            is_snapshot=is_snapshot,
+            content=content if is_snapshot else None,
+            delta=None if is_snapshot else make_delta(previous, content)
+        )
+        self.db.add(version)
+        await self.db.flush()
+        return version
+    
+    async def create_first_versions(
+        self,
+        notes: List[Note],
+        user_id: str,
+        change_summary: Optional[str] = None
+    ) -> None:
+        """Record the first version of many new notes with one INSERT"""
+        if not notes:
+            return
+        
+        await self.db.execute(
+            insert(NoteVersion),
+            [
+                {
+                    "note_id": note.id,
+                    "user_id": user_id,
+                    "title": note.title,
+                    "change_summary": change_summary,
+                    "version_number": 1,
+                    "is_snapshot": True,
+                    "content": note.content or ""
+                }
+                for note in notes
+            ]
+        )
+        await self.db.flush()
+    
+    async def get_versions(
+        self,
+        user_id: str,
+        note_id: UUID
+    ) -> List[Any]:
+        """List a note's versions, newest first, without their content"""
+        query = select(
+            NoteVersion.id,
+            NoteVersion.version_number,
+            NoteVersion.title,
+            NoteVersion.change_summary,
+            NoteVersion.user_id,
+            NoteVersion.created_at
+        ).where(self._owned(user_id, note_id)).order_by(NoteVersion.version_number.desc())
+        
+        result = await self.db.execute(query)
+        return result.all()
+    
+    async def get_version(
+        self,
+        user_id: str,
+        note_id: UUID,
+        version_number: int
+    ) -> Optional[Dict[str, Any]]:
+        """Rebuild a specific version of a note"""
+        chain = await self._get_chain(self._owned(user_id, note_id), version_number)
+        if not chain or chain[-1].version_number != version_number:
+            return None
+        
+        version = chain[-1]
         return {
-            "total": total,
-            "favorites": favorites,
-            "total_links": total_links,
-            "folders": len(await self.get_folder_structure(user_id)),
-            "tags": len(await self.get_all_tags(user_id))
-        }
\ No newline at end of file
+            "id": version.id,
+            "version_number": version.version_number,
+            "title": version.title,
+            "change_summary": version.change_summary,
+            "user_id": version.user_id,
+            "created_at": version.created_at,
+            "content": self._rebuild(chain)
+        }
+    
+    async def diff_versions(
+        self,
+        user_id: str,
+        note_id: UUID,
+        from_version: int,
+        to_version: int
+    ) -> Optional[str]:
+        """Unified diff between two versions of a note"""
+        old = await self.get_version(user_id, note_id, from_version)
+        new = await self.get_version(user_id, note_id, to_version)
+        if old is None or new is None:
+            return None
+        
+        return unified_diff(
+            old["content"],
+            new["content"],
+            f"version {from_version}",
+            f"version {to_version}"
+        )
+    
+    async def restore_version(
+        self,
+        user_id: str,
+        note_id: UUID,
+        version_number: int
+    ) -> Optional[Note]:
+        """Make a past version current again, recorded as a new version"""
+        version = await self.get_version(user_id, note_id, version_number)
+        if version is None:
+            return None
+        
+        note_repo = NoteRepository(Note, self.db)
+        return await note_repo.update_for_user(
+            user_id,
+            note_id,
+            {"title": version["title"], "content": version["content"]},
+            change_summary=f"Restored version {version_number}"
+        )
\ No newline at end of file
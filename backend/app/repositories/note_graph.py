@@ -0,0 +1,203 @@
+from typing import Optional, List, Dict, Any
+from uuid import UUID
+from sqlalchemy import select, and_, func, literal, union_all, Integer
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.models.note import Note, note_links
+from app.services.note_graph import LinkGraph
+
+
+# Per-process link graphs by user ID. Link writes in this process drop the
+# entry; the short TTL bounds staleness from writes in other workers.
+_graphs: TTLCache[LinkGraph] = TTLCache(maxsize=256, ttl=60)
+
+
+def invalidate_graph(user_id: str) -> None:
+    """Drop a user's cached link graph after their links or notes changed"""
+    _graphs.pop(user_id)
+
+
+class NoteGraphRepository:
+    """Repository for traversing the note link graph"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def _live_notes(self, user_id: str):
+        return select(Note.id).where(
+            and_(
+                Note.user_id == user_id,
+                Note.is_deleted == False
+            )
+        )
+    
+    def _live_links(self, user_id: str):
+        """Links whose ends are both live notes of the user"""
+        live = self._live_notes(user_id)
+        return and_(
+            note_links.c.source_note_id.in_(live),
+            note_links.c.target_note_id.in_(live)
+        )
+    
+    async def get_link_graph(self, user_id: str) -> LinkGraph:
+        """Get the user's whole link graph, from cache when possible"""
+        graph = _graphs.get(user_id)
+        if graph is not None:
+            return graph
+        
+        ids_result = await self.db.execute(
+            self._live_notes(user_id).order_by(Note.id)
+        )
+        links_result = await self.db.execute(
+            select(note_links.c.source_note_id, note_links.c.target_note_id).where(
+                self._live_links(user_id)
+            )
+        )
+        
+        graph = LinkGraph(ids_result.scalars().all(), links_result.all())
+        _graphs.set(user_id, graph)
+        return graph
+    
+    async def get_graph(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get every note and link for the graph view. Links come from the
+        cached link graph; titles aren't cached, so notes are read for them.
+        """
+        graph = await self.get_link_graph(user_id)
+        nodes_result = await self.db.execute(
+            select(Note.id, Note.title).where(
+                and_(
+                    Note.user_id == user_id,
+                    Note.is_deleted == False
+                )
+            )
+        )
+        titles = dict(nodes_result.all())
+        
+        return {
+            "nodes": [{"id": id, "title": title} for id, title in titles.items()],
+            "edges": [
+                {"source": source, "target": target}
+                for source, target in graph.links()
+                # The cached graph may still hold a note deleted since
+                if source in titles and target in titles
+            ]
+        }
+    
+    async def get_neighborhood(
+        self,
+        user_id: str,
+        note_id: UUID,
+        depth: int = 1,
+        limit: int = 500
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get notes within ``depth`` links of a note, ignoring link direction.
+        
+        Walks the links with a recursive CTE. UNION discards repeated
+        (note, depth) pairs, so the walk is bounded by notes × depth even on
+        cyclic graphs.
+        """
+        live_links = self._live_links(user_id)
+        edges = union_all(
+            select(
+                note_links.c.source_note_id.label("a"),
+                note_links.c.target_note_id.label("b")
+            ).where(live_links),
+            select(
+                note_links.c.target_note_id,
+                note_links.c.source_note_id
+            ).where(live_links)
+        ).cte("edges")
+        
+        walk = select(
+            literal(note_id, PG_UUID(as_uuid=True)).label("note_id"),
+            literal(0, Integer).label("depth")
+        ).cte("walk", recursive=True)
+        walk = walk.union(
+            select(edges.c.b, walk.c.depth + 1).join(
+                edges, edges.c.a == walk.c.note_id
+            ).where(walk.c.depth < depth)
+        )
+        
+        reached = select(
+            walk.c.note_id,
+            func.min(walk.c.depth).label("depth")
+        ).group_by(walk.c.note_id).subquery()
+        
+        query = select(Note.id, Note.title, reached.c.depth).join(
+            reached, reached.c.note_id == Note.id
+        ).where(
+            and_(
+                Note.user_id == user_id,
+                Note.is_deleted == False
+            )
+        ).order_by(reached.c.depth, Note.title).limit(limit)
+        
+        result = await self.db.execute(query)
+        nodes = [
+            {"id": id, "title": title, "depth": hops}
+            for id, title, hops in result.all()
+        ]
+        if not nodes or nodes[0]["id"] != note_id:
+            return None
+        
+        node_ids = [node["id"] for node in nodes]
+        edges_result = await self.db.execute(
+            select(note_links.c.source_note_id, note_links.c.target_note_id).where(
+                and_(
+                    note_links.c.source_note_id.in_(node_ids),
+                    note_links.c.target_note_id.in_(node_ids)
+                )
+            )
+        )
+        
+        return {
+            "nodes": nodes,
+            "edges": [
+                {"source": source, "target": target}
+                for source, target in edges_result.all()
+            ]
+        }
+    
+    async def get_shortest_path(
+        self,
+        user_id: str,
+        source_id: UUID,
+        target_id: UUID,
+        max_depth: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get the notes along the shortest link path between two notes"""
+        graph = await self.get_link_graph(user_id)
+        path = graph.shortest_path(source_id, target_id, max_depth=max_depth)
+        if path is None:
+            return None
+        
+        titles = await self._get_titles(path)
+        return [{"id": id, "title": titles.get(id, "")} for id in path]
+    
+    async def get_components(
+        self,
+        user_id: str,
+        min_size: int = 2
+    ) -> List[List[UUID]]:
+        """Get groups of notes connected by links, largest first"""
+        graph = await self.get_link_graph(user_id)
+        return graph.components(min_size=min_size)
+    
+    async def get_orphans(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get notes without any links"""
+        graph = await self.get_link_graph(user_id)
+        orphans = graph.orphans()
+        titles = await self._get_titles(orphans)
+        return [{"id": id, "title": titles.get(id, "")} for id in orphans]
+    
+    async def _get_titles(self, note_ids: List[UUID]) -> Dict[UUID, str]:
+        if not note_ids:
+            return {}
+        result = await self.db.execute(
+            select(Note.id, Note.title).where(Note.id.in_(note_ids))
+        )
+        return dict(result.all())
@@ -0,0 +1,168 @@
+"""
+Change feed for offline-first clients.
+
+A sync walks the user's rows of each type in SYNC_MODELS order by
+(updated_at, id), up to a watermark fixed when the sync started. Its last
+page hands back a token to start the next sync from. Soft deletes bump
+updated_at too, so deletions come through as tombstones.
+
+updated_at is set to the writing transaction's start time, which can be
+earlier than when its rows become visible. The next sync therefore starts
+SYNC_SAFETY_WINDOW_SECONDS before the watermark, so rows committed late
+are picked up then; clients see those rows twice and must apply changes
+idempotently.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, and_, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.habit import Habit, HabitLog
+from app.models.note import Note
+from app.models.task import Task, Project
+
+
+# Row types in the order a sync walks them, parents before children
+SYNC_MODELS: Dict[str, Any] = {
+    "projects": Project,
+    "tasks": Task,
+    "notes": Note,
+    "habits": Habit,
+    "habit_logs": HabitLog,
+}
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid sync token"
+    )
+
+
+class SyncState:
+    """Position within a sync, carried between pages in the token"""
+    
+    def __init__(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        type: Optional[str] = None,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ):
+        self.since = since
+        self.until = until
+        self.type = type
+        self.after = after
+    
+    @classmethod
+    def decode(cls, token: Optional[str]) -> "SyncState":
+        if not token:
+            return cls()
+        
+        data = decode_cursor(token)
+        try:
+            state = cls(
+                since=datetime.fromisoformat(data["since"]) if data.get("since") else None,
+                until=datetime.fromisoformat(data["until"]) if data.get("until") else None,
+                type=data.get("type"),
+                after=(
+                    (datetime.fromisoformat(data["after"][0]), UUID(data["after"][1]))
+                    if data.get("after") else None
+                )
+            )
+        except (TypeError, ValueError, KeyError, IndexError, AttributeError):
+            raise _invalid_token()
+        
+        if state.type is not None and (state.type not in SYNC_MODELS or state.until is None):
+            raise _invalid_token()
+        return state
+    
+    def encode(self) -> str:
+        return encode_cursor({
+            "since": self.since.isoformat() if self.since else None,
+            "until": self.until.isoformat() if self.until else None,
+            "type": self.type,
+            "after": [self.after[0].isoformat(), str(self.after[1])] if self.after else None,
+        })
+
+
+class SyncRepository:
+    """Repository for the per-user change feed"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def _changes_query(self, user_id: str, type: str, state: SyncState, limit: int):
+        model = SYNC_MODELS[type]
+        conditions = [
+            model.user_id == user_id,
+            model.updated_at <= state.until
+        ]
+        if state.since is not None:
+            conditions.append(model.updated_at > state.since)
+        else:
+            # A first sync only needs what exists now, not tombstones
+            conditions.append(model.is_deleted == False)
+        if state.type == type and state.after is not None:
+            conditions.append(tuple_(model.updated_at, model.id) > tuple_(*state.after))
+        
+        query = select(model).where(and_(*conditions)).order_by(
+            model.updated_at,
+            model.id
+        ).limit(limit)
+        if model is Note:
+            query = query.options(selectinload(Note.tags))
+        return query
+    
+    async def get_changes(
+        self,
+        user_id: str,
+        token: Optional[str] = None,
+        limit: int = 500
+    ) -> Tuple[List[Tuple[str, Any]], str, bool]:
+        """
+        Get one page of changes after ``token``, or of everything without one.
+        
+        Returns (type, row) pairs, the token for the next page and whether
+        this sync has more pages. Once it doesn't, the token starts the
+        next sync.
+        """
+        state = SyncState.decode(token)
+        if state.type is None:
+            # Starting a sync: fix its upper bound for every page
+            state.until = await self.db.scalar(select(func.now()))
+            state.type = next(iter(SYNC_MODELS))
+            state.after = None
+        
+        types = list(SYNC_MODELS)
+        changes: List[Tuple[str, Any]] = []
+        
+        for type in types[types.index(state.type):]:
+            room = limit - len(changes)
+            # One extra row tells whether this type has more
+            result = await self.db.execute(self._changes_query(user_id, type, state, room + 1))
+            rows = result.scalars().all()
+            
+            changes.extend((type, row) for row in rows[:room])
+            if len(rows) > room:
+                # A full page can end exactly where a type does, leaving no
+                # room for the next one
+                last = rows[room - 1] if room else None
+                next_state = SyncState(
+                    since=state.since,
+                    until=state.until,
+                    type=type,
+                    after=(last.updated_at, last.id) if last else None
+                )
+                return changes, next_state.encode(), True
+        
+        next_sync = SyncState(
+            since=state.until - timedelta(seconds=settings.SYNC_SAFETY_WINDOW_SECONDS)
+        )
+        return changes, next_sync.encode(), False
@@ -1,16 +1,39 @@
-from typing import Optional, List, Dict, Any
+import logging
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
-from datetime import datetime
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
+from datetime import datetime, timezone
+from sqlalchemy import select, and_, or_, func, case, true, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import selectinload, aliased
 
+from app.core.config import settings
 from app.models.task import Task, Project, TaskStatus, TaskPriority
-from app.repositories.base import UserOwnedRepository
+from app.repositories.base import UserOwnedRepository, paginate, version_digest
+from app.services.recurrence import as_utc, occurrences, window_end
+
+
+logger = logging.getLogger(__name__)
+
+# Fields occurrences of a recurring task copy from the first task of the series
+SERIES_FIELDS = (
+    "title",
+    "description",
+    "priority",
+    "project_id",
+    "assignee_id",
+    "tags",
+    "meta_data",
+    "recurrence_rule",
+)
 
 
 class TaskRepository(UserOwnedRepository[Task]):
     """Repository for task operations"""
     
+    aggregate_scope = "tasks"
+    
     async def get_multi_by_user(
         self,
         user_id: str,
@@ -19,6 +42,7 @@ class TaskRepository(UserOwnedRepository[Task]):
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None,
         order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[Task]:
         """Get multiple tasks for a user with relations loaded"""
         query = select(Task).where(
@@ -37,17 +61,15 @@ class TaskRepository(UserOwnedRepository[Task]):
                 if hasattr(Task, key) and value is not None:
                     query = query.where(getattr(Task, key) == value)
         
-        # Apply ordering
-        if order_by:
-            if order_by.startswith("-"):
-                query = query.order_by(getattr(Task, order_by[1:]).desc())
-            else:
-                query = query.order_by(getattr(Task, order_by))
-        else:
-            query = query.order_by(Task.created_at.desc())
-        
-        # Apply pagination
-        query = query.offset(skip).limit(limit)
+        # Apply ordering and pagination
+        query = paginate(
+            query,
+            Task,
+            order_by=order_by,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
         
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -73,28 +95,119 @@ class TaskRepository(UserOwnedRepository[Task]):
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    @staticmethod
+    def _overdue(task: Any):
+        """SQL counterpart of Task.is_overdue"""
+        return and_(
+            task.due_date < func.now(),
+            task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED])
+        )
+    
+    @staticmethod
+    def _modified_at(task: Any):
+        """
+        When a task's representation last changed: its updated_at, or its due
+        date once that has passed and is_overdue may have flipped
+        """
+        return func.greatest(
+            task.updated_at,
+            case((task.due_date <= func.now(), task.due_date))
+        )
+    
+    async def get_collection_version(self, user_id: str) -> Tuple[Any, ...]:
+        """
+        Version of the user's tasks, for conditional list requests.
+        
+        Also counts overdue tasks, since is_overdue flips as time passes
+        without the row changing, and covers the projects embedded in tasks.
+        """
+        tasks = select(
+            func.count(Task.id).label("tasks"),
+            func.max(Task.updated_at).label("tasks_updated_at"),
+            func.count(Task.id).filter(
+                and_(Task.is_deleted == False, self._overdue(Task))
+            ).label("overdue")
+        ).where(Task.user_id == user_id).subquery()
+        projects = select(
+            func.count(Project.id).label("projects"),
+            func.max(Project.updated_at).label("projects_updated_at")
+        ).where(Project.user_id == user_id).subquery()
+        
+        result = await self.db.execute(select(tasks, projects))
+        return tuple(result.one())
+    
+    async def get_version(
+        self,
+        user_id: str,
+        task_id: UUID
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Version of a task as returned with its relations, without loading them.
+        
+        Returns None if the task doesn't exist. The last element is when that
+        representation last changed, including subtasks, the project and the
+        due dates that have since passed.
+        """
+        subtask = aliased(Task)
+        subtasks = select(
+            version_digest(
+                subtask.id,
+                subtask.updated_at,
+                self._overdue(subtask)
+            ).label("digest"),
+            func.max(self._modified_at(subtask)).label("modified_at")
+        ).where(subtask.parent_task_id == Task.id).lateral("subtasks")
+        
+        query = select(
+            Task.updated_at,
+            self._overdue(Task),
+            Project.updated_at,
+            subtasks.c.digest,
+            func.greatest(
+                self._modified_at(Task),
+                Project.updated_at,
+                subtasks.c.modified_at
+            )
+        ).outerjoin(
+            Project, Project.id == Task.project_id
+        ).join(
+            subtasks, true()
+        ).where(
+            and_(
+                Task.id == task_id,
+                Task.user_id == user_id,
+                Task.is_deleted == False
+            )
+        )
+        
+        result = await self.db.execute(query)
+        return result.one_or_none()
+    
     async def get_by_status(
         self,
         user_id: str,
         status: TaskStatus,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Task]:
         """Get tasks by status"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"status": status}
+            filters={"status": status},
+            cursor=cursor
         )
     
     async def get_overdue(
         self,
         user_id: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Task]:
-        """Get overdue tasks"""
+        """Get overdue tasks, oldest due date first"""
         query = select(Task).where(
             and_(
                 Task.user_id == user_id,
@@ -102,7 +215,18 @@ class TaskRepository(UserOwnedRepository[Task]):
                 Task.due_date < datetime.utcnow(),
                 Task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED])
             )
-        ).order_by(Task.due_date).offset(skip).limit(limit)
+        ).options(
+            selectinload(Task.subtasks),
+            selectinload(Task.project)
+        )
+        query = paginate(
+            query,
+            Task,
+            order_by="due_date",
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
         
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -112,14 +236,16 @@ class TaskRepository(UserOwnedRepository[Task]):
         user_id: str,
         project_id: UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Task]:
         """Get tasks by project"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"project_id": project_id}
+            filters={"project_id": project_id},
+            cursor=cursor
         )
     
     async def search(
@@ -127,19 +253,26 @@ class TaskRepository(UserOwnedRepository[Task]):
         user_id: str,
         query: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        min_similarity: Optional[float] = None
     ) -> List[Task]:
-        """Search tasks by title or description"""
+        """Fuzzy search tasks by title or description, best matches first"""
+        condition, score = await self.trigram_search(
+            query,
+            [Task.title, Task.description],
+            min_similarity
+        )
+        
         search_query = select(Task).where(
             and_(
                 Task.user_id == user_id,
                 Task.is_deleted == False,
-                or_(
-                    Task.title.ilike(f"%{query}%"),
-                    Task.description.ilike(f"%{query}%")
-                )
+                condition
             )
-        ).order_by(Task.created_at.desc()).offset(skip).limit(limit)
+        ).options(
+            selectinload(Task.subtasks),
+            selectinload(Task.project)
+        ).order_by(score.desc(), Task.created_at.desc()).offset(skip).limit(limit)
         
         result = await self.db.execute(search_query)
         return result.scalars().all()
@@ -166,64 +299,356 @@ class TaskRepository(UserOwnedRepository[Task]):
         user_id: str,
         task_id: UUID
     ) -> Optional[Task]:
-        """Mark task as completed"""
+        """Toggle a task's completion, creating the next occurrence of a recurring one"""
         task = await self.get_by_user(user_id, task_id)
         if not task:
             return None
         
         task.complete()
-        await self.db.commit()
-        await self.db.refresh(task)
+        await self.db.flush()
+        self._changed(user_id, [task_id])
+        
+        if task.is_recurring and task.status == TaskStatus.COMPLETED:
+            await self.advance_series(user_id, [task_id])
         return task
     
-    async def get_stats(
+    @staticmethod
+    def _pin_series(obj_in: Dict[str, Any]) -> Dict[str, Any]:
+        """Pin the DTSTART of a new recurring task to its due date"""
+        if obj_in.get("is_recurring") and obj_in.get("recurrence_rule") and not obj_in.get("recurrence_date"):
+            obj_in["recurrence_date"] = as_utc(obj_in.get("due_date") or datetime.now(timezone.utc))
+        return obj_in
+    
+    async def create_for_user(
         self,
-        user_id: str
-    ) -> Dict[str, Any]:
-        """Get task statistics for a user"""
-        # Total tasks
-        total_query = select(func.count(Task.id)).where(
+        user_id: str,
+        obj_in: Dict[str, Any]
+    ) -> Task:
+        """Create a task, and the upcoming occurrences of a recurring one"""
+        task = await super().create_for_user(user_id, self._pin_series(obj_in))
+        if task.is_recurring and task.recurrence_rule:
+            await self.materialize_occurrences(window_end(), user_id=user_id, series_ids=[task.id])
+        return task
+    
+    async def create_many_for_user(
+        self,
+        user_id: str,
+        items: List[Dict[str, Any]]
+    ) -> List[Task]:
+        """Create many tasks, and the upcoming occurrences of recurring ones"""
+        tasks = await super().create_many_for_user(user_id, [self._pin_series(item) for item in items])
+        series_ids = [task.id for task in tasks if task.is_recurring and task.recurrence_rule]
+        if series_ids:
+            await self.materialize_occurrences(window_end(), user_id=user_id, series_ids=series_ids)
+        return tasks
+    
+    async def update_for_user(
+        self,
+        user_id: str,
+        id: UUID,
+        obj_in: Dict[str, Any]
+    ) -> Optional[Task]:
+        """Update a task, creating the next occurrence if it completes a recurring one"""
+        task = await super().update_for_user(user_id, id, obj_in)
+        if task and task.is_recurring and obj_in.get("status") == TaskStatus.COMPLETED:
+            await self.advance_series(user_id, [id])
+        return task
+    
+    async def update_many_for_user(
+        self,
+        user_id: str,
+        updates: Dict[UUID, Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Update many tasks, stamping completed_at on status changes and
+        creating the next occurrences of the recurring tasks completed
+        """
+        now = datetime.utcnow()
+        for values in updates.values():
+            if "status" in values and "completed_at" not in values:
+                values["completed_at"] = now if values["status"] == TaskStatus.COMPLETED else None
+        found = await super().update_many_for_user(user_id, updates)
+        
+        completed = [id for id in found if updates[id].get("status") == TaskStatus.COMPLETED]
+        if completed:
+            await self.advance_series(user_id, completed)
+        return found
+    
+    @staticmethod
+    def _is_series(task: Any):
+        """
+        Tasks that start a recurring series which still recurs; matches the
+        ix_tasks_user_series index
+        """
+        return and_(
+            task.is_deleted == False,
+            task.is_recurring == True,
+            task.recurrence_parent_id.is_(None),
+            task.recurrence_rule.is_not(None)
+        )
+    
+    @staticmethod
+    def _last_date(task: Any):
+        """Date of the series' latest occurrence, deleted or not"""
+        occurrence = aliased(Task)
+        return select(
+            func.max(occurrence.recurrence_date)
+        ).where(
+            occurrence.recurrence_parent_id == task.id
+        ).scalar_subquery()
+    
+    @staticmethod
+    def _series_columns(task: Any) -> List[Any]:
+        """What's needed to create occurrences of the series ``task`` starts"""
+        return [
+            task.id,
+            task.user_id,
+            func.coalesce(task.recurrence_date, task.due_date, task.created_at).label("dtstart"),
+            *[getattr(task, field) for field in SERIES_FIELDS]
+        ]
+    
+    @staticmethod
+    def _dates(
+        series_id: UUID,
+        rule: str,
+        dtstart: datetime,
+        after: datetime,
+        **kwargs: Any
+    ) -> List[datetime]:
+        """Dates of a series after ``after``; none if its rule doesn't parse"""
+        try:
+            return occurrences(rule, dtstart, after, **kwargs)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Skipping recurring task {series_id}: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _occurrence_rows(series: Row, dates: List[datetime]) -> List[Dict[str, Any]]:
+        """Rows for occurrences of a series on ``dates``"""
+        fields = {field: getattr(series, field) for field in SERIES_FIELDS}
+        return [
+            {
+                **fields,
+                "user_id": series.user_id,
+                "status": TaskStatus.PENDING,
+                "due_date": date,
+                "is_recurring": True,
+                "recurrence_parent_id": series.id,
+                "recurrence_date": date
+            }
+            for date in dates
+        ]
+    
+    async def _add_occurrences(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert occurrences with a single statement, skipping dates their
+        series already has a task for. Returns the number created.
+        """
+        if not rows:
+            return 0
+        
+        result = await self.db.execute(
+            pg_insert(Task).on_conflict_do_nothing(
+                index_elements=["recurrence_parent_id", "recurrence_date"],
+                index_where=text("recurrence_parent_id IS NOT NULL")
+            ).returning(Task.user_id, Task.id),
+            rows
+        )
+        created = result.all()
+        
+        by_user = defaultdict(list)
+        for user_id, id in created:
+            by_user[user_id].append(id)
+        for user_id, ids in by_user.items():
+            self._changed(user_id, ids)
+        return len(created)
+    
+    async def advance_series(
+        self,
+        user_id: str,
+        task_ids: List[UUID]
+    ) -> int:
+        """
+        Create the occurrence that follows each completed recurring task
+        among ``task_ids``, unless it exists already. The next date is
+        taken from after the completed one, or from now if that's later,
+        so completing an overdue task doesn't create more overdue ones.
+        Returns the number created.
+        """
+        series = aliased(Task)
+        query = select(
+            *self._series_columns(series),
+            Task.recurrence_date.label("completed_date")
+        ).join(
+            series, series.id == func.coalesce(Task.recurrence_parent_id, Task.id)
+        ).where(
             and_(
+                Task.id.in_(task_ids),
                 Task.user_id == user_id,
-                Task.is_deleted == False
+                Task.status == TaskStatus.COMPLETED,
+                Task.is_recurring == True,
+                self._is_series(series)
             )
         )
-        total_result = await self.db.execute(total_query)
-        total = total_result.scalar() or 0
+        result = await self.db.execute(query)
+        
+        now = datetime.now(timezone.utc)
+        rows = []
+        for series in result.all():
+            after = max(as_utc(series.completed_date or series.dtstart), now)
+            dates = self._dates(series.id, series.recurrence_rule, series.dtstart, after)
+            rows.extend(self._occurrence_rows(series, dates))
+        return await self._add_occurrences(rows)
+    
+    async def materialize_occurrences(
+        self,
+        until: datetime,
+        *,
+        user_id: Optional[str] = None,
+        series_ids: Optional[List[UUID]] = None
+    ) -> int:
+        """
+        Create the occurrences of recurring tasks due from now until
+        ``until``, of all users or of one user's series. Dates before the
+        latest existing occurrence of a series are left alone. Returns the
+        number created.
+        """
+        now = datetime.now(timezone.utc)
+        created = 0
+        position = None
+        while True:
+            query = select(
+                *self._series_columns(Task),
+                self._last_date(Task).label("last_date")
+            ).where(self._is_series(Task))
+            if user_id is not None:
+                query = query.where(Task.user_id == user_id)
+            if series_ids is not None:
+                query = query.where(Task.id.in_(series_ids))
+            if position is not None:
+                query = query.where(tuple_(Task.user_id, Task.id) > position)
+            query = query.order_by(Task.user_id, Task.id).limit(settings.RECURRENCE_BATCH_SIZE)
+            
+            result = await self.db.execute(query)
+            page = result.all()
+            
+            rows = []
+            for series in page:
+                after = max(as_utc(series.last_date or series.dtstart), now)
+                dates = self._dates(
+                    series.id,
+                    series.recurrence_rule,
+                    series.dtstart,
+                    after,
+                    before=until,
+                    limit=settings.RECURRENCE_MAX_OCCURRENCES
+                )
+                rows.extend(self._occurrence_rows(series, dates))
+            created += await self._add_occurrences(rows)
+            
+            if len(page) < settings.RECURRENCE_BATCH_SIZE:
+                return created
+            position = (page[-1].user_id, page[-1].id)
+    
+    async def get_calendar(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Tasks due from ``start`` until ``end``, with the occurrences of
+        recurring tasks that haven't been created yet, soonest first.
         
-        # Tasks by status
-        status_query = select(
-            Task.status,
-            func.count(Task.id)
+        One query returns both the tasks due in the range and the series
+        they might recur in; dates past each series' latest occurrence are
+        expanded from its rule without being stored.
+        """
+        series = self._is_series(Task)
+        query = select(
+            Task,
+            func.coalesce(Task.recurrence_date, Task.due_date, Task.created_at).label("dtstart"),
+            case((series, self._last_date(Task))).label("last_date"),
+            series.label("is_series")
         ).where(
             and_(
                 Task.user_id == user_id,
-                Task.is_deleted == False
+                Task.is_deleted == False,
+                or_(
+                    and_(Task.due_date >= start, Task.due_date < end),
+                    series
+                )
             )
-        ).group_by(Task.status)
+        )
+        result = await self.db.execute(query)
         
-        status_result = await self.db.execute(status_query)
-        status_counts = {
-            status.value: count 
-            for status, count in status_result.all()
-        }
+        now = datetime.now(timezone.utc)
+        entries = []
+        for task, dtstart, last_date, is_series in result.all():
+            entry = {
+                "id": task.id,
+                "series_id": task.recurrence_parent_id or (task.id if is_series else None),
+                "title": task.title,
+                "status": task.status,
+                "priority": task.priority,
+                "project_id": task.project_id,
+                "due_date": task.due_date
+            }
+            if task.due_date is not None and start <= task.due_date < end:
+                entries.append(entry)
+            if not is_series:
+                continue
+            
+            # Only dates that would be created ahead of time, not missed ones
+            after = max(as_utc(last_date or dtstart), now)
+            dates = self._dates(
+                task.id,
+                task.recurrence_rule,
+                dtstart,
+                max(after, start),
+                inclusive=start > after,
+                before=end,
+                limit=settings.RECURRENCE_MAX_OCCURRENCES
+            )
+            entries.extend(
+                {**entry, "id": None, "status": TaskStatus.PENDING, "due_date": date}
+                for date in dates
+            )
         
-        # Overdue tasks
-        overdue_query = select(func.count(Task.id)).where(
+        entries.sort(key=lambda entry: entry["due_date"])
+        return entries
+    
+    async def get_stats(
+        self,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """Get task statistics for a user in a single query"""
+        overdue = and_(
+            Task.due_date < datetime.utcnow(),
+            Task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED])
+        )
+        query = select(
+            func.count(Task.id),
+            func.count(Task.id).filter(overdue),
+            *[func.count(Task.id).filter(Task.status == status) for status in TaskStatus]
+        ).where(
             and_(
                 Task.user_id == user_id,
-                Task.is_deleted == False,
-                Task.due_date < datetime.utcnow(),
-                Task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED])
+                Task.is_deleted == False
             )
         )
-        overdue_result = await self.db.execute(overdue_query)
-        overdue = overdue_result.scalar() or 0
+        
+        result = await self.db.execute(query)
+        total, overdue_count, *status_counts = result.one()
         
         return {
             "total": total,
-            "by_status": status_counts,
-            "overdue": overdue
+            "by_status": {
+                status.value: count
+                for status, count in zip(TaskStatus, status_counts)
+                if count
+            },
+            "overdue": overdue_count
         }
 
 
@@ -260,12 +685,14 @@ class ProjectRepository(UserOwnedRepository[Project]):
         self,
         user_id: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Project]:
         """Get active (non-archived) projects"""
         return await self.get_multi_by_user(
             user_id,
             skip=skip,
             limit=limit,
-            filters={"is_active": True, "is_archived": False}
+            filters={"is_active": True, "is_archived": False},
+            cursor=cursor
         )
\ No newline at end of file
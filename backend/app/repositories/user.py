@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any
 from uuid import UUID
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
@@ -70,8 +70,7 @@ class UserRepository(BaseRepository[User]):
         current_prefs.update(preferences)
         user.preferences = current_prefs
         
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
         return user
     
     async def update_enabled_modules(
@@ -85,8 +84,7 @@ class UserRepository(BaseRepository[User]):
             return None
         
         user.enabled_modules = modules
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
         return user
     
     async def activate_user(self, user_id: UUID) -> Optional[User]:
@@ -96,8 +94,7 @@ class UserRepository(BaseRepository[User]):
             return None
         
         user.is_active = True
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
         return user
     
     async def deactivate_user(self, user_id: UUID) -> Optional[User]:
@@ -107,61 +104,44 @@ class UserRepository(BaseRepository[User]):
             return None
         
         user.is_active = False
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
         return user
     
     async def search_users(
         self,
         query: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        min_similarity: Optional[float] = None
     ) -> List[User]:
-        """Search users by name, username, or email"""
+        """Fuzzy search users by name, username, or email, best matches first"""
+        condition, score = await self.trigram_search(
+            query,
+            [User.email, User.username, User.first_name, User.last_name],
+            min_similarity
+        )
+        
         search_query = select(User).where(
             and_(
                 User.is_deleted == False,
                 User.is_active == True,
-                or_(
-                    User.email.ilike(f"%{query}%"),
-                    User.username.ilike(f"%{query}%"),
-                    User.first_name.ilike(f"%{query}%"),
-                    User.last_name.ilike(f"%{query}%")
-                )
+                condition
             )
-        ).order_by(User.created_at.desc()).offset(skip).limit(limit)
+        ).order_by(score.desc(), User.created_at.desc()).offset(skip).limit(limit)
         
         result = await self.db.execute(search_query)
         return result.scalars().all()
     
     async def get_stats(self) -> Dict[str, Any]:
-        """Get user statistics"""
-        # Total users
-        total_query = select(func.count(User.id)).where(
-            User.is_deleted == False
-        )
-        total_result = await self.db.execute(total_query)
-        total = total_result.scalar() or 0
-        
-        # Active users
-        active_query = select(func.count(User.id)).where(
-            and_(
-                User.is_deleted == False,
-                User.is_active == True
-            )
-        )
-        active_result = await self.db.execute(active_query)
-        active = active_result.scalar() or 0
+        """Get user statistics in a single query"""
+        query = select(
+            func.count(User.id),
+            func.count(User.id).filter(User.is_active == True),
+            func.count(User.id).filter(User.is_verified == True)
+        ).where(User.is_deleted == False)
         
-        # Verified users
-        verified_query = select(func.count(User.id)).where(
-            and_(
-                User.is_deleted == False,
-                User.is_verified == True
-            )
-        )
-        verified_result = await self.db.execute(verified_query)
-        verified = verified_result.scalar() or 0
+        result = await self.db.execute(query)
+        total, active, verified = result.one()
         
         return {
             "total": total,
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
 import uuid
 
 
@@ -27,4 +27,36 @@ class UserOwnedSchema(IDSchema, TimestampSchema):
     """Schema for user-owned resources"""
     user_id: str
     is_deleted: bool = False
-    deleted_at: Optional[datetime] = None
\ No newline at end of file
+    deleted_at: Optional[datetime] = None
+
+
+# Batch schemas. Items are validated one at a time against the resource's
+# create or update schema, so one bad item doesn't fail the whole batch.
+class BatchCreate(BaseSchema):
+    """Schema for creating many records at once"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
+
+
+class BatchUpdate(BaseSchema):
+    """Schema for updating many records at once; each item carries its ``id``"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
+
+
+class BatchDelete(BaseSchema):
+    """Schema for deleting many records at once"""
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=500)
+
+
+class BatchItemResult(BaseSchema):
+    """Outcome of one item in a batch, by its position in the request"""
+    index: int
+    id: Optional[uuid.UUID] = None
+    status: int
+    error: Optional[str] = None
+
+
+class BatchResult(BaseSchema):
+    """Outcome of a batch request"""
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
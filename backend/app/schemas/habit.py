@@ -96,7 +96,13 @@ class HabitLogBase(BaseSchema):
 
 class HabitLogCreate(HabitLogBase):
     """Schema for creating a habit log"""
-    pass
+    
+    @validator('date')
+    def validate_date(cls, v):
+        # A day that hasn't happened yet would start a new streak
+        if v > datetime.utcnow().date():
+            raise ValueError('Habits can only be logged for today or earlier')
+        return v
 
 
 class HabitLogInDB(HabitLogBase):
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional, List, Dict
+import uuid
+
+from app.schemas.base import BaseSchema
+from app.models.import_job import ImportFormat, ImportStatus
+
+
+class ImportRecordError(BaseSchema):
+    """A record the import rejected"""
+    # Line of an NDJSON file, or position of a file in a vault
+    record: int
+    type: Optional[str] = None
+    # File the record came from, for vaults
+    source: Optional[str] = None
+    error: str
+
+
+class ImportJob(BaseSchema):
+    """An import and its progress"""
+    id: uuid.UUID
+    format: ImportFormat
+    status: ImportStatus
+    filename: Optional[str] = None
+    processed: int
+    created: Dict[str, int]
+    failed: int
+    skipped: int
+    errors: List[ImportRecordError]
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
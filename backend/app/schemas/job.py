@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional, Any
+import uuid
+
+from app.schemas.base import BaseSchema
+from app.models.job import JobStatus
+
+
+class Job(BaseSchema):
+    """A background job and how it went"""
+    id: uuid.UUID
+    name: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    # When the job runs next, while it's queued
+    run_at: datetime
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    # Error from the latest failed attempt
+    last_error: Optional[str] = None
+    result: Optional[Any] = None
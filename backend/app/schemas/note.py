@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import Field
+from pydantic import Field, validator
 import uuid
 
 from app.schemas.base import UserOwnedSchema, BaseSchema
@@ -31,14 +31,34 @@ class NoteUpdate(BaseSchema):
     is_favorite: Optional[bool] = None
 
 
+class NoteAutosave(BaseSchema):
+    """Schema for an editor autosave made on top of a known revision"""
+    revision: int = Field(..., ge=0)
+    content: str
+    title: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
+class NoteAutosaveResult(BaseSchema):
+    """Revision the autosave was accepted as"""
+    id: uuid.UUID
+    revision: int
+
+
 class NoteInDB(NoteBase, UserOwnedSchema):
     """Note schema with all fields"""
-    pass
+    revision: int = 0
+    
+    @validator('tags', pre=True)
+    def tag_names(cls, v):
+        # Notes loaded from the database carry Tag rows
+        return [getattr(tag, "name", tag) for tag in v]
 
 
 class Note(NoteInDB):
     """Note schema for API responses"""
-    pass
+    # Only set on full-text search results
+    search_rank: Optional[float] = None
+    search_snippet: Optional[str] = None
 
 
 class NoteSummary(BaseSchema):
@@ -57,7 +77,62 @@ class NoteLink(BaseSchema):
     target_id: uuid.UUID
 
 
+class NoteLinkPair(BaseSchema):
+    """A link from one note to another"""
+    source_id: uuid.UUID
+    target_id: uuid.UUID
+
+
+class NoteLinkBatch(BaseSchema):
+    """Schema for creating many links at once"""
+    links: List[NoteLinkPair] = Field(..., min_length=1, max_length=5000)
+
+
 class NoteWithLinks(Note):
     """Note with linked notes"""
     linked_to: List[NoteSummary] = Field(default_factory=list)
-    linked_from: List[NoteSummary] = Field(default_factory=list)
\ No newline at end of file
+    linked_from: List[NoteSummary] = Field(default_factory=list)
+
+
+# Version schemas
+class NoteVersionSummary(BaseSchema):
+    """A version of a note, without its content"""
+    id: uuid.UUID
+    version_number: int
+    title: str
+    change_summary: Optional[str] = None
+    user_id: str
+    created_at: datetime
+
+
+class NoteVersion(NoteVersionSummary):
+    """A version of a note with its full content"""
+    content: str
+
+
+class NoteVersionDiff(BaseSchema):
+    """Unified diff between two versions of a note"""
+    from_version: int
+    to_version: int
+    diff: str
+
+
+# Link graph schemas
+class NoteGraphNode(BaseSchema):
+    """A note in the link graph"""
+    id: uuid.UUID
+    title: str
+    # Hops from the starting note, for neighborhoods
+    depth: Optional[int] = None
+
+
+class NoteGraphEdge(BaseSchema):
+    """A link between two notes"""
+    source: uuid.UUID
+    target: uuid.UUID
+
+
+class NoteGraph(BaseSchema):
+    """Notes and the links between them"""
+    nodes: List[NoteGraphNode] = Field(default_factory=list)
+    edges: List[NoteGraphEdge] = Field(default_factory=list)
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+import uuid
+
+from app.schemas.base import BaseSchema
+
+
+class SyncChange(BaseSchema):
+    """A record created, updated or deleted since the last sync"""
+    type: str
+    id: uuid.UUID
+    updated_at: datetime
+    deleted: bool
+    # The record's fields; omitted for deletions
+    data: Optional[Dict[str, Any]] = None
+
+
+class SyncPage(BaseSchema):
+    """One page of a sync, with the token to pass as ``since`` next"""
+    changes: List[SyncChange]
+    token: str
+    # More pages follow; once false, ``token`` starts the next sync
+    has_more: bool
@@ -5,6 +5,7 @@ import uuid
 
 from app.schemas.base import UserOwnedSchema, BaseSchema
 from app.models.task import TaskStatus, TaskPriority
+from app.services.recurrence import validate_rule
 
 
 class TaskBase(BaseSchema):
@@ -25,6 +26,14 @@ class TaskCreate(TaskBase):
     assignee_id: Optional[str] = None
     is_recurring: bool = False
     recurrence_rule: Optional[str] = None
+    
+    @validator('recurrence_rule', always=True)
+    def check_recurrence_rule(cls, v, values):
+        if v is not None:
+            return validate_rule(v)
+        if values.get('is_recurring'):
+            raise ValueError('Recurring tasks need a recurrence_rule')
+        return v
 
 
 class TaskUpdate(BaseSchema):
@@ -52,6 +61,7 @@ class TaskInDB(TaskBase, UserOwnedSchema):
     is_recurring: bool = False
     recurrence_rule: Optional[str] = None
     recurrence_parent_id: Optional[uuid.UUID] = None
+    recurrence_date: Optional[datetime] = None
     @computed_field  # type: ignore[misc]
     @property
     def is_overdue(self) -> bool:
@@ -81,6 +91,17 @@ class TaskSummary(BaseSchema):
     is_overdue: bool = False
 
 
+class TaskOccurrence(BaseSchema):
+    """A task on the calendar, or a date a recurring task will recur on"""
+    id: Optional[uuid.UUID] = None  # None until the occurrence is created
+    series_id: Optional[uuid.UUID] = None  # First task of the recurring series
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    project_id: Optional[uuid.UUID] = None
+    due_date: datetime
+
+
 # Project Schemas
 class ProjectBase(BaseSchema):
     """Base project schema"""
@@ -0,0 +1,120 @@
+"""
+Per-user cache for aggregate read endpoints, with stale-while-revalidate.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, on_commit
+
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[AsyncSession], Awaitable[Any]]
+
+# Aggregates cached for each kind of data; a write to that data drops them all
+AGGREGATES: Dict[str, Tuple[str, ...]] = {
+    "tasks": ("stats",),
+    "notes": ("stats", "folders"),
+    "habits": ("stats", "streaks"),
+}
+
+
+class AggregateCache:
+    """
+    Cached aggregates such as stats, keyed per user.
+    
+    Entries younger than AGGREGATE_CACHE_FRESH_SECONDS are served as is.
+    Older ones, up to AGGREGATE_CACHE_TTL_SECONDS, are still served but
+    recomputed in the background on their own session. Writes invalidate a
+    user's entries once committed, leaving a short-lived marker so a refresh
+    that started before the write can't put its older result back.
+    
+    Values must be JSON-serializable, since they may round-trip through Redis.
+    """
+    
+    def __init__(self):
+        self._cache = TieredCache(
+            "aggregates",
+            ttl=settings.AGGREGATE_CACHE_TTL_SECONDS,
+            local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+        )
+        self.fresh_for = settings.AGGREGATE_CACHE_FRESH_SECONDS
+        # Refreshes running in this process, by key
+        self._refreshing: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def _key(user_id: str, scope: str, name: str) -> str:
+        return f"{user_id}:{scope}.{name}"
+    
+    async def get_or_load(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        scope: str,
+        name: str,
+        load: Loader
+    ) -> Any:
+        """Get an aggregate, loading it with ``load(db)`` when it isn't cached"""
+        key = self._key(user_id, scope, name)
+        entry = await self._cache.get(key)
+        
+        if entry is not None and "value" in entry:
+            if time.time() - entry["computed_at"] >= self.fresh_for:
+                self._revalidate(key, load)
+            return entry["value"]
+        
+        started_at = time.time()
+        value = await load(db)
+        await self._store(key, value, started_at)
+        return value
+    
+    def _revalidate(self, key: str, load: Loader) -> None:
+        """Recompute an entry in the background, once per process at a time"""
+        if key not in self._refreshing:
+            self._refreshing[key] = asyncio.create_task(self._refresh(key, load))
+    
+    async def _refresh(self, key: str, load: Loader) -> None:
+        try:
+            started_at = time.time()
+            async with AsyncSessionLocal() as db:
+                value = await load(db)
+            await self._store(key, value, started_at)
+        except Exception:
+            logger.exception("Failed to refresh cached aggregate %s", key)
+        finally:
+            self._refreshing.pop(key, None)
+    
+    async def _store(self, key: str, value: Any, started_at: float) -> None:
+        """Cache a value unless the entry was invalidated after it was computed"""
+        await self._cache.set_unless_newer(
+            key,
+            {"value": value, "computed_at": started_at},
+            "invalidated_at",
+            started_at
+        )
+    
+    async def invalidate(self, user_id: str, scope: str) -> None:
+        """Drop a user's aggregates for ``scope`` after its data changed"""
+        marker = {"invalidated_at": time.time()}
+        for name in AGGREGATES[scope]:
+            # The marker only needs to outlive a refresh in flight
+            await self._cache.set(self._key(user_id, scope, name), marker, ttl=60)
+
+
+# Global instance
+aggregates = AggregateCache()
+
+
+def invalidate_on_commit(db: AsyncSession, user_id: str, scope: str) -> None:
+    """Invalidate a user's aggregates for ``scope`` once the unit of work commits"""
+    on_commit(
+        db,
+        lambda: aggregates.invalidate(user_id, scope),
+        key=("aggregates", user_id, scope)
+    )
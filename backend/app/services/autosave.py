@@ -0,0 +1,129 @@
+"""
+Note autosaves: one conditional write per save, the rest coalesced.
+
+An autosave is a single UPDATE of the note's content and revision, applied
+only if the note is still at the revision the editor last saw. The check is
+in the database, so it holds whichever API worker a save reaches, every
+worker reads the saved content, and a save is committed before the client
+is told it was accepted. Stale saves are rejected with the note's revision,
+so the client reloads and merges.
+
+The rest of saving a note, wiki link sync, a version, cached aggregates and
+the change event, is done by a ``notes.autosaved`` background job. The first
+save of a burst queues it; it runs once the note has been quiet for
+NOTE_AUTOSAVE_WINDOW_SECONDS, or at the latest NOTE_AUTOSAVE_MAX_DELAY_SECONDS
+after the burst began. A burst of keystroke saves therefore costs one small
+UPDATE each and one version in all.
+"""
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import on_commit
+from app.models.note import Note
+from app.repositories.note import NoteRepository, NoteVersionRepository
+from app.repositories.note_graph import invalidate_graph
+from app.services.aggregate_cache import invalidate_on_commit
+from app.services.events import publish_on_commit
+from app.services.jobs import enqueue
+
+
+class StaleRevisionError(Exception):
+    """The client edited an older revision than the current one"""
+    
+    def __init__(self, current_revision: int):
+        super().__init__(f"Note is at revision {current_revision}")
+        self.current_revision = current_revision
+
+
+def _live_note(user_id: str, note_id: UUID):
+    return and_(
+        Note.id == note_id,
+        Note.user_id == user_id,
+        Note.is_deleted == False
+    )
+
+
+async def save(
+    db: AsyncSession,
+    user_id: str,
+    note_id: UUID,
+    revision: int,
+    content: str,
+    title: Optional[str] = None
+) -> Optional[int]:
+    """
+    Save editor content made on top of ``revision``.
+    
+    Returns the note's new revision, or None if the note doesn't exist.
+    Raises StaleRevisionError if ``revision`` isn't the current one.
+    """
+    values = {"content": content, "revision": Note.revision + 1}
+    if title is not None:
+        values["title"] = title
+    
+    saved = await db.scalar(
+        update(Note).where(
+            and_(_live_note(user_id, note_id), Note.revision == revision)
+        ).values(**values).returning(Note.revision).execution_options(
+            synchronize_session=False
+        )
+    )
+    if saved is None:
+        current = await db.scalar(select(Note.revision).where(_live_note(user_id, note_id)))
+        if current is None:
+            return None
+        raise StaleRevisionError(current)
+    
+    # Only the first save of a burst queues the job; later ones find it
+    await enqueue(
+        db,
+        "notes.autosaved",
+        {"note_id": str(note_id), "user_id": user_id, "since": time.time()},
+        delay=settings.NOTE_AUTOSAVE_WINDOW_SECONDS,
+        idempotency_key=f"notes.autosaved:{note_id}"
+    )
+    return saved
+
+
+async def finish(
+    db: AsyncSession,
+    user_id: str,
+    note_id: UUID,
+    since: float
+) -> Dict[str, Any]:
+    """
+    Sync wiki links and record a version for the autosaves of a burst that
+    began at ``since``, once the note has been quiet for long enough.
+    """
+    note = await db.scalar(select(Note).where(_live_note(user_id, note_id)))
+    if note is None:
+        return {"finished": False}
+    
+    now = time.time()
+    quiet_for = now - note.updated_at.timestamp()
+    if (
+        quiet_for < settings.NOTE_AUTOSAVE_WINDOW_SECONDS
+        and now - since < settings.NOTE_AUTOSAVE_MAX_DELAY_SECONDS
+    ):
+        # Still being edited. Not keyed: this job holds the key until it
+        # finishes. Running twice is harmless, as an unchanged note gets
+        # no new version.
+        await enqueue(
+            db,
+            "notes.autosaved",
+            {"note_id": str(note_id), "user_id": user_id, "since": since},
+            delay=settings.NOTE_AUTOSAVE_WINDOW_SECONDS - quiet_for
+        )
+        return {"finished": False}
+    
+    await NoteRepository(Note, db).sync_wiki_links(user_id, note_id, note.content)
+    await NoteVersionRepository(db).create_version(note, user_id, "Autosave")
+    invalidate_on_commit(db, user_id, "notes")
+    publish_on_commit(db, user_id, "notes", [note_id])
+    on_commit(db, lambda: invalidate_graph(user_id))
+    return {"finished": True}
@@ -0,0 +1,291 @@
+"""
+Per-user change events for the /events stream.
+
+Writes publish a compact event, such as {"scope": "tasks", "ids": [...]},
+once their unit of work commits. With Redis, events are appended to a capped
+stream per user, so subscribers on every worker process see them and can
+resume from the last event ID they received. Without Redis, events only reach
+subscribers in this process, from a short in-memory history.
+
+Redis pub/sub has no replay, so streams are used instead; a client whose
+position has been trimmed away gets a "reset" event and should resync
+through /sync.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, aioredis, get_redis, mark_redis_down, RedisError
+from app.core.config import settings
+from app.core.database import on_commit
+
+
+logger = logging.getLogger(__name__)
+
+# Events listing more IDs than this leave them out; clients refetch the scope
+MAX_EVENT_IDS = 100
+
+# Yielded by EventBus.subscribe in place of an event
+HEARTBEAT = "heartbeat"
+RESET = "reset"
+
+Event = Tuple[str, str]
+
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    """Parse a Redis stream ID such as "1700000000000-0" for comparison"""
+    ms, _, seq = value.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class EventBus:
+    """Publishes change events and streams them to subscribers"""
+    
+    def __init__(self):
+        # Redis connection for blocking reads, which outlast the shared
+        # client's socket timeout
+        self._reader = None
+        # In-process fallback: per-user event numbers, recent events kept
+        # while someone subscribes (and briefly after, for reconnects), and
+        # the queues of current subscribers
+        self._sequences: TTLCache[int] = TTLCache(maxsize=100_000, ttl=settings.EVENTS_STREAM_TTL_SECONDS)
+        self._history: TTLCache[Deque[Event]] = TTLCache(maxsize=10_000, ttl=300)
+        self._queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._connections: Dict[str, int] = defaultdict(int)
+    
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"events:{user_id}"
+    
+    async def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        """Publish an event to the user's subscribers"""
+        data = json.dumps(event, separators=(",", ":"), default=str)
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                key = self._key(user_id)
+                await redis.xadd(key, {"data": data}, maxlen=settings.EVENTS_STREAM_MAXLEN, approximate=True)
+                await redis.expire(key, settings.EVENTS_STREAM_TTL_SECONDS)
+                return
+            except (RedisError, OSError) as e:
+                mark_redis_down(e)
+        
+        self._publish_local(user_id, data)
+    
+    def _publish_local(self, user_id: str, data: str) -> None:
+        sequence = self._sequences.get(user_id, 0) + 1
+        self._sequences.set(user_id, sequence)
+        event = (str(sequence), data)
+        
+        history = self._history.get(user_id)
+        if history is None and user_id in self._queues:
+            history = deque(maxlen=settings.EVENTS_QUEUE_SIZE)
+        if history is not None:
+            history.append(event)
+            self._history.set(user_id, history)
+        
+        for queue in list(self._queues.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Backpressure: drop a subscriber that isn't keeping up rather
+                # than buffer without bound. It ends once it has drained its
+                # queue, and the client resumes from history on reconnect.
+                self._queues[user_id].discard(queue)
+    
+    def try_connect(self, user_id: str) -> bool:
+        """Reserve one of the user's connections in this process"""
+        if self._connections[user_id] >= settings.EVENTS_MAX_CONNECTIONS_PER_USER:
+            return False
+        self._connections[user_id] += 1
+        return True
+    
+    def disconnect(self, user_id: str) -> None:
+        """Release a connection reserved with try_connect"""
+        self._connections[user_id] -= 1
+        if self._connections[user_id] <= 0:
+            del self._connections[user_id]
+    
+    async def subscribe(
+        self,
+        user_id: str,
+        last_event_id: Optional[str] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Yield (id, data) events for a user as they're published, starting
+        after ``last_event_id``. Yields HEARTBEAT when idle for
+        EVENTS_HEARTBEAT_SECONDS, and RESET before ending when events were
+        missed and can't be replayed.
+        """
+        redis = get_redis()
+        if redis is not None and aioredis is not None:
+            try:
+                await redis.ping()
+            except (RedisError, OSError) as e:
+                mark_redis_down(e)
+            else:
+                async for item in self._subscribe_redis(user_id, last_event_id):
+                    yield item
+                return
+        
+        async for item in self._subscribe_local(user_id, last_event_id):
+            yield item
+    
+    def _get_reader(self):
+        if self._reader is None:
+            self._reader = aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+            )
+        return self._reader
+    
+    async def _trimmed(self, reader, key: str, cursor: str) -> bool:
+        """Whether events after ``cursor`` may have been trimmed from the stream"""
+        first = await reader.xrange(key, count=1)
+        return bool(first) and _stream_id(first[0][0]) > _stream_id(cursor)
+    
+    async def _subscribe_redis(
+        self,
+        user_id: str,
+        last_event_id: Optional[str]
+    ) -> AsyncIterator[Any]:
+        reader = self._get_reader()
+        key = self._key(user_id)
+        batch = settings.EVENTS_QUEUE_SIZE
+        
+        try:
+            if last_event_id:
+                try:
+                    _stream_id(last_event_id)
+                except ValueError:
+                    yield RESET
+                    return
+                cursor = last_event_id
+                check = True
+            else:
+                latest = await reader.xrevrange(key, count=1)
+                cursor = latest[0][0] if latest else "0-0"
+                check = False
+            
+            while True:
+                if check and await self._trimmed(reader, key, cursor):
+                    yield RESET
+                    return
+                
+                response = await reader.xread(
+                    {key: cursor},
+                    count=batch,
+                    block=int(settings.EVENTS_HEARTBEAT_SECONDS * 1000)
+                )
+                if not response:
+                    check = False
+                    yield HEARTBEAT
+                    continue
+                
+                entries = response[0][1]
+                for event_id, fields in entries:
+                    cursor = event_id
+                    yield event_id, fields["data"]
+                # A full batch means this client is lagging behind writes
+                check = len(entries) == batch
+        except (RedisError, OSError) as e:
+            # End the stream; the client reconnects with its last event ID
+            logger.warning(f"Event stream for user {user_id} failed: {str(e)}")
+    
+    def _replay_local(self, user_id: str, last_event_id: str) -> Optional[List[Event]]:
+        """Events after ``last_event_id`` from history, or None if some are gone"""
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            return None
+        
+        sequence = self._sequences.get(user_id, 0)
+        if after == sequence:
+            return []
+        history = self._history.get(user_id)
+        if after > sequence or not history or int(history[0][0]) > after + 1:
+            return None
+        return [event for event in history if int(event[0]) > after]
+    
+    async def _subscribe_local(
+        self,
+        user_id: str,
+        last_event_id: Optional[str]
+    ) -> AsyncIterator[Any]:
+        history = self._history.get(user_id)
+        if history is None:
+            history = deque(maxlen=settings.EVENTS_QUEUE_SIZE)
+        self._history.set(user_id, history)
+        
+        # Subscribe before replaying, so nothing published meanwhile is lost
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self._queues[user_id].add(queue)
+        try:
+            if last_event_id:
+                replay = self._replay_local(user_id, last_event_id)
+                if replay is None:
+                    yield RESET
+                    return
+                for event in replay:
+                    yield event
+            
+            while queue in self._queues[user_id] or not queue.empty():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                yield event
+        finally:
+            self._queues[user_id].discard(queue)
+            if not self._queues[user_id]:
+                del self._queues[user_id]
+            # Keep history a while for clients reconnecting
+            self._history.set(user_id, history)
+    
+    async def close(self) -> None:
+        """Close the blocking Redis connection"""
+        if self._reader is not None:
+            await self._reader.aclose()
+            self._reader = None
+
+
+# Global instance
+events = EventBus()
+
+
+def publish_on_commit(
+    db: AsyncSession,
+    user_id: str,
+    scope: str,
+    ids: Iterable[Any] = ()
+) -> None:
+    """
+    Publish a change event for ``scope`` once the unit of work commits.
+    
+    All changes a unit of work makes to a user's scope go out as one event.
+    """
+    pending: Dict[Tuple[str, str], Set[str]] = db.info.setdefault("events", {})
+    key = (user_id, scope)
+    
+    if key not in pending:
+        changed = pending[key] = set()
+        
+        def publish():
+            event: Dict[str, Any] = {"scope": scope}
+            if 0 < len(changed) <= MAX_EVENT_IDS:
+                event["ids"] = sorted(changed)
+            return events.publish(user_id, event)
+        
+        on_commit(db, publish, key=("events", user_id, scope))
+    
+    pending[key].update(str(id) for id in ids)
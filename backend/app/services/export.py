@@ -0,0 +1,298 @@
+"""
+Streaming export of a user's account as NDJSON or CSV.
+
+Rows are read through server-side cursors, EXPORT_BATCH_SIZE at a time,
+inside one REPEATABLE READ transaction, so the export is a consistent
+snapshot and memory use doesn't grow with the size of the account.
+
+Entities are written in EXPORT_ENTITIES order, each sorted by its key, so
+an interrupted download can resume after the last complete row it got.
+"""
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, and_, or_, func, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.habit import Habit, HabitLog
+from app.models.note import Note, NoteVersion, Tag, note_links, note_tags
+from app.models.task import Task, Project, TaskLog
+from app.services.note_versions import apply_delta
+
+
+# Output is flushed in chunks of about this many bytes
+CHUNK_SIZE = 64 * 1024
+
+Record = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class ExportEntity:
+    """How one kind of record is exported"""
+    model: Any
+    # Rows are skipped when this parent row is soft-deleted
+    parent: Optional[Tuple[Any, Any]] = None
+    # Columns left out, and fields added after the columns
+    exclude: Tuple[str, ...] = ()
+    extra: Tuple[str, ...] = ()
+    
+    @cached_property
+    def columns(self) -> List[str]:
+        return [
+            column.key
+            for column in inspect(self.model).column_attrs
+            if column.key not in self.exclude
+        ]
+    
+    @cached_property
+    def fields(self) -> List[str]:
+        return self.columns + list(self.extra)
+
+
+# Parents before children, so imports can follow the same order
+EXPORT_ENTITIES: Dict[str, ExportEntity] = {
+    "projects": ExportEntity(Project),
+    "tasks": ExportEntity(Task),
+    "task_logs": ExportEntity(TaskLog, parent=(TaskLog.task_id, Task)),
+    "notes": ExportEntity(
+        Note,
+        exclude=("content_search_vector",),
+        extra=("tags", "links")
+    ),
+    # Content is rebuilt from the snapshot and delta chain
+    "note_versions": ExportEntity(
+        NoteVersion,
+        parent=(NoteVersion.note_id, Note),
+        exclude=("is_snapshot", "delta")
+    ),
+    "habits": ExportEntity(Habit),
+    "habit_logs": ExportEntity(HabitLog, parent=(HabitLog.habit_id, Habit)),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class AccountExport:
+    """Reads a user's records for export, optionally resuming after a row"""
+    
+    def __init__(
+        self,
+        user_id: str,
+        entities: List[str],
+        after: Optional[Tuple[str, UUID]] = None
+    ):
+        self.user_id = user_id
+        self.entities = entities
+        self.after = after
+    
+    async def records(self) -> AsyncIterator[Tuple[str, Record]]:
+        """Yield (entity, record) pairs in export order"""
+        names = self.entities
+        if self.after is not None:
+            names = names[names.index(self.after[0]):]
+        
+        async with AsyncSessionLocal() as db:
+            # One snapshot for the whole export
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            
+            for name in names:
+                after_id = self.after[1] if self.after and self.after[0] == name else None
+                if name == "note_versions":
+                    rows = self._note_versions(db, after_id)
+                else:
+                    rows = self._rows(db, name, after_id)
+                async for record in rows:
+                    yield name, record
+    
+    def _query(self, name: str):
+        entity = EXPORT_ENTITIES[name]
+        model = entity.model
+        conditions = [model.user_id == self.user_id, model.is_deleted == False]
+        if entity.parent is not None:
+            column, parent = entity.parent
+            conditions.append(
+                column.in_(
+                    select(parent.id).where(
+                        and_(parent.user_id == self.user_id, parent.is_deleted == False)
+                    )
+                )
+            )
+        return select(model).where(and_(*conditions))
+    
+    async def _stream(self, db: AsyncSession, query) -> AsyncIterator[List[Any]]:
+        result = await db.stream_scalars(
+            query,
+            execution_options={"yield_per": settings.EXPORT_BATCH_SIZE}
+        )
+        async for partition in result.partitions():
+            yield partition
+    
+    @staticmethod
+    def _record(name: str, row: Any) -> Record:
+        return {key: getattr(row, key) for key in EXPORT_ENTITIES[name].columns}
+    
+    async def _rows(self, db: AsyncSession, name: str, after_id: Optional[UUID]) -> AsyncIterator[Record]:
+        model = EXPORT_ENTITIES[name].model
+        query = self._query(name)
+        if after_id is not None:
+            query = query.where(model.id > after_id)
+        
+        async for rows in self._stream(db, query.order_by(model.id)):
+            records = [self._record(name, row) for row in rows]
+            if model is Note:
+                await self._add_note_relations(db, records)
+            # Drop the rows from the session so memory stays flat
+            db.expunge_all()
+            for record in records:
+                yield record
+    
+    async def _add_note_relations(self, db: AsyncSession, records: List[Record]) -> None:
+        """Fill in tag names and outgoing link targets for a batch of notes"""
+        ids = [record["id"] for record in records]
+        tags: Dict[UUID, List[str]] = {id: [] for id in ids}
+        links: Dict[UUID, List[UUID]] = {id: [] for id in ids}
+        
+        tags_result = await db.execute(
+            select(note_tags.c.note_id, Tag.name).join(
+                Tag, Tag.id == note_tags.c.tag_id
+            ).where(note_tags.c.note_id.in_(ids)).order_by(Tag.name)
+        )
+        for note_id, tag_name in tags_result.all():
+            tags[note_id].append(tag_name)
+        
+        links_result = await db.execute(
+            select(note_links.c.source_note_id, note_links.c.target_note_id).where(
+                note_links.c.source_note_id.in_(ids)
+            ).order_by(note_links.c.target_note_id)
+        )
+        for source_id, target_id in links_result.all():
+            links[source_id].append(target_id)
+        
+        for record in records:
+            record["tags"] = tags[record["id"]]
+            record["links"] = links[record["id"]]
+    
+    async def _note_versions(self, db: AsyncSession, after_id: Optional[UUID]) -> AsyncIterator[Record]:
+        """
+        Versions in (note, version number) order with their full content.
+        
+        Deltas are applied as the chain streams past, so each version costs
+        one delta application instead of a chain read.
+        """
+        query = self._query("note_versions")
+        skip_note, skip_upto = None, None
+        
+        if after_id is not None:
+            resumed = (await db.execute(
+                select(NoteVersion.note_id, NoteVersion.version_number).where(
+                    NoteVersion.id == after_id
+                )
+            )).one_or_none()
+            if resumed is not None:
+                skip_note, skip_upto = resumed
+                # Restart from the snapshot the next version builds on
+                snapshot = select(func.max(NoteVersion.version_number)).where(
+                    and_(
+                        NoteVersion.note_id == skip_note,
+                        NoteVersion.is_snapshot == True,
+                        NoteVersion.version_number <= skip_upto + 1
+                    )
+                ).scalar_subquery()
+                query = query.where(
+                    or_(
+                        NoteVersion.note_id > skip_note,
+                        and_(
+                            NoteVersion.note_id == skip_note,
+                            NoteVersion.version_number >= func.coalesce(snapshot, 1)
+                        )
+                    )
+                )
+        
+        query = query.order_by(NoteVersion.note_id, NoteVersion.version_number)
+        content = ""
+        
+        async for rows in self._stream(db, query):
+            records = []
+            for row in rows:
+                content = (row.content or "") if row.is_snapshot else apply_delta(content, row.delta)
+                if row.note_id == skip_note and row.version_number <= skip_upto:
+                    continue
+                
+                record = self._record("note_versions", row)
+                record["content"] = content
+                records.append(record)
+            
+            db.expunge_all()
+            for record in records:
+                yield record
+
+
+async def ndjson_lines(records: AsyncIterator[Tuple[str, Record]]) -> AsyncIterator[bytes]:
+    """Encode records as one {"type", "data"} JSON object per line"""
+    async for name, record in records:
+        line = json.dumps({"type": name, "data": record}, default=_json_default)
+        yield (line + "\n").encode("utf-8")
+
+
+async def csv_rows(name: str, records: AsyncIterator[Tuple[str, Record]]) -> AsyncIterator[bytes]:
+    """Encode one entity's records as CSV with a header row"""
+    fields = EXPORT_ENTITIES[name].fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    writer.writerow(fields)
+    async for _, record in records:
+        writer.writerow([_csv_value(record.get(field)) for field in fields])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def chunked(parts: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Join small writes into chunks of about CHUNK_SIZE"""
+    chunk = bytearray()
+    async for part in parts:
+        chunk += part
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a gzip file as it is produced"""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
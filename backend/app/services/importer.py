@@ -0,0 +1,499 @@
+"""
+Bulk import of projects, tasks, notes, habits and habit logs.
+
+An upload is read as a stream of records: the lines of an NDJSON file in
+the format /export writes, optionally gzipped, or the Markdown files of a
+zipped vault. Every IMPORT_BATCH_SIZE records, the valid ones are written
+with one multi-row INSERT per type and committed together with the job's
+progress, so a status request always sees how far the import has got.
+
+Imported records get new IDs. References between them (a task's project
+and parent, a log's habit, a note's links) are mapped through the IDs in
+the file. References to records further on in the file, and [[wiki links]],
+are resolved once everything is in. Pending occurrences of recurring tasks
+that are still to come are skipped, since importing their series creates
+them again. If the import fails, the batches already committed are kept.
+
+Imports run as background jobs (see app.services.jobs), from uploads saved
+to IMPORT_UPLOAD_DIR.
+"""
+import gzip
+import json
+import logging
+import re
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from uuid import UUID
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import unit_of_work
+from app.models.habit import Habit
+from app.models.import_job import ImportJob, ImportFormat, ImportStatus
+from app.models.note import Note, Tag
+from app.models.task import Task, Project, TaskStatus
+from app.repositories.habit import HabitRepository, HabitLogRepository
+from app.repositories.import_job import ImportJobRepository
+from app.repositories.note import NoteRepository
+from app.repositories.task import TaskRepository, ProjectRepository
+from app.schemas.habit import HabitCreate, HabitLogCreate
+from app.schemas.note import NoteCreate
+from app.schemas.task import TaskCreate, ProjectCreate
+from app.services.jobs import enqueue
+from app.services.recurrence import as_utc
+from app.services.wiki_links import extract_wiki_links
+
+
+logger = logging.getLogger(__name__)
+
+# Types that are imported, parents before children, with the schema their
+# records are validated against
+IMPORT_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "projects": ProjectCreate,
+    "tasks": TaskCreate,
+    "notes": NoteCreate,
+    "habits": HabitCreate,
+    "habit_logs": HabitLogCreate,
+}
+
+# Exported history that isn't imported; imported notes start a new history
+SKIPPED_TYPES = {"task_logs", "note_versions"}
+
+ZIP_MAGIC = b"PK\x03\x04"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Vault files larger than this are rejected rather than read into memory
+MAX_NOTE_BYTES = 10 * 1024 * 1024
+
+TAG_MAX_LENGTH = Tag.__table__.c.name.type.length
+TITLE_MAX_LENGTH = Note.__table__.c.title.type.length
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.DOTALL)
+
+
+@dataclass
+class ImportRecord:
+    """One record read from an upload"""
+    # Line of an NDJSON file, or position of a file in a vault
+    position: int
+    type: Optional[str]
+    data: Any
+    source: Optional[str] = None
+    # Why the record couldn't be read, if it couldn't
+    error: Optional[str] = None
+
+
+def detect_format(path: str) -> ImportFormat:
+    """Zip files are vaults; anything else is read as NDJSON"""
+    with open(path, "rb") as upload:
+        magic = upload.read(len(ZIP_MAGIC))
+    return ImportFormat.MARKDOWN if magic == ZIP_MAGIC else ImportFormat.NDJSON
+
+
+def read_ndjson(path: str) -> Iterator[ImportRecord]:
+    """Records from an NDJSON file of {"type", "data"} lines, plain or gzipped"""
+    with open(path, "rb") as upload:
+        gzipped = upload.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    opener = gzip.open if gzipped else open
+    
+    with opener(path, "rt", encoding="utf-8", errors="replace") as lines:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield ImportRecord(number, None, None, error="Invalid JSON")
+                continue
+            
+            if not isinstance(item, dict) or not isinstance(item.get("type"), str) or not isinstance(item.get("data"), dict):
+                yield ImportRecord(number, None, None, error='Expected an object with "type" and "data"')
+                continue
+            yield ImportRecord(number, item["type"], item["data"])
+
+
+def _front_matter_value(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split YAML front matter from a Markdown file's content.
+    
+    Only the flat subset vaults use is understood: ``key: value``,
+    ``key: [a, b]`` and lists of ``- item`` lines. Nested mappings are
+    ignored.
+    """
+    match = FRONT_MATTER.match(text)
+    if match is None:
+        return {}, text
+    
+    fields: Dict[str, Any] = {}
+    key = None
+    for line in match.group(1).splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        
+        if stripped.startswith("-") and key is not None:
+            if not isinstance(fields[key], list):
+                fields[key] = []
+            fields[key].append(_front_matter_value(stripped[1:]))
+            continue
+        
+        name, separator, value = line.partition(":")
+        if not separator or line[:1].isspace():
+            continue
+        
+        key = name.strip()
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            fields[key] = [_front_matter_value(item) for item in value[1:-1].split(",") if item.strip()]
+        else:
+            fields[key] = _front_matter_value(value) if value else None
+    
+    return fields, text[match.end():]
+
+
+def markdown_note(path: str, text: str) -> Dict[str, Any]:
+    """
+    Note fields for a vault file. The title comes from the front matter or
+    the file name, and tags from the front matter; the rest of the front
+    matter and the file's path are kept in meta_data.
+    """
+    front_matter, content = parse_front_matter(text)
+    title = front_matter.pop("title", None) or PurePosixPath(path).stem
+    
+    tags = front_matter.pop("tags", None) or front_matter.pop("tag", None) or []
+    if isinstance(tags, str):
+        tags = re.split(r"[,\s]+", tags)
+    
+    meta_data: Dict[str, Any] = {"source_path": path}
+    if front_matter:
+        meta_data["front_matter"] = front_matter
+    
+    return {
+        "title": str(title).strip()[:TITLE_MAX_LENGTH],
+        "content": content,
+        "tags": [tag.lstrip("#") for tag in tags if tag.lstrip("#")],
+        "meta_data": meta_data,
+    }
+
+
+def _is_note_file(info: zipfile.ZipInfo) -> bool:
+    path = PurePosixPath(info.filename)
+    return (
+        not info.is_dir()
+        and path.suffix.lower() in (".md", ".markdown")
+        # Editor settings and macOS resource forks
+        and not any(part.startswith(".") or part == "__MACOSX" for part in path.parts)
+    )
+
+
+def read_vault(path: str) -> Iterator[ImportRecord]:
+    """Note records from the Markdown files of a zipped vault"""
+    with zipfile.ZipFile(path) as vault:
+        files = [info for info in vault.infolist() if _is_note_file(info)]
+        for position, info in enumerate(files, 1):
+            if info.file_size > MAX_NOTE_BYTES:
+                yield ImportRecord(position, "notes", None, source=info.filename, error="File is too large")
+                continue
+            
+            text = vault.read(info).decode("utf-8", errors="replace")
+            yield ImportRecord(position, "notes", markdown_note(info.filename, text), source=info.filename)
+
+
+def _error_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class AccountImport:
+    """Imports a stream of records into a user's account, batch by batch"""
+    
+    def __init__(self, job_id: UUID, user_id: str):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.batch: Dict[str, List[ImportRecord]] = {type: [] for type in IMPORT_SCHEMAS}
+        
+        # New IDs by the IDs in the file, per type
+        self.ids: Dict[str, Dict[str, UUID]] = {type: {} for type in IMPORT_SCHEMAS}
+        # References resolved at the end: (new ID, ID in the file) pairs of
+        # subtasks and parent tasks, and of notes and notes they link to, and
+        # the [[link]] titles of new notes
+        self.parent_tasks: List[Tuple[UUID, str]] = []
+        self.note_links: List[Tuple[UUID, str]] = []
+        self.wiki_links: Dict[UUID, List[str]] = {}
+        
+        self.processed = 0
+        self.created: Dict[str, int] = {}
+        self.failed = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+    
+    async def run(self, records: Iterable[ImportRecord]) -> None:
+        """Import all records, then resolve the references between them"""
+        for record in records:
+            self.processed += 1
+            if record.error is not None:
+                self._reject(record, record.error)
+            elif record.type in SKIPPED_TYPES:
+                self.skipped += 1
+            elif record.type not in IMPORT_SCHEMAS:
+                self._reject(record, f"Unknown type {record.type!r}")
+            else:
+                self.batch[record.type].append(record)
+            
+            if self.processed % settings.IMPORT_BATCH_SIZE == 0:
+                await self._flush()
+        
+        await self._flush()
+        await self._resolve_references()
+    
+    def progress(self) -> Dict[str, Any]:
+        """The job's progress columns"""
+        return {
+            "processed": self.processed,
+            "created": dict(self.created),
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+        }
+    
+    def _reject(self, record: ImportRecord, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({
+                "record": record.position,
+                "type": record.type,
+                "source": record.source,
+                "error": message
+            })
+    
+    def _validate(self, type: str, records: List[ImportRecord]) -> List[Tuple[ImportRecord, Dict[str, Any]]]:
+        """Records that pass their type's schema, with the validated fields"""
+        schema = IMPORT_SCHEMAS[type]
+        valid = []
+        for record in records:
+            try:
+                valid.append((record, schema.model_validate(record.data).model_dump()))
+            except ValidationError as e:
+                self._reject(record, _error_message(e))
+        return valid
+    
+    def _lookup(self, type: str, id: Any) -> Optional[UUID]:
+        """New ID of a record imported under ``id``, if there is one yet"""
+        return self.ids[type].get(str(id)) if id is not None else None
+    
+    def _created(self, type: str, valid: List[Tuple[ImportRecord, Dict[str, Any]]], rows: List[Any]) -> None:
+        for (record, _), row in zip(valid, rows):
+            if record.data.get("id") is not None:
+                self.ids[type][str(record.data["id"])] = row.id
+        self.created[type] = self.created.get(type, 0) + len(rows)
+    
+    async def _flush(self) -> None:
+        """Write the batch and the job's progress in one transaction"""
+        writers = {
+            "projects": self._write_projects,
+            "tasks": self._write_tasks,
+            "notes": self._write_notes,
+            "habits": self._write_habits,
+            "habit_logs": self._write_habit_logs,
+        }
+        
+        async with unit_of_work() as db:
+            for type, records in self.batch.items():
+                if records:
+                    await writers[type](db, records)
+            await ImportJobRepository(ImportJob, db).set_state(self.job_id, self.progress())
+        
+        self.batch = {type: [] for type in IMPORT_SCHEMAS}
+    
+    async def _write_projects(self, db: AsyncSession, records: List[ImportRecord]) -> None:
+        valid = self._validate("projects", records)
+        projects = await ProjectRepository(Project, db).create_many_for_user(
+            self.user_id, [fields for _, fields in valid]
+        )
+        self._created("projects", valid, projects)
+    
+    @staticmethod
+    def _upcoming_occurrence(record: ImportRecord, fields: Dict[str, Any]) -> bool:
+        """Whether a task is a pending occurrence its series will create again"""
+        if record.data.get("recurrence_parent_id") is None or fields["status"] != TaskStatus.PENDING:
+            return False
+        try:
+            date = as_utc(datetime.fromisoformat(str(record.data.get("recurrence_date"))))
+        except ValueError:
+            return False
+        return date >= datetime.now(timezone.utc)
+    
+    async def _write_tasks(self, db: AsyncSession, records: List[ImportRecord]) -> None:
+        valid = []
+        for record, fields in self._validate("tasks", records):
+            if self._upcoming_occurrence(record, fields):
+                self.skipped += 1
+            else:
+                valid.append((record, fields))
+        
+        parents = []
+        for record, fields in valid:
+            fields["project_id"] = self._lookup("projects", fields["project_id"])
+            # Past occurrences of recurring tasks come in as plain tasks; the
+            # first task of each series starts it again from now
+            if record.data.get("recurrence_parent_id") is not None:
+                fields["is_recurring"] = False
+            parent = fields["parent_task_id"]
+            fields["parent_task_id"] = self._lookup("tasks", parent)
+            # Parents further on in the file are set once they exist
+            parents.append(str(parent) if parent is not None and fields["parent_task_id"] is None else None)
+        
+        tasks = await TaskRepository(Task, db).create_many_for_user(
+            self.user_id, [fields for _, fields in valid]
+        )
+        self._created("tasks", valid, tasks)
+        self.parent_tasks.extend(
+            (task.id, parent) for task, parent in zip(tasks, parents) if parent is not None
+        )
+    
+    async def _write_notes(self, db: AsyncSession, records: List[ImportRecord]) -> None:
+        valid = []
+        for record, fields in self._validate("notes", records):
+            if any(len(tag.strip()) > TAG_MAX_LENGTH for tag in fields["tags"]):
+                self._reject(record, f"tags: Tag names can have at most {TAG_MAX_LENGTH} characters")
+            else:
+                valid.append((record, fields))
+        
+        # Wiki links are added at the end, when every note they can name exists
+        notes = await NoteRepository(Note, db).create_many_for_user(
+            self.user_id, [fields for _, fields in valid], wiki_links=False
+        )
+        self._created("notes", valid, notes)
+        
+        for (record, _), note in zip(valid, notes):
+            titles = extract_wiki_links(note.content)
+            if titles:
+                self.wiki_links[note.id] = titles
+            links = record.data.get("links")
+            if isinstance(links, list):
+                self.note_links.extend((note.id, str(target)) for target in links)
+    
+    async def _write_habits(self, db: AsyncSession, records: List[ImportRecord]) -> None:
+        valid = []
+        for record, fields in self._validate("habits", records):
+            # The schema takes reminder times as strings; the column is a time
+            if fields["reminder_time"]:
+                try:
+                    fields["reminder_time"] = time.fromisoformat(fields["reminder_time"])
+                except ValueError:
+                    self._reject(record, "reminder_time: Expected a time such as 08:30")
+                    continue
+            else:
+                fields["reminder_time"] = None
+            valid.append((record, fields))
+        
+        habits = await HabitRepository(Habit, db).create_many_for_user(
+            self.user_id, [fields for _, fields in valid]
+        )
+        self._created("habits", valid, habits)
+    
+    async def _write_habit_logs(self, db: AsyncSession, records: List[ImportRecord]) -> None:
+        # Exports name the date column; the schema calls it "date"
+        for record in records:
+            if isinstance(record.data, dict) and "date" not in record.data:
+                record.data["date"] = record.data.get("log_date")
+        
+        logs = []
+        for record, fields in self._validate("habit_logs", records):
+            habit_id = self._lookup("habits", record.data.get("habit_id"))
+            if habit_id is None:
+                self._reject(record, "habit_id: Not a habit in this import")
+                continue
+            logs.append({
+                "habit_id": habit_id,
+                "log_date": fields["date"],
+                "completed": fields["completed"],
+                "notes": fields["notes"]
+            })
+        
+        created = await HabitLogRepository(db).create_many(self.user_id, logs)
+        self.created["habit_logs"] = self.created.get("habit_logs", 0) + len(created)
+    
+    async def _resolve_references(self) -> None:
+        """Add links and parents that pointed ahead in the file, and queue a streak rebuild"""
+        size = settings.IMPORT_BATCH_SIZE
+        
+        async with unit_of_work() as db:
+            note_repo = NoteRepository(Note, db)
+            # Wiki links first, so links the file also lists keep their origin
+            for chunk in _chunks(list(self.wiki_links.items()), size):
+                await note_repo.add_wiki_links(self.user_id, dict(chunk))
+            
+            links = [
+                (source_id, self.ids["notes"][target])
+                for source_id, target in self.note_links
+                if target in self.ids["notes"]
+            ]
+            for chunk in _chunks(links, size):
+                await note_repo.add_links(self.user_id, chunk)
+            
+            parents = {
+                task_id: {"parent_task_id": self.ids["tasks"][parent]}
+                for task_id, parent in self.parent_tasks
+                if parent in self.ids["tasks"]
+            }
+            if parents:
+                await TaskRepository(Task, db).update_many_for_user(self.user_id, parents)
+            
+            if self.created.get("habit_logs"):
+                await enqueue(
+                    db,
+                    "habits.rebuild_streaks",
+                    {"user_id": self.user_id},
+                    user_id=self.user_id,
+                    idempotency_key=f"habits.rebuild_streaks:{self.user_id}"
+                )
+
+
+async def run_import(
+    job_id: UUID,
+    user_id: str,
+    path: str,
+    format: ImportFormat
+) -> None:
+    """Run an import job to completion and record how it went, then remove the upload"""
+    account_import = AccountImport(job_id, user_id)
+    try:
+        async with unit_of_work() as db:
+            await ImportJobRepository(ImportJob, db).set_state(
+                job_id, {"status": ImportStatus.RUNNING, "started_at": func.now()}
+            )
+        
+        records = read_vault(path) if format == ImportFormat.MARKDOWN else read_ndjson(path)
+        await account_import.run(records)
+        outcome = {"status": ImportStatus.COMPLETED, **account_import.progress()}
+    except Exception as e:
+        logger.exception("Import %s failed", job_id)
+        # Progress stays as of the last batch committed
+        outcome = {"status": ImportStatus.FAILED, "error": str(e).split("\n", 1)[0]}
+    finally:
+        Path(path).unlink(missing_ok=True)
+    
+    async with unit_of_work() as db:
+        await ImportJobRepository(ImportJob, db).set_state(
+            job_id, {**outcome, "finished_at": func.now()}
+        )
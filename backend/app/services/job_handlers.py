@@ -0,0 +1,54 @@
+"""
+Handlers for background jobs; importing this module registers them.
+"""
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.import_job import ImportFormat
+from app.models.task import Task
+from app.repositories.habit import HabitStreakRepository
+from app.repositories.task import TaskRepository
+from app.services import autosave
+from app.services.importer import run_import
+from app.services.jobs import job_handler
+from app.services.recurrence import window_end
+
+
+@job_handler("habits.rebuild_streaks")
+async def rebuild_streaks(db: AsyncSession, user_id: str) -> Dict[str, int]:
+    """Rebuild a user's habit streaks from their logs"""
+    rebuilt = await HabitStreakRepository(db).rebuild(user_id)
+    return {"rebuilt": rebuilt}
+
+
+@job_handler("notes.autosaved")
+async def finish_autosave(
+    db: AsyncSession,
+    note_id: str,
+    user_id: str,
+    since: float
+) -> Dict[str, Any]:
+    """Record a version for a note's burst of autosaves once it goes quiet"""
+    return await autosave.finish(db, user_id, UUID(note_id), since)
+
+
+@job_handler("imports.run")
+async def import_upload(
+    db: AsyncSession,
+    import_id: str,
+    user_id: str,
+    path: str,
+    format: str
+) -> None:
+    """Run an import; it commits batch by batch on sessions of its own"""
+    await run_import(UUID(import_id), user_id, path, ImportFormat(format))
+
+
+@job_handler("tasks.materialize_occurrences", every=settings.RECURRENCE_REFRESH_SECONDS)
+async def materialize_occurrences(db: AsyncSession) -> Dict[str, int]:
+    """Create the occurrences of recurring tasks due within RECURRENCE_WINDOW_DAYS"""
+    created = await TaskRepository(Task, db).materialize_occurrences(window_end())
+    return {"created": created}
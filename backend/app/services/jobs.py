@@ -0,0 +1,274 @@
+"""
+Background jobs, run off the request path by ``python -m app.worker``.
+
+Jobs live in the jobs table. Enqueueing inserts a row in the caller's unit
+of work, so a job only exists once the write that asked for it commits.
+Workers claim due jobs with FOR UPDATE SKIP LOCKED, so any number of them
+can share the queue. A handler's writes commit in one transaction with the
+job being marked done.
+
+Redis, when available, only wakes idle workers as soon as a job is
+committed; without it they notice new jobs within JOBS_POLL_SECONDS.
+
+A failed attempt is retried after a backoff that doubles each time, up to
+the job's max_attempts. Workers send a heartbeat while running a job; a job
+whose worker stops sending one for JOBS_LOCK_TIMEOUT_SECONDS is queued
+again, or failed if that was its last attempt.
+
+Handlers registered with ``every`` also run periodically: workers keep the
+next run queued, keyed by its time so that only one is.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import aioredis, get_redis, mark_redis_down, RedisError
+from app.core.config import settings
+from app.core.database import on_commit, unit_of_work
+from app.models.job import Job
+from app.repositories.job import JobRepository
+
+
+logger = logging.getLogger(__name__)
+
+# Redis list pushed to when jobs are committed; idle workers block on it
+WAKE_KEY = "jobs:wake"
+
+Handler = Callable[..., Awaitable[Any]]
+
+# Job handlers by name, registered with @job_handler
+handlers: Dict[str, Handler] = {}
+
+# Seconds between runs of the periodic jobs, by name
+periodic: Dict[str, float] = {}
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying won't fix"""
+
+
+class ClaimLostError(Exception):
+    """The job's claim went stale and was released before it finished"""
+
+
+def job_handler(name: str, every: Optional[float] = None) -> Callable[[Handler], Handler]:
+    """
+    Register a coroutine function as the handler for ``name`` jobs.
+    
+    Handlers are called with a session and the job's payload as keyword
+    arguments. Their writes commit together with the job's completion, and
+    their return value, which must be JSON-serializable, is kept as its
+    result. With ``every``, a job without a payload is also run every
+    ``every`` seconds.
+    """
+    def register(handler: Handler) -> Handler:
+        handlers[name] = handler
+        if every is not None:
+            periodic[name] = every
+        return handler
+    return register
+
+
+async def _wake_workers() -> None:
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.lpush(WAKE_KEY, 1)
+        # Idle workers take one entry each; the rest only need to be bounded
+        await redis.ltrim(WAKE_KEY, 0, settings.JOBS_CONCURRENCY * 16)
+    except (RedisError, OSError) as e:
+        mark_redis_down(e)
+
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    user_id: Optional[str] = None,
+    delay: float = 0,
+    run_at: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None,
+    max_attempts: Optional[int] = None
+) -> UUID:
+    """
+    Queue a ``name`` job as part of the session's unit of work; returns its ID.
+    
+    It runs after ``delay`` seconds, or at ``run_at``. If an unfinished job
+    already has ``idempotency_key``, that job's ID is returned instead of
+    queueing another one. Jobs with a ``user_id`` are visible to that user
+    through /jobs.
+    """
+    if run_at is None:
+        run_at = func.now() + timedelta(seconds=delay)
+    
+    job_id = await JobRepository(Job, db).add(
+        name,
+        payload or {},
+        user_id=user_id,
+        run_at=run_at,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        idempotency_key=idempotency_key
+    )
+    on_commit(db, _wake_workers, key="jobs.wake")
+    return job_id
+
+
+async def schedule_periodic(db: AsyncSession) -> None:
+    """Queue the next run of each periodic job, unless it's queued already"""
+    now = time.time()
+    for name, every in periodic.items():
+        slot = int(now // every) + 1
+        await enqueue(
+            db,
+            name,
+            run_at=datetime.fromtimestamp(slot * every, timezone.utc),
+            idempotency_key=f"{name}:{slot}"
+        )
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retrying a job that has failed ``attempts`` times, with jitter"""
+    delay = min(
+        settings.JOBS_RETRY_MAX_SECONDS,
+        settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobWorker:
+    """Claims and runs jobs, up to ``concurrency`` at a time"""
+    
+    def __init__(self, concurrency: int = settings.JOBS_CONCURRENCY):
+        self.concurrency = concurrency
+        self.id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+        # Redis connection for blocking waits, which outlast the shared
+        # client's socket timeout
+        self._reader = None
+    
+    def stop(self) -> None:
+        """Stop claiming jobs; run() returns once the running ones finish"""
+        self._stopping.set()
+    
+    async def run(self) -> None:
+        """Run jobs until stop() is called"""
+        logger.info("Job worker %s started with %s slots", self.id, self.concurrency)
+        try:
+            await asyncio.gather(
+                self._maintain(),
+                *(self._work() for _ in range(self.concurrency))
+            )
+        finally:
+            if self._reader is not None:
+                await self._reader.aclose()
+                self._reader = None
+        logger.info("Job worker %s stopped", self.id)
+    
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                async with unit_of_work() as db:
+                    job = await JobRepository(Job, db).claim(self.id)
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job = None
+            
+            if job is None:
+                await self._wait()
+            else:
+                await self._run(job)
+    
+    async def _run(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            handler = handlers.get(job.name)
+            if handler is None:
+                raise PermanentJobError(f"No handler for job {job.name!r}")
+            
+            async with unit_of_work() as db:
+                result = await handler(db, **job.payload)
+                # Rolls back the handler's writes; the job runs again elsewhere
+                if not await JobRepository(Job, db).succeed(job.id, self.id, result):
+                    raise ClaimLostError(f"Claim on job {job.id} was released")
+        except ClaimLostError:
+            logger.warning("Job %s (%s) outlived its claim; discarded its result", job.id, job.name)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, job.attempts)
+            retry = not isinstance(e, PermanentJobError) and job.attempts < job.max_attempts
+            await self._record_failure(job, f"{type(e).__name__}: {e}", retry_delay(job.attempts) if retry else None)
+        finally:
+            heartbeat.cancel()
+    
+    async def _record_failure(self, job: Job, error: str, retry_in: Optional[float]) -> None:
+        try:
+            async with unit_of_work() as db:
+                await JobRepository(Job, db).fail(job.id, self.id, error, retry_in)
+        except Exception:
+            # The claim goes stale and is released for another attempt
+            logger.exception("Failed to record the failure of job %s", job.id)
+    
+    async def _heartbeat(self, job_id: UUID) -> None:
+        while True:
+            await asyncio.sleep(settings.JOBS_LOCK_TIMEOUT_SECONDS / 3)
+            try:
+                async with unit_of_work() as db:
+                    await JobRepository(Job, db).heartbeat(job_id, self.id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {str(e)}")
+    
+    async def _maintain(self) -> None:
+        """
+        Release stale claims, purge old finished jobs and queue periodic
+        jobs, periodically
+        """
+        while not self._stopping.is_set():
+            try:
+                async with unit_of_work() as db:
+                    job_repo = JobRepository(Job, db)
+                    released = await job_repo.release_stale(settings.JOBS_LOCK_TIMEOUT_SECONDS)
+                    await job_repo.purge_finished(settings.JOBS_RETENTION_SECONDS)
+                    await schedule_periodic(db)
+                if released:
+                    logger.warning("Released %s jobs whose worker stopped responding", released)
+            except Exception:
+                logger.exception("Job maintenance failed")
+            
+            await self._sleep(settings.JOBS_LOCK_TIMEOUT_SECONDS / 2)
+    
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, waking early on stop()"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    def _get_reader(self):
+        if self._reader is None:
+            self._reader = aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+            )
+        return self._reader
+    
+    async def _wait(self) -> None:
+        """Wait for a job to be committed, or at most JOBS_POLL_SECONDS"""
+        if get_redis() is not None and aioredis is not None:
+            try:
+                await self._get_reader().blpop(WAKE_KEY, timeout=settings.JOBS_POLL_SECONDS)
+                return
+            except (RedisError, OSError) as e:
+                mark_redis_down(e)
+        
+        await self._sleep(settings.JOBS_POLL_SECONDS)
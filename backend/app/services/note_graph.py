@@ -0,0 +1,160 @@
+"""
+Compact in-memory note link graph.
+"""
+from array import array
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+
+class LinkGraph:
+    """
+    Undirected note link graph in compressed sparse row form.
+    
+    Notes are numbered by their position in ``ids``; the neighbors of note
+    ``i`` are ``neighbors[offsets[i]:offsets[i + 1]]``, and ``outgoing``
+    marks the ones note ``i`` links to, so the links keep their direction.
+    Flat integer arrays stay small and cheap to traverse even for tens of
+    thousands of links, and the structure never holds ORM objects.
+    """
+    
+    __slots__ = ("ids", "index", "offsets", "neighbors", "outgoing")
+    
+    def __init__(self, ids: Sequence[UUID], links: Iterable[Tuple[UUID, UUID]]):
+        self.ids = list(ids)
+        self.index: Dict[UUID, int] = {note_id: i for i, note_id in enumerate(self.ids)}
+        
+        pairs = []
+        degree = array("l", bytes(array("l").itemsize * len(self.ids)))
+        for source, target in links:
+            a, b = self.index.get(source), self.index.get(target)
+            if a is None or b is None or a == b:
+                continue
+            pairs.append((a, b))
+            degree[a] += 1
+            degree[b] += 1
+        
+        self.offsets = array("l", [0])
+        for count in degree:
+            self.offsets.append(self.offsets[-1] + count)
+        
+        self.neighbors = array("l", bytes(array("l").itemsize * self.offsets[-1]))
+        self.outgoing = array("b", bytes(self.offsets[-1]))
+        fill = array("l", self.offsets[:-1])
+        for a, b in pairs:
+            self.neighbors[fill[a]] = b
+            self.outgoing[fill[a]] = 1
+            fill[a] += 1
+            self.neighbors[fill[b]] = a
+            fill[b] += 1
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def _adjacent(self, i: int) -> array:
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+    
+    def shortest_path(
+        self,
+        source: UUID,
+        target: UUID,
+        max_depth: Optional[int] = None
+    ) -> Optional[List[UUID]]:
+        """
+        Fewest-hops path between two notes, ignoring link direction.
+        
+        Searches breadth-first from both ends, always expanding the smaller
+        frontier. Returns None when the notes aren't connected within
+        ``max_depth`` hops.
+        """
+        if source not in self.index or target not in self.index:
+            return None
+        
+        start, goal = self.index[source], self.index[target]
+        if start == goal:
+            return [source]
+        
+        # Parent pointers for each side; -1 marks the side's root
+        parents = ({start: -1}, {goal: -1})
+        frontiers = ([start], [goal])
+        depth = 0
+        
+        while frontiers[0] and frontiers[1]:
+            if max_depth is not None and depth >= max_depth:
+                return None
+            depth += 1
+            
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            next_frontier = []
+            
+            for node in frontiers[side]:
+                for neighbor in self._adjacent(node):
+                    if neighbor in seen:
+                        continue
+                    seen[neighbor] = node
+                    if neighbor in other:
+                        return self._join_path(parents, neighbor)
+                    next_frontier.append(neighbor)
+            
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+        
+        return None
+    
+    def _join_path(self, parents: Tuple[Dict[int, int], Dict[int, int]], meet: int) -> List[UUID]:
+        forward = []
+        node = meet
+        while node != -1:
+            forward.append(node)
+            node = parents[0][node]
+        forward.reverse()
+        
+        node = parents[1][meet]
+        while node != -1:
+            forward.append(node)
+            node = parents[1][node]
+        
+        return [self.ids[i] for i in forward]
+    
+    def components(self, min_size: int = 1) -> List[List[UUID]]:
+        """Connected components, largest first"""
+        component = array("l", [-1]) * len(self.ids)
+        groups = []
+        
+        for root in range(len(self.ids)):
+            if component[root] != -1:
+                continue
+            
+            component[root] = len(groups)
+            members = [root]
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for neighbor in self._adjacent(node):
+                    if component[neighbor] == -1:
+                        component[neighbor] = len(groups)
+                        members.append(neighbor)
+                        queue.append(neighbor)
+            groups.append(members)
+        
+        groups.sort(key=len, reverse=True)
+        return [
+            [self.ids[i] for i in members]
+            for members in groups
+            if len(members) >= min_size
+        ]
+    
+    def links(self) -> Iterator[Tuple[UUID, UUID]]:
+        """Every (source, target) link"""
+        for i, source in enumerate(self.ids):
+            for position in range(self.offsets[i], self.offsets[i + 1]):
+                if self.outgoing[position]:
+                    yield source, self.ids[self.neighbors[position]]
+    
+    def orphans(self) -> List[UUID]:
+        """Notes with no links in either direction"""
+        return [
+            note_id
+            for i, note_id in enumerate(self.ids)
+            if self.offsets[i + 1] == self.offsets[i]
+        ]
@@ -0,0 +1,61 @@
+"""
+Line-based deltas between note versions.
+
+A delta is a list of operations applied to the lines of the base text in
+order: ``["=", n]`` copies the next n lines, ``["-", n]`` skips them and
+``["+", [line, ...]]`` inserts new lines. Lines keep their line endings,
+so applying a delta reproduces the text exactly.
+"""
+import difflib
+from typing import Any, List
+
+
+Delta = List[List[Any]]
+
+
+def make_delta(base: str, text: str) -> Delta:
+    """Compute the delta that turns ``base`` into ``text``"""
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    
+    delta: Delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(["=", i2 - i1])
+            continue
+        if tag in ("delete", "replace"):
+            delta.append(["-", i2 - i1])
+        if tag in ("insert", "replace"):
+            delta.append(["+", lines[j1:j2]])
+    return delta
+
+
+def apply_delta(base: str, delta: Delta) -> str:
+    """Rebuild a version from its base text and delta"""
+    base_lines = base.splitlines(keepends=True)
+    position = 0
+    parts = []
+    
+    for op, arg in delta:
+        if op == "=":
+            parts.extend(base_lines[position:position + arg])
+            position += arg
+        elif op == "-":
+            position += arg
+        elif op == "+":
+            parts.extend(arg)
+        else:
+            raise ValueError(f"Unknown delta operation: {op}")
+    
+    return "".join(parts)
+
+
+def unified_diff(old: str, new: str, old_label: str, new_label: str) -> str:
+    """Human-readable diff between two versions"""
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=old_label,
+        tofile=new_label
+    ))
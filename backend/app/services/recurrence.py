@@ -0,0 +1,83 @@
+"""
+Recurring tasks: expanding a task's RRULE into the dates it recurs on.
+
+A series starts with a task that has is_recurring set and a recurrence_rule
+(RFC 5545 RRULE, e.g. ``FREQ=WEEKLY;BYDAY=MO,TH``). Its recurrence_date is
+the series' DTSTART, pinned when it's created so that rescheduling the task
+doesn't move the series. The series recurs while that first task is
+recurring and not deleted.
+
+Each occurrence is a task of its own, with recurrence_parent_id pointing at
+the first one and recurrence_date set to the date it stands for. At most one
+task exists per date: an occurrence that was deleted stays skipped. New
+occurrences copy the first task's title and other fields.
+
+Occurrences are created ahead of time: the next one when a task of the
+series is completed, and every upcoming one within RECURRENCE_WINDOW_DAYS
+by a periodic job. Further out, /tasks/calendar expands rules on the fly
+instead of storing rows.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice, takewhile
+from typing import List, Optional
+
+from dateutil.rrule import rrulebase, rrulestr
+
+from app.core.config import settings
+
+
+# Rules are expanded from their DTSTART, so finer ones cost too much to walk
+TOO_FREQUENT = re.compile(r"FREQ=(MINUTELY|SECONDLY)", re.IGNORECASE)
+
+
+def _parse(rule: str, dtstart: datetime) -> rrulebase:
+    # cache=True keeps the dates generated so far, for repeated lookups
+    return rrulestr(rule, dtstart=dtstart, cache=True)
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(rule: str, dtstart: datetime) -> rrulebase:
+    """Parse a series' rule, once per rule and DTSTART"""
+    return _parse(rule, dtstart)
+
+
+def validate_rule(rule: str) -> str:
+    """Check that ``rule`` parses and isn't too frequent; raises ValueError otherwise"""
+    try:
+        _parse(rule, datetime.now(timezone.utc))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid recurrence rule: {e}")
+    if TOO_FREQUENT.search(rule):
+        raise ValueError("Tasks can recur at most hourly")
+    return rule
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC, as the database does"""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def window_end() -> datetime:
+    """Occurrences due up to this date are created ahead of time"""
+    return datetime.now(timezone.utc) + timedelta(days=settings.RECURRENCE_WINDOW_DAYS)
+
+
+def occurrences(
+    rule: str,
+    dtstart: datetime,
+    after: datetime,
+    before: Optional[datetime] = None,
+    limit: int = 1,
+    inclusive: bool = False
+) -> List[datetime]:
+    """
+    Up to ``limit`` dates of the series after ``after`` (or from it, if
+    ``inclusive``) and before ``before``, earliest first.
+    """
+    dates = compile_rule(rule, as_utc(dtstart)).xafter(as_utc(after), inc=inclusive)
+    if before is not None:
+        before = as_utc(before)
+        dates = takewhile(lambda date: date < before, dates)
+    return list(islice(dates, limit))
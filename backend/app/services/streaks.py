@@ -0,0 +1,103 @@
+"""
+Streak arithmetic over completed habit log dates, in SQL and in Python.
+"""
+from array import array
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Integer, Subquery, cast, func, select
+
+
+class Streak(NamedTuple):
+    """Current and best run of consecutive completed days"""
+    current: int = 0
+    best: int = 0
+
+
+class StreakState(NamedTuple):
+    """The latest run of consecutive completed days and the best run"""
+    start_date: date
+    last_date: date
+    length: int
+    best: int
+
+
+def current_length(last_date: Optional[date], length: int, today: date) -> int:
+    """
+    Length of the current streak given the latest run.
+    
+    The latest run is still current if it reaches today, or yesterday when
+    today has not been logged yet; anything older counts as broken.
+    """
+    if last_date is None or (today - last_date).days > 1:
+        return 0
+    return length
+
+
+def islands_query(completed: Subquery) -> Subquery:
+    """
+    Gaps-and-islands over completed (habit_id, user_id, log_date) rows:
+    one row per run of consecutive days, with its start_date, last_date and
+    length.
+    
+    Subtracting each date's row number within its habit gives the same
+    value for every date in a run, so grouping by it yields one row per
+    run. streak_state does the same in Python, over date ordinals.
+    """
+    row_number = func.row_number().over(
+        partition_by=completed.c.habit_id,
+        order_by=completed.c.log_date
+    )
+    numbered = select(
+        completed.c.habit_id,
+        completed.c.user_id,
+        completed.c.log_date,
+        (completed.c.log_date - cast(row_number, Integer)).label("island")
+    ).subquery()
+    
+    return select(
+        numbered.c.habit_id,
+        numbered.c.user_id,
+        func.min(numbered.c.log_date).label("start_date"),
+        func.max(numbered.c.log_date).label("last_date"),
+        func.count().label("length")
+    ).group_by(
+        numbered.c.habit_id,
+        numbered.c.user_id,
+        numbered.c.island
+    ).subquery()
+
+
+def streak_state(log_dates: Iterable[date]) -> Optional[StreakState]:
+    """Find the latest and best runs from the dates a habit was completed on"""
+    ordinals = array("l", sorted({d.toordinal() for d in log_dates}))
+    if not ordinals:
+        return None
+    
+    best = run = 1
+    for previous, day in zip(ordinals, ordinals[1:]):
+        run = run + 1 if day - previous == 1 else 1
+        best = max(best, run)
+    
+    # ``run`` is now the length of the last island
+    return StreakState(
+        start_date=date.fromordinal(ordinals[-1] - run + 1),
+        last_date=date.fromordinal(ordinals[-1]),
+        length=run,
+        best=best
+    )
+
+
+def compute_states(
+    rows: Iterable[Tuple[Hashable, date]]
+) -> Dict[Hashable, StreakState]:
+    """Find streak state for many habits from (habit_id, log_date) rows"""
+    dates_by_habit = defaultdict(list)
+    for habit_id, log_date in rows:
+        dates_by_habit[habit_id].append(log_date)
+    
+    return {
+        habit_id: streak_state(log_dates)
+        for habit_id, log_dates in dates_by_habit.items()
+    }
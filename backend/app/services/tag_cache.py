@@ -0,0 +1,50 @@
+"""
+Per-user tag usage counts, dropped when notes are tagged, untagged or deleted.
+"""
+import time
+from typing import Dict, Optional
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+
+
+class TagCountCache:
+    """
+    Tag name to number of live notes using it, per user.
+    
+    Writes that change the counts drop the entry once they commit, and the
+    next read recounts. Adjusting the cached counts in place instead would
+    lose one of two concurrent updates. Like AggregateCache, dropping leaves
+    a short-lived marker so a count that started before the write can't be
+    stored over it. Entries expire after TAG_CACHE_TTL_SECONDS.
+    """
+    
+    def __init__(self):
+        self._cache = TieredCache(
+            "tag_counts",
+            ttl=settings.TAG_CACHE_TTL_SECONDS,
+            local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+        )
+    
+    async def get(self, user_id: str) -> Optional[Dict[str, int]]:
+        """Get a user's cached tag counts"""
+        entry = await self._cache.get(user_id)
+        return entry["counts"] if entry is not None and "counts" in entry else None
+    
+    async def set(self, user_id: str, counts: Dict[str, int], started_at: float) -> None:
+        """Cache tag counts read from ``started_at`` on, unless dropped since"""
+        await self._cache.set_unless_newer(
+            user_id,
+            {"counts": counts},
+            "invalidated_at",
+            started_at
+        )
+    
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user's counts so they are recounted on the next read"""
+        # The marker only needs to outlive a count in flight
+        await self._cache.set(user_id, {"invalidated_at": time.time()}, ttl=60)
+
+
+# Global instance
+tag_counts = TagCountCache()
@@ -0,0 +1,89 @@
+"""
+Cross-request cache of resolved users, keyed by Clerk ID.
+"""
+import hashlib
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.models.user import User
+
+
+# Claims that get_current_user syncs onto the user row
+SYNCED_CLAIMS = ("email", "username", "first_name", "last_name")
+
+
+def claims_fingerprint(user_info: Dict[str, Any]) -> str:
+    """Hash of the profile claims that are synced to the database"""
+    synced = {claim: user_info.get(claim) for claim in SYNCED_CLAIMS}
+    payload = json.dumps(synced, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    """Serialize the user's column values to JSON-safe types"""
+    data = {}
+    for attr in inspect(User).column_attrs:
+        value = getattr(user, attr.key)
+        if isinstance(value, (uuid.UUID, datetime, date)):
+            value = value.isoformat() if not isinstance(value, uuid.UUID) else str(value)
+        data[attr.key] = value
+    return data
+
+
+def _restore(data: Dict[str, Any]) -> User:
+    """Rebuild a detached User from a snapshot"""
+    values = dict(data)
+    values["id"] = uuid.UUID(values["id"])
+    for key in ("created_at", "updated_at", "deleted_at"):
+        if values.get(key):
+            values[key] = datetime.fromisoformat(values[key])
+    
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """
+    Resolved users by Clerk ID, together with the claims fingerprint they
+    were last synced against.
+    
+    Entries are snapshots rather than ORM instances, so every request gets
+    its own detached User that is never shared between sessions.
+    """
+    
+    def __init__(self):
+        self._cache = TieredCache(
+            "user",
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+            local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+        )
+    
+    async def get(self, clerk_id: str) -> Optional[Tuple[User, str]]:
+        """Get the cached user and its claims fingerprint"""
+        entry = await self._cache.get(clerk_id)
+        if entry is None:
+            return None
+        return _restore(entry["user"]), entry["fingerprint"]
+    
+    async def set(self, user: User, fingerprint: str) -> None:
+        """Cache a user that is in sync with ``fingerprint``"""
+        await self._cache.set(user.clerk_id, {
+            "user": _snapshot(user),
+            "fingerprint": fingerprint,
+        })
+    
+    async def invalidate(self, clerk_id: str) -> None:
+        """Drop a user after their row changed"""
+        await self._cache.delete(clerk_id)
+
+
+# Global instance
+user_cache = UserCache()
@@ -0,0 +1,30 @@
+"""
+Parsing of [[wiki links]] in note content.
+"""
+import re
+from typing import List
+
+
+# [[Title]], [[Title|alias]] and [[Title#heading]] all link to "Title"
+WIKI_LINK_PATTERN = re.compile(r"\[\[([^\[\]|#\n]+)(?:#[^\[\]|\n]*)?(?:\|[^\[\]\n]*)?\]\]")
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Key used to match link text against note titles. Must match the SQL
+    key in NoteRepository (app.repositories.note._title_key): whitespace
+    runs collapsed to one space, trimmed, then lower(), not casefold(),
+    which Postgres has no equivalent of.
+    """
+    return WHITESPACE.sub(" ", title).strip(" ").lower()
+
+
+def extract_wiki_links(content: str) -> List[str]:
+    """Get the distinct normalized titles linked from ``content``, in order"""
+    if not content or "[[" not in content:
+        return []
+    
+    titles = (normalize_title(match.group(1)) for match in WIKI_LINK_PATTERN.finditer(content))
+    return list(dict.fromkeys(title for title in titles if title))
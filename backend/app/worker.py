@@ -0,0 +1,38 @@
+"""
+Background job worker.
+
+    python -m app.worker
+
+Runs queued jobs (see app.services.jobs) until interrupted, finishing the
+ones it has started. Run as many worker processes as the load needs.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.cache import close_redis
+from app.core.config import settings
+from app.core.database import engine
+from app.services import job_handlers  # noqa: F401 - registers the handlers
+from app.services.jobs import JobWorker
+
+
+async def main() -> None:
+    worker = JobWorker()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    
+    try:
+        await worker.run()
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(main())
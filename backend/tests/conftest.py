@@ -0,0 +1,9 @@
+import os
+
+# CI sets a plain postgresql:// URL; the app's async engine needs asyncpg.
+# Rewritten before app.core.database creates the engine on import.
+_url = os.environ.get("DATABASE_URL", "")
+if _url.startswith("postgresql://"):
+    os.environ["DATABASE_URL"] = _url.replace(
+        "postgresql://", "postgresql+asyncpg://", 1
+    )
@@ -0,0 +1,281 @@
+"""
+Query plans against PostgreSQL: per-user list queries must be served by
+their composite indexes rather than a sequential scan.
+
+The tables are created in a schema of their own, seeded with the rows of
+many users and analyzed, so the planner chooses as it would on a real
+database. Only that schema is dropped afterwards.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+from uuid import UUID, uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.habit import Habit, HabitLog
+from app.models.note import Note
+from app.models.task import Project, Task, TaskStatus
+from app.repositories.habit import HabitLogRepository, HabitRepository
+from app.repositories.note import NoteRepository
+from app.repositories.task import ProjectRepository, TaskRepository
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+TABLES = [
+    Project.__table__,
+    Task.__table__,
+    Note.__table__,
+    Habit.__table__,
+    HabitLog.__table__,
+]
+
+USERS = 200
+USER = "user_7"
+
+# Rows per user
+PROJECTS = 50
+TASKS = 100
+SUBTASKS = 5
+NOTES = 100
+HABITS = 5
+LOG_DAYS = 20
+
+STATUSES = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED]
+
+
+def deleted(i: int) -> bool:
+    """Every fourth row is soft-deleted, which the partial indexes leave out"""
+    return i % 4 == 3
+
+
+class Seeded(NamedTuple):
+    engine: AsyncEngine
+    # A project and a parent task of USER's
+    project_id: UUID
+    parent_task_id: UUID
+
+
+async def seed(conn) -> Seeded:
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    projects, tasks, subtasks, notes, habits, logs = [], [], [], [], [], []
+
+    for n in range(USERS):
+        user_id = f"user_{n}"
+        project_ids = [uuid4() for _ in range(PROJECTS)]
+        projects += [
+            {
+                "id": id,
+                "user_id": user_id,
+                "name": f"Project {i}",
+                "is_deleted": deleted(i),
+            }
+            for i, id in enumerate(project_ids)
+        ]
+
+        task_ids = [uuid4() for _ in range(TASKS)]
+        tasks += [
+            {
+                "id": id,
+                "user_id": user_id,
+                "title": f"Task {i}",
+                "status": STATUSES[i % len(STATUSES)],
+                "due_date": now + timedelta(days=i - TASKS // 2),
+                "project_id": project_ids[i % PROJECTS] if i % 4 == 0 else None,
+                "created_at": now - timedelta(minutes=i),
+                "is_deleted": deleted(i),
+            }
+            for i, id in enumerate(task_ids)
+        ]
+        subtasks += [
+            {
+                "user_id": user_id,
+                "title": f"Subtask {i}",
+                "status": TaskStatus.PENDING,
+                "due_date": None,
+                "project_id": None,
+                "parent_task_id": task_ids[0],
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(SUBTASKS)
+        ]
+        if user_id == USER:
+            mine = Seeded(None, project_ids[0], task_ids[0])
+
+        notes += [
+            {
+                "user_id": user_id,
+                "title": f"Note {i}",
+                "content": "",
+                "created_at": now - timedelta(minutes=i),
+                # Deleting a note is its latest change
+                "updated_at": now if deleted(i) else now - timedelta(minutes=i),
+                "is_deleted": deleted(i),
+            }
+            for i in range(NOTES)
+        ]
+
+        habit_ids = [uuid4() for _ in range(HABITS)]
+        habits += [
+            {
+                "id": id,
+                "user_id": user_id,
+                "name": f"Habit {i}",
+                "is_deleted": deleted(i),
+            }
+            for i, id in enumerate(habit_ids)
+        ]
+        logs += [
+            {
+                "habit_id": habit_id,
+                "user_id": user_id,
+                "log_date": today - timedelta(days=day),
+                "completed": day % 3 != 0,
+                "is_deleted": deleted(day),
+            }
+            for habit_id in habit_ids
+            for day in range(LOG_DAYS)
+        ]
+
+    for table, rows in [
+        (Project, projects),
+        (Task, tasks),
+        (Task, subtasks),
+        (Note, notes),
+        (Habit, habits),
+        (HabitLog, logs),
+    ]:
+        await conn.execute(insert(table), rows)
+    return mine
+
+
+@pytest_asyncio.fixture(scope="module")
+async def database():
+    schema = f"query_plans_{uuid4().hex[:12]}"
+    admin = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with admin.begin() as conn:
+            # For the trigram indexes on tasks, as in the migrations
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    except OSError as e:
+        await admin.dispose()
+        pytest.skip(f"PostgreSQL is not available: {e}")
+
+    # Unqualified tables, in DDL and queries alike, resolve to the schema
+    engine = admin.execution_options(schema_translate_map={None: schema})
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+            mine = await seed(conn)
+            for table in TABLES:
+                await conn.execute(text(f'ANALYZE "{schema}"."{table.name}"'))
+
+        yield mine._replace(engine=engine)
+    finally:
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await admin.dispose()
+
+
+async def explain(engine: AsyncEngine, run) -> str:
+    """Plan of the first statement ``run`` executes, its main query"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await run(session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[0]
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return "\n".join(row[0] for row in result)
+
+
+def year() -> tuple:
+    today = date.today()
+    return today - timedelta(days=365), today
+
+
+# Query, and the indexes that may serve it
+CASES = {
+    "tasks": (
+        lambda db, seeded: TaskRepository(Task, db).get_multi_by_user(USER, limit=50),
+        {"ix_tasks_user_created"},
+    ),
+    "tasks_by_status": (
+        lambda db, seeded: TaskRepository(Task, db).get_by_status(
+            USER, TaskStatus.PENDING, limit=50
+        ),
+        {"ix_tasks_user_status", "ix_tasks_user_created"},
+    ),
+    "tasks_by_project": (
+        lambda db, seeded: TaskRepository(Task, db).get_by_project(
+            USER, seeded.project_id, limit=50
+        ),
+        {"ix_tasks_user_project", "ix_tasks_user_created"},
+    ),
+    "overdue_tasks": (
+        lambda db, seeded: TaskRepository(Task, db).get_overdue(USER, limit=50),
+        {"ix_tasks_user_due"},
+    ),
+    "subtasks": (
+        lambda db, seeded: TaskRepository(Task, db).get_subtasks(
+            USER, seeded.parent_task_id
+        ),
+        {"ix_tasks_user_parent"},
+    ),
+    "projects": (
+        lambda db, seeded: ProjectRepository(Project, db).get_multi_by_user(
+            USER, limit=50
+        ),
+        {"ix_projects_user_created"},
+    ),
+    "notes": (
+        lambda db, seeded: NoteRepository(Note, db).get_multi_by_user(USER, limit=50),
+        {"ix_notes_user_created"},
+    ),
+    "notes_by_updated": (
+        lambda db, seeded: NoteRepository(Note, db).get_multi_by_user(
+            USER, limit=50, order_by="-updated_at"
+        ),
+        {"ix_notes_user_updated"},
+    ),
+    "habits": (
+        lambda db, seeded: HabitRepository(Habit, db).get_multi_by_user(
+            USER, limit=50
+        ),
+        {"ix_habits_user_created"},
+    ),
+    "user_logs": (
+        lambda db, seeded: HabitLogRepository(db).get_user_logs(USER, *year()),
+        {"ix_habit_logs_user_date"},
+    ),
+    "user_logs_page": (
+        lambda db, seeded: HabitLogRepository(db).get_user_logs(
+            USER, *year(), limit=50
+        ),
+        {"ix_habit_logs_user_date"},
+    ),
+}
+
+
+@pytest.mark.parametrize("case", list(CASES))
+async def test_list_query_uses_per_user_index(database, case):
+    query, indexes = CASES[case]
+    plan = await explain(database.engine, lambda db: query(db, database))
+
+    assert "Seq Scan" not in plan, plan
+    assert any(index in plan for index in indexes), plan